@@ -6,11 +6,16 @@
 # las palabras verdaderamente importantes emerjan.
 
 # --- IMPORTACIONES ---
-import re
 from collections import Counter
 import matplotlib.pyplot as plt
+import os
 import subprocess
 import sys
+from motor_frecuencias import MotorFrecuencias, SesionRefinamiento
+from lectura_corpus import CorpusTxt, comprobar_utf8, iterar_bloques, extraer_frases_pdf, leer_con_cache
+from registro_stopwords import cargar_stopwords_profesionales
+from sentimiento_lexico import analizar_bloques_en_paralelo
+from lexico_ponderado import LexicoPonderado, PuntuadorPonderado
 
 # --- DEPENDENCIAS DEL PROYECTO ---
 DEPENDENCIAS = {
@@ -19,7 +24,9 @@ DEPENDENCIAS = {
     'scikit-learn': 'sklearn',
     'PyPDF2': 'PyPDF2',
     'python-docx': 'docx',
-    'matplotlib': 'matplotlib'
+    'matplotlib': 'matplotlib',
+    'numpy': 'numpy',
+    'scipy': 'scipy'  # matrices dispersas de motor_similitud (04_similitud_jaccard.py)
 }
 
 
@@ -39,55 +46,9 @@ def instalar_dependencias():
 # instalar_dependencias()
 
 # --- STOPWORDS DE BASES DE DATOS PROFESIONALES ---
-def cargar_stopwords_profesionales():
-    """Carga stopwords combinando múltiples bases de datos profesionales"""
-    stopwords_set = set()
-
-    # 1. NLTK (179 palabras)
-    try:
-        from nltk.corpus import stopwords
-        # Descargar stopwords si no están disponibles
-        try:
-            stopwords.words('english')
-        except LookupError:
-            print("Descargando stopwords de NLTK...")
-            import nltk
-            nltk.download('stopwords', quiet=True)
-
-        stopwords_set.update(stopwords.words('english'))
-        print("✓ NLTK: 179 stopwords cargadas")
-    except ImportError:
-        print("✗ NLTK no disponible")
-
-    # 2. spaCy (326 palabras)
-    try:
-        import spacy
-        try:
-            nlp = spacy.load('en_core_web_sm')
-        except OSError:
-            print("Modelo spaCy no encontrado. Usando solo NLTK y Scikit-learn...")
-            nlp = None
-
-        if nlp:
-            stopwords_set.update(nlp.Defaults.stop_words)
-            print("✓ spaCy: 326 stopwords cargadas")
-    except ImportError:
-        print("✗ spaCy no disponible")
-
-    # 3. Scikit-learn (318 palabras)
-    try:
-        from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
-        stopwords_set.update(ENGLISH_STOP_WORDS)
-        print("✓ Scikit-learn: 318 stopwords cargadas")
-    except ImportError:
-        print("✗ Scikit-learn no disponible")
-
-    print(f"🎯 Total stopwords únicas: {len(stopwords_set)}")
-    return stopwords_set
-
-
-# Cargar stopwords profesionales
-stopwords_en = cargar_stopwords_profesionales()
+# NLTK + spaCy + Scikit-learn; tras la primera ejecución se leen de una caché en disco
+# sin importar ninguna de esas librerías.
+stopwords_en = set(cargar_stopwords_profesionales())
 
 # Si no se cargó ninguna, usar lista básica
 if not stopwords_en:
@@ -129,6 +90,9 @@ negative_lexicon = {
     "destructive", "fatal", "lethal", "deadly", "mortal", "terminal", "hopeless", "desperate"
 }
 
+# Léxico de dominio opcional con pesos y frases de varias palabras
+ARCHIVO_LEXICO_DOMINIO = 'lexico_sentimientos.tsv'
+
 
 # --- CORPUS ---
 # Funciones para leer diferentes tipos de archivos
@@ -138,9 +102,10 @@ def leer_corpus_desde_archivo(nombre_archivo):
         if nombre_archivo.lower().endswith('.txt'):
             return leer_txt(nombre_archivo)
         elif nombre_archivo.lower().endswith('.pdf'):
-            return leer_pdf(nombre_archivo)
+            # La extracción se guarda en caché por hash del contenido
+            return leer_con_cache(nombre_archivo, 'pdf', leer_pdf)
         elif nombre_archivo.lower().endswith('.docx'):
-            return leer_docx(nombre_archivo)
+            return leer_con_cache(nombre_archivo, 'docx', leer_docx)
         else:
             print(f"Error: Formato no soportado. Use .txt, .pdf o .docx")
             return []
@@ -150,26 +115,28 @@ def leer_corpus_desde_archivo(nombre_archivo):
 
 
 def leer_txt(nombre_archivo):
-    """Lee un archivo de texto donde cada línea es una frase."""
-    with open(nombre_archivo, 'r', encoding='utf-8') as archivo:
-        lineas = [linea.strip() for linea in archivo if linea.strip()]
-    return lineas
+    """Lee un archivo de texto donde cada línea es una frase.
 
+    Devuelve un `CorpusTxt`, que recorre el archivo en bloques mapeados en memoria
+    en lugar de cargar todas las líneas en una lista.
+    """
+    # Una pasada de decodificación para que un archivo inexistente o que no es UTF-8
+    # falle aquí, como antes, y no a mitad del análisis
+    comprobar_utf8(nombre_archivo)
+    return CorpusTxt(nombre_archivo)
 
-def leer_pdf(nombre_archivo):
-    """Lee un archivo PDF y extrae el texto dividido en frases."""
+
+def leer_pdf(nombre_archivo, num_workers=None):
+    """Lee un archivo PDF y extrae el texto dividido en frases.
+
+    Las páginas se reparten entre `num_workers` procesos (por defecto, uno por CPU);
+    con `num_workers=1` la extracción es en serie.
+    """
     try:
         import PyPDF2
-        frases = []
-        with open(nombre_archivo, 'rb') as archivo:
-            lector_pdf = PyPDF2.PdfReader(archivo)
-            for pagina in lector_pdf.pages:
-                texto = pagina.extract_text()
-                if texto:
-                    # Dividir el texto en frases usando puntos como delimitadores
-                    frases_pagina = [frase.strip() for frase in texto.split('.') if frase.strip()]
-                    frases.extend(frases_pagina)
-        return frases
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        return extraer_frases_pdf(nombre_archivo, num_workers=num_workers)
     except ImportError:
         print("Error: PyPDF2 no está instalado. Instálalo con: pip install PyPDF2")
         return []
@@ -241,26 +208,21 @@ if not corpus:
 
 # --- PROCESAMIENTO ---
 
-# Función para procesar y limpiar texto
-def procesar_y_contar(text, stopwords=None):
-    """Toma un bloque de texto, lo normaliza, tokeniza y opcionalmente elimina stopwords."""
-    text_lower = text.lower()
-    words = re.findall(r'\b\w+\b', text_lower)
-    if stopwords:
-        words = [word for word in words if word not in stopwords]
-    return Counter(words)
-
+# Tokenizamos el corpus una sola vez; todos los conteos se derivan de este motor.
+# Solo guardamos los conteos para que la memoria no crezca con el tamaño del archivo.
+motor = MotorFrecuencias(guardar_ids=False)
+for bloque in iterar_bloques(corpus):
+    motor.alimentar(bloque)
 
 # 1. Análisis SIN limpieza
 print(f"\nStep 2: Analyzing frequencies WITHOUT cleaning...")
-all_text = ' '.join(corpus)
-word_counts_sin_limpieza = procesar_y_contar(all_text)
+word_counts_sin_limpieza = motor.contar()
 top_words_sin_limpieza = word_counts_sin_limpieza.most_common(top_n)
 print(f"Top {top_n} words (without cleaning):", top_words_sin_limpieza)
 
 # 2. Análisis CON limpieza
 print(f"\nStep 3: Analyzing frequencies WITH stopwords cleaning...")
-word_counts_con_limpieza = procesar_y_contar(all_text, stopwords=stopwords_en)
+word_counts_con_limpieza = motor.contar(stopwords=stopwords_en)
 top_words_con_limpieza = word_counts_con_limpieza.most_common(top_n)
 print(f"Top {top_n} words (with cleaning):", top_words_con_limpieza)
 
@@ -302,13 +264,14 @@ print("Now we can see the key terms of the analyzed text.")
 
 
 # --- FUNCIONALIDAD MEJORADA: AGREGAR STOPWORDS MANUALMENTE ---
-def agregar_stopwords_interactivo(stopwords_actuales, top_palabras_con_limpieza):
+def agregar_stopwords_interactivo(sesion):
     """Permite al usuario agregar stopwords manualmente basado en los resultados"""
     print("\n" + "=" * 60)
     print("🎯 STEP 4: REFINE STOPWORDS MANUALLY")
     print("=" * 60)
 
     # Mostrar las palabras que aparecieron después de la limpieza
+    top_palabras_con_limpieza = sesion.top()
     print(f"\nWords that appeared after cleaning:")
     for i, (palabra, frecuencia) in enumerate(top_palabras_con_limpieza, 1):
         print(f"  {i:2d}. '{palabra}': {frecuencia} appearances")
@@ -319,8 +282,9 @@ def agregar_stopwords_interactivo(stopwords_actuales, top_palabras_con_limpieza)
         print("1. Yes, add specific words")
         print("2. No, the results are fine")
         print("3. See all current stopwords")
+        print("4. Undo the last addition")
 
-        opcion = input("\nChoose an option (1-3): ").strip()
+        opcion = input("\nChoose an option (1-4): ").strip()
 
         if opcion == '1':
             print(f"\nCurrent words in the top: {[p[0] for p in top_palabras_con_limpieza]}")
@@ -328,16 +292,16 @@ def agregar_stopwords_interactivo(stopwords_actuales, top_palabras_con_limpieza)
                 "Enter the words you want to add (separated by spaces): ").lower().split()
 
             if palabras_agregar:
-                nuevas_stopwords = set(palabras_agregar)
-                stopwords_actuales.update(nuevas_stopwords)
+                # La sesión solo quita estas palabras del conteo, sin re-procesar el corpus
+                nuevas_stopwords = sesion.agregar(palabras_agregar)
+                if not nuevas_stopwords:
+                    print("ℹ️  Those words are already stopwords.")
+                    continue
                 print(f"✓ Added {len(nuevas_stopwords)} new stopwords: {nuevas_stopwords}")
-                print(f"🎯 Total stopwords now: {len(stopwords_actuales)}")
+                print(f"🎯 Total stopwords now: {len(sesion.stopwords)}")
 
-                # Re-procesar con las nuevas stopwords
-                print("\n🔄 Re-processing with new stopwords...")
-                word_counts_mejorado = procesar_y_contar(all_text, stopwords=stopwords_actuales)
-                top_words_mejorado = word_counts_mejorado.most_common(top_n)
-                print(f"Top {top_n} words (with improved stopwords):", top_words_mejorado)
+                top_words_mejorado = sesion.top()
+                print(f"Top {sesion.top_n} words (with improved stopwords):", top_words_mejorado)
 
                 # Mostrar comparación
                 print(f"\n📊 COMPARISON:")
@@ -351,20 +315,35 @@ def agregar_stopwords_interactivo(stopwords_actuales, top_palabras_con_limpieza)
             break
 
         elif opcion == '3':
-            print(f"\n📋 Current stopwords ({len(stopwords_actuales)} words):")
+            print(f"\n📋 Current stopwords ({len(sesion.stopwords)} words):")
             # Mostrar en columnas para mejor visualización
-            stopwords_lista = sorted(stopwords_actuales)
+            stopwords_lista = sorted(sesion.stopwords)
             for i in range(0, len(stopwords_lista), 8):
                 print("   " + " | ".join(f"{palabra:12}" for palabra in stopwords_lista[i:i + 8]))
 
+        elif opcion == '4':
+            retiradas = sesion.deshacer()
+            if not retiradas:
+                print("ℹ️  Nothing to undo.")
+                continue
+            print(f"↩️  Removed {len(retiradas)} stopwords: {retiradas}")
+
+            top_words_mejorado = sesion.top()
+            print(f"\n📊 COMPARISON:")
+            print(f"BEFORE: {[p[0] for p in top_palabras_con_limpieza]}")
+            print(f"NOW: {[p[0] for p in top_words_mejorado]}")
+
+            top_palabras_con_limpieza = top_words_mejorado
+
         else:
-            print("❌ Invalid option. Please choose 1, 2 or 3.")
+            print("❌ Invalid option. Please choose 1, 2, 3 or 4.")
 
-    return stopwords_actuales, top_palabras_con_limpieza
+    return sesion.stopwords, top_palabras_con_limpieza
 
 
 # Ejecutar la funcionalidad interactiva
-stopwords_en, top_words_con_limpieza = agregar_stopwords_interactivo(stopwords_en, top_words_con_limpieza)
+sesion_refinamiento = SesionRefinamiento(word_counts_con_limpieza, stopwords_en, top_n)
+stopwords_en, top_words_con_limpieza = agregar_stopwords_interactivo(sesion_refinamiento)
 
 # --- ANÁLISIS DE SENTIMIENTOS ---
 print("\n" + "=" * 60)
@@ -372,53 +351,41 @@ print("😊 STEP 5: SENTIMENT ANALYSIS")
 print("=" * 60)
 
 
-def analyze_sentiment(text, stopwords, positive_lex, negative_lex):
-    """Analyzes text and returns sentiment score and classification."""
-    # Clean and tokenize text
-    text_lower = text.lower()
-    words = re.findall(r'\b\w+\b', text_lower)
-    words_cleaned = [word for word in words if word not in stopwords]
+# Weighted lexicon: the word sets above with weight +1/-1, plus an optional domain lexicon
+# file (one "phrase<TAB>weight" per line). Negators such as "not" flip the weight of the
+# entries that follow them, so "not bad" scores as positive.
+lexico_sentimientos = LexicoPonderado.desde_lexicos(positive_lexicon, negative_lexicon)
+if os.path.exists(ARCHIVO_LEXICO_DOMINIO):
+    lexico_dominio = LexicoPonderado.desde_archivo(ARCHIVO_LEXICO_DOMINIO)
+    lexico_sentimientos.actualizar(lexico_dominio)
+    print(f"✓ Domain lexicon: {len(lexico_dominio)} entries loaded from '{ARCHIVO_LEXICO_DOMINIO}'")
 
-    # Count positive and negative words
-    positive_score = sum(1 for word in words_cleaned if word in positive_lex)
-    negative_score = sum(1 for word in words_cleaned if word in negative_lex)
+# Scorer: matches every lexicon entry in linear time with a compiled Aho-Corasick automaton.
+# Blocks are spread over a process pool (one worker per CPU) and come back in order.
+puntuador = PuntuadorPonderado(lexico_sentimientos, stopwords_en)
 
-    # Calculate final score
-    final_score = positive_score - negative_score
-
-    # Classification
-    if final_score > 0:
-        classification = "Positive"
-    elif final_score < 0:
-        classification = "Negative"
-    else:
-        classification = "Neutral"
-
-    return {
-        "text": text,
-        "score": final_score,
-        "classification": classification,
-        "positive_words": [word for word in words_cleaned if word in positive_lex],
-        "negative_words": [word for word in words_cleaned if word in negative_lex]
-    }
-
-
-# Analyze each sentence in the corpus
-sentiment_results = [analyze_sentiment(sentence, stopwords_en, positive_lexicon, negative_lexicon) for sentence in
-                     corpus]
+# Analyze each sentence in the corpus, one block at a time (results are not kept in memory)
+sentiment_counts = Counter()
+positive_freq = Counter()
+negative_freq = Counter()
+total_sentences = 0
 
 print("--- SENTIMENT ANALYSIS RESULTS ---")
-for i, result in enumerate(sentiment_results, 1):
-    print(f"\nSentence {i}: '{result['text']}'")
-    if result['positive_words']:
-        print(f"  ✓ Positive words: {result['positive_words']}")
-    if result['negative_words']:
-        print(f"  ✗ Negative words: {result['negative_words']}")
-    print(f"  📊 Score: {result['score']}, Classification: {result['classification']}")
-
-# Statistics
-sentiment_counts = Counter([res['classification'] for res in sentiment_results])
-total_sentences = len(sentiment_results)
+for sentiment_results, positive_bloque, negative_bloque in analizar_bloques_en_paralelo(
+        iterar_bloques(corpus), puntuador):
+    for i, result in enumerate(sentiment_results, total_sentences + 1):
+        print(f"\nSentence {i}: '{result['text']}'")
+        if result['positive_words']:
+            print(f"  ✓ Positive words: {result['positive_words']}")
+        if result['negative_words']:
+            print(f"  ✗ Negative words: {result['negative_words']}")
+        print(f"  📊 Score: {result['score']}, Classification: {result['classification']}")
+
+    # Statistics
+    sentiment_counts.update(res['classification'] for res in sentiment_results)
+    positive_freq.update(positive_bloque)
+    negative_freq.update(negative_bloque)
+    total_sentences += len(sentiment_results)
 
 print(f"\n{'=' * 50}")
 print("CORPUS SENTIMENT SUMMARY")
@@ -462,24 +429,7 @@ print("\n" + "=" * 60)
 print("📊 DETAILED SENTIMENT WORD ANALYSIS")
 print("=" * 60)
 
-# Count sentiment word frequencies in cleaned text
-positive_sentiment_words = []
-negative_sentiment_words = []
-
-for sentence in corpus:
-    sentence_lower = sentence.lower()
-    words = re.findall(r'\b\w+\b', sentence_lower)
-    words_cleaned = [word for word in words if word not in stopwords_en]
-
-    for word in words_cleaned:
-        if word in positive_lexicon:
-            positive_sentiment_words.append(word)
-        elif word in negative_lexicon:
-            negative_sentiment_words.append(word)
-
-# Count frequencies
-positive_freq = Counter(positive_sentiment_words)
-negative_freq = Counter(negative_sentiment_words)
+# Sentiment word frequencies were tallied in the same pass as the sentence scores
 
 print("\nMOST FREQUENT POSITIVE WORDS:")
 if positive_freq:
@@ -500,9 +450,9 @@ print("\n" + "=" * 60)
 print("📈 STEP 6: FINAL VISUALIZATION")
 print("=" * 60)
 
-# Re-procesar para la visualización final
-word_counts_final = procesar_y_contar(all_text, stopwords=stopwords_en)
-top_words_final = word_counts_final.most_common(top_n)
+# La sesión de refinamiento ya tiene el conteo final actualizado
+word_counts_final = sesion_refinamiento.conteo
+top_words_final = sesion_refinamiento.top()
 
 # Crear visualización final
 words_sin, counts_sin = zip(*top_words_sin_limpieza)
@@ -551,7 +501,7 @@ The primary goal is to demonstrate the impact of data cleaning and to extract me
 
 - **Dynamic File Loading**: Reads and processes plain text (`.txt`), PDF (`.pdf`), and Word (`.docx`) files.
 - **Automated Dependency Management**: Can automatically detect and install missing Python libraries (`nltk`, `spacy`, `PyPDF2`, `scikit-learn`, `python-docx`).
-- **Comprehensive Stopword Removal**: Aggregates stopwords from three professional NLP libraries (NLTK, spaCy, and Scikit-learn) for a thorough cleaning. It also automatically downloads required NLTK data.
+- **Comprehensive Stopword Removal**: Aggregates stopwords from three professional NLP libraries (NLTK, spaCy, and Scikit-learn) for a thorough cleaning. It also automatically downloads required NLTK data. spaCy's list is static, so no spaCy language model is needed, and the combined list is cached on disk (`.cache_corpus/`) after the first run.
 - **Interactive Stopword Refinement**: After an initial cleaning, the user can review the most frequent words and add custom words to the stopword list for a more refined analysis.
 - **Comparative Frequency Analysis**: Generates side-by-side bar charts to visually compare the most frequent words **before** and **after** stopword removal, clearly demonstrating the effect of cleaning.
 - **Detailed Sentiment Analysis**:
@@ -593,12 +543,11 @@ The primary goal is to demonstrate the impact of data cleaning and to extract me
 
 ## ⚙️ Dependencies
 
-The script requires the following Python libraries: `nltk`, `spacy` (and its `en_core_web_sm` model), `scikit-learn`, `PyPDF2`, `python-docx`, `matplotlib`.
+The script requires the following Python libraries: `nltk`, `spacy` (only its built-in stopword list; no language model download), `scikit-learn`, `PyPDF2`, `python-docx`, `matplotlib`, `numpy`, and `scipy` (sparse matrices for the Jaccard similarity exercise, `04_similitud_jaccard.py`).
 
 The script includes a function to install these automatically. If you prefer to install them manually, you can use pip:
 ```sh
-pip install nltk spacy scikit-learn PyPDF2 python-docx matplotlib
-python -m spacy download en_core_web_sm
+pip install nltk spacy scikit-learn PyPDF2 python-docx matplotlib numpy scipy
 ```
 """
     with open("README.md", "w", encoding="utf-8") as f:
@@ -17,6 +17,8 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import numpy as np
 
+from motor_similitud import matriz_similitud_jaccard
+
 # --- CORPUS Y STOPWORDS ---
 corpus = [
     "Me encanta este producto, es fantástico y muy útil.",
@@ -62,14 +64,14 @@ def jaccard_similarity(set1, set2):
 
 # 3. Creación de la Matriz de Similitud
 # Esta matriz cuadrada nos dirá la similitud de cada frase con cada otra frase.
+# En lugar de llamar a `jaccard_similarity` para cada par (N² llamadas), el motor de similitud
+# calcula todas las intersecciones con un único producto de matrices dispersas y solo
+# recorre el triángulo superior (la matriz es simétrica). El resultado es el mismo y escala
+# a decenas de miles de frases (con `densa=False` devuelve una matriz dispersa).
 num_frases = len(corpus)
-matriz_similitud = np.zeros((num_frases, num_frases))
 
 print("\nPaso 2: Calculando la matriz de similitud... (Jaccard)")
-for i in range(num_frases):
-    for j in range(num_frases):
-        similitud = jaccard_similarity(sets_de_palabras[i], sets_de_palabras[j])
-        matriz_similitud[i, j] = similitud
+matriz_similitud = matriz_similitud_jaccard(sets_de_palabras)
 
 print("Matriz de similitud calculada (primeras 5x5 filas/columnas):")
 print(np.round(matriz_similitud[:5, :5], 2))
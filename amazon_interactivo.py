@@ -4,11 +4,55 @@ Ejecutar: python amazon_interactivo.py
 """
 
 import asyncio
+import contextlib
 import json
+import re
+import time
+from collections import Counter
 from datetime import datetime
 import subprocess
 import sys
 
+from extraccion_amazon import (MAX_PAGINAS, SELECTOR_PAGINA_SIGUIENTE, SELECTOR_RESULTADOS, DeduplicadorAsin,
+                               argumentos_busqueda, url_busqueda)
+from extraccion_tarjetas import JS_EXTRAER_TARJETAS
+from filtros_productos import FiltroProductos, aplicar_filtro
+from perfil_navegacion import PerfilNavegacion
+from cache_resultados import cache_compartida
+from esperas import metricas_esperas, primer_selector
+
+SITIO_CACHE = 'amazon.es/playwright'
+
+# Páginas de producto que se cargan a la vez para obtener los detalles
+CONCURRENCIA_DETALLES = 4
+
+# Cascadas de selectores de cada tarjeta de búsqueda: (selector, atributo o None para el texto)
+CAMPOS_TARJETA = {
+    'titulo': [
+        ('h2 a span', None),  # Selector más común
+        ('span.a-size-medium', None),  # Clase de tamaño medio
+        ('span.a-text-normal', None),  # Texto normal
+        ('h2 span', None),  # Span dentro de h2
+        ('a span', None),  # Span dentro de enlace
+        ('.a-size-base-plus', None),  # Clase base plus
+    ],
+    'titulo_aria': [('[aria-label]', 'aria-label')],
+    'precio': [
+        ('.a-price-whole', None),
+        ('.a-price .a-offscreen', None),
+        ('.a-price[data-a-size="xl"]', None),
+        ('.a-text-price', None),
+        ('[aria-label*="precio"]', None),
+    ],
+    'rating': [
+        ('.a-icon-alt', None),
+        ('[aria-label*="estrellas"]', 'aria-label'),
+        ('.a-size-base', None),
+        ('.a-icon-star', None),
+    ],
+    'enlace': [('h2 a', 'href'), ('a.a-link-normal', 'href'), ('a[href*="/dp/"]', 'href')],
+}
+
 
 # --- VERIFICACIÓN DE DEPENDENCIAS ---
 def verificar_playwright():
@@ -41,21 +85,63 @@ def verificar_playwright():
         return False
 
 
+class PoolPaginas:
+    """Pool de páginas reutilizables de un contexto de Playwright.
+
+    Un semáforo limita cuántas páginas se usan a la vez. Las páginas se crean bajo
+    demanda (como mucho `limite`) y al terminar vuelven al pool en lugar de
+    cerrarse, así que N productos no cuestan N páginas nuevas.
+    """
+
+    def __init__(self, nueva_pagina, limite):
+        self.nueva_pagina = nueva_pagina
+        self.semaforo = asyncio.Semaphore(limite)
+        self.libres = []
+        self.todas = []
+
+    @contextlib.asynccontextmanager
+    async def pagina(self):
+        async with self.semaforo:
+            if self.libres:
+                page = self.libres.pop()
+            else:
+                page = await self.nueva_pagina()
+                self.todas.append(page)
+            try:
+                yield page
+            finally:
+                if not page.is_closed():
+                    self.libres.append(page)
+
+    async def cerrar(self):
+        for page in self.todas:
+            try:
+                await page.close()
+            except:
+                pass
+
+
 class AmazonScraper:
-    def __init__(self):
+    def __init__(self, concurrencia_detalles=CONCURRENCIA_DETALLES, rapido=True):
         self.productos = []
         self.seleccionados = []
-
-    async def scrape_productos(self, busqueda, cantidad=20, min_price=0, max_price=float('inf')):
-        """Scrapea productos de Amazon con selectores mejorados"""
-        print(f"\n[BUSQUEDA] Buscando: {busqueda}")
-        print(f"[INFO] Cantidad: {cantidad} productos\n")
-
-        from playwright.async_api import async_playwright
-        async with async_playwright() as p:
+        self.concurrencia_detalles = max(1, concurrencia_detalles)
+        self.estadisticas = Counter()
+        # Perfil rápido: sin interfaz, sin imágenes/fuentes/vídeo/rastreadores
+        self.perfil = PerfilNavegacion(rapido)
+        # Navegador y contexto, reutilizados entre búsquedas hasta llamar a `cerrar`
+        self._playwright = None
+        self._browser = None
+        self.context = None
+
+    async def _obtener_contexto(self):
+        """Devuelve el contexto del navegador, lanzándolo la primera vez."""
+        if self.context is None:
+            from playwright.async_api import async_playwright
+            self._playwright = await async_playwright().start()
             # Abrir navegador con configuración mejorada
-            browser = await p.chromium.launch(
-                headless=False,
+            self._browser = await self._playwright.chromium.launch(
+                headless=self.perfil.headless,
                 args=[
                     '--no-sandbox',
                     '--disable-setuid-sandbox',
@@ -65,24 +151,142 @@ class AmazonScraper:
             )
 
             # Crear contexto con user-agent personalizado
-            context = await browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
+            self.context = await self._browser.new_context(
+                viewport=self.perfil.viewport,
                 user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
             )
+        return self.context
 
-            page = await context.new_page()
+    async def _nueva_pagina(self):
+        """Abre una página con el bloqueo de recursos y las métricas de red del perfil."""
+        page = await self.context.new_page()
+        try:
+            cdp = await self.context.new_cdp_session(page)
+            self.perfil.escuchar(cdp, page)
+            for metodo, parametros in self.perfil.comandos_cdp():
+                await cdp.send(metodo, parametros)
+        except Exception as e:
+            print(f"[WARN] Página sin perfil de red: {e}")
+        return page
+
+    async def cerrar(self):
+        """Cierra el navegador reutilizado entre búsquedas."""
+        if self._browser:
+            await self._browser.close()
+        if self._playwright:
+            await self._playwright.stop()
+        self._playwright = self._browser = self.context = None
+
+    async def scrape_productos(self, busqueda, cantidad=20, min_price=0, max_price=float('inf'), filtro=None):
+        """Scrapea productos de Amazon con selectores mejorados.
+
+        Trabaja por etapas: lee todas las tarjetas de la búsqueda, aplica `filtro`
+        (por defecto un `FiltroProductos` con el rango de precios) y solo visita la
+        página de detalles de los productos que lo pasan. Los contadores de cada
+        etapa quedan en `self.estadisticas`.
+
+        Las tarjetas leídas, con los detalles ya obtenidos, se guardan en la caché
+        de resultados: repetir la búsqueda con otro filtro no abre el navegador
+        salvo para los detalles que aún falten.
+        """
+        if filtro is None:
+            filtro = FiltroProductos(min_price, max_price)
+        print(f"\n[BUSQUEDA] Buscando: {busqueda}")
+        print(f"[INFO] Cantidad: {cantidad} productos\n")
 
+        marca_red = self.perfil.marca_resumen()
+        scraped_count = 0
+        candidatos = cache_compartida().consultar(SITIO_CACHE, busqueda, cantidad)
+        en_cache = candidatos is not None
+        completa = False
+        if en_cache:
+            self.estadisticas['busquedas_en_cache'] += 1
+            print(f"[CACHE] {len(candidatos)} productos de una búsqueda anterior, sin abrir Amazon\n")
+        else:
+            candidatos, completa = await self._leer_tarjetas(busqueda, cantidad)
+            if candidatos is None:
+                return []
+        leidos = candidatos
+
+        # --- FILTRADO CON LOS DATOS DE LA TARJETA (antes de cargar ninguna página) ---
+        aceptados, descartes = aplicar_filtro(candidatos, filtro)
+        num_descartados = len(candidatos) - len(aceptados)
+        self.estadisticas['tarjetas'] += len(candidatos)
+        self.estadisticas['descartadas'] += num_descartados
+        for motivo, total in descartes.items():
+            self.estadisticas[f'descartadas_{motivo}'] += total
+        # Cada descartado con URL es una página de producto que ya no se carga
+        self.estadisticas['paginas_ahorradas'] += (sum(1 for p in candidatos if p['url'])
+                                                   - sum(1 for p in aceptados if p['url']))
+        print(f"[FILTRO] {filtro}: {len(aceptados)} pasan, {num_descartados} descartados "
+              f"{dict(descartes) if descartes else ''}")
+        candidatos = aceptados
+
+        # --- NAVEGAR A LAS PÁGINAS DE PRODUCTO PARA DETALLES (EN PARALELO) ---
+        # Los productos que ya tienen detalles (de la caché) no se vuelven a visitar
+        pendientes = [producto for producto in candidatos if 'features' not in producto]
+        self.estadisticas['detalles_en_cache'] += len(candidatos) - len(pendientes)
+        if pendientes:
+            print(f"[INFO] Obteniendo detalles de {len(pendientes)} productos "
+                  f"({self.concurrencia_detalles} páginas a la vez)...")
+            await self._obtener_contexto()
+            inicio = time.perf_counter()
+            pool = PoolPaginas(self._nueva_pagina, self.concurrencia_detalles)
+            try:
+                # gather conserva el orden de los resultados de búsqueda
+                detalles = await asyncio.gather(*(self._obtener_detalles(pool, producto)
+                                                  for producto in pendientes))
+            finally:
+                await pool.cerrar()
+            print(f"[INFO] Detalles obtenidos en {time.perf_counter() - inicio:.1f}s\n")
+
+            for producto, (features, reviews) in zip(pendientes, detalles):
+                producto['features'] = features
+                producto['reviews'] = reviews
+        # Una lectura vacía no se guarda: puede ser un fallo de carga y no una búsqueda sin resultados
+        if leidos and (pendientes or not en_cache):
+            cache_compartida().guardar(SITIO_CACHE, busqueda, leidos, completa)
+
+        for producto in candidatos:
+            self.productos.append(producto)
+            scraped_count += 1
+            print(f"{producto['id']}. {producto['titulo'][:70]}...")
+            print(f"   Precio: {producto['precio']} | Rating: {producto['rating']}")
+            if producto['features']:
+                print(f"   ✓ {len(producto['features'])} características encontradas.")
+            if producto['reviews']:
+                print(f"   ✓ {len(producto['reviews'])} reseñas encontradas.")
+
+        print(f"\n[OK] Scraping completado: {scraped_count} productos procesados.")
+        e = self.estadisticas
+        print(f"[ETAPAS] Tarjetas: {e['tarjetas']} | Descartadas por filtro: {e['descartadas']} | "
+              f"Páginas de detalle cargadas: {e['paginas_cargadas']} | Cargas ahorradas: {e['paginas_ahorradas']} | "
+              f"Detalles desde caché: {e['detalles_en_cache']}")
+        self.perfil.resumen(marca_red)
+        metricas_esperas.resumen()
+        return self.productos
+
+    async def _leer_tarjetas(self, busqueda, cantidad):
+        """Lee y parsea hasta `cantidad` tarjetas de la búsqueda, recorriendo páginas.
+
+        Devuelve `(tarjetas, completa)`, con `completa=True` solo si se leyó hasta la
+        última página de resultados, o `(None, False)` si Amazon no carga.
+        """
+        await self._obtener_contexto()
+        page = await self._nueva_pagina()
+        pestaña_siguiente = None
+        try:
             # Ir a Amazon
-            url = f"https://www.amazon.es/s?k={busqueda.replace(' ', '+')}"
+            url = url_busqueda(busqueda)
             print(f"[NAVEGACIÓN] Accediendo a: {url}")
 
             try:
-                await page.goto(url, timeout=60000, wait_until='domcontentloaded')
+                with self.perfil.medir(page, url):
+                    await page.goto(url, timeout=60000, wait_until='domcontentloaded')
                 print("[OK] Página cargada")
             except Exception as e:
                 print(f"[ERROR] No se pudo cargar la página: {e}")
-                await browser.close()
-                return []
+                return None, False
 
             # Aceptar cookies con múltiples selectores
             cookie_selectors = [
@@ -92,253 +296,221 @@ class AmazonScraper:
                 '.a-button-primary[aria-labelledby*="cookie"]'
             ]
 
-            for selector in cookie_selectors:
-                try:
-                    await page.click(selector, timeout=2000)
-                    print("[OK] Cookies aceptadas")
-                    break
-                except:
-                    continue
+            # Se espera a la vez a cualquier botón de cookies o a los resultados: si los
+            # resultados llegan sin aviso (ya se aceptaron en este contexto) no se espera más
+            if await primer_selector(page, cookie_selectors + [SELECTOR_RESULTADOS], 2, 'cookies'):
+                boton = await page.query_selector(', '.join(cookie_selectors))
+                if boton:
+                    try:
+                        await boton.click(timeout=2000)
+                        print("[OK] Cookies aceptadas")
+                    except Exception:
+                        pass
 
             # Esperar productos con timeout más largo
-            try:
-                await page.wait_for_selector('[data-component-type="s-search-result"]', timeout=15000)
+            if await primer_selector(page, [SELECTOR_RESULTADOS], 15, 'resultados'):
                 print("[OK] Productos detectados en la página")
-            except Exception as e:
-                print(f"[ERROR] No se encontraron productos: {e}")
+            else:
+                print("[ERROR] No se encontraron productos")
                 # Intentar hacer scroll para cargar productos
                 await page.evaluate("window.scrollTo(0, 500);")
-                await asyncio.sleep(2)
+                await primer_selector(page, [SELECTOR_RESULTADOS], 2, 'resultados_tras_scroll')
+
+            # Extraer productos: una llamada al navegador por página de resultados. Si hacen
+            # falta más páginas, la N+1 se carga en una segunda pestaña mientras se procesa la N
+            candidatos = []
+            leidas = 0
+            errores = 0
+            completa = False
+            deduplicador = DeduplicadorAsin()
+            numero = 1
+            while True:
+                tarjetas = deduplicador.filtrar(
+                    await page.evaluate(JS_EXTRAER_TARJETAS, argumentos_busqueda(CAMPOS_TARJETA)))
+                tarjetas = tarjetas[:cantidad - leidas]
+                print(f"[INFO] Página {numero}: {len(tarjetas)} productos nuevos\n")
+
+                carga_siguiente = None
+                hay_siguiente = await page.query_selector(SELECTOR_PAGINA_SIGUIENTE) is not None
+                if tarjetas and leidas + len(tarjetas) < cantidad and numero < MAX_PAGINAS and hay_siguiente:
+                    if pestaña_siguiente is None:
+                        pestaña_siguiente = await self._nueva_pagina()
+                    carga_siguiente = asyncio.create_task(
+                        self._cargar_resultados(pestaña_siguiente, url_busqueda(busqueda, numero + 1)))
+                    await asyncio.sleep(0)  # La navegación arranca antes de procesar esta página
+
+                for tarjeta in tarjetas:
+                    i = leidas
+                    leidas += 1
+                    try:
+                        # Los detalles se obtienen después, en paralelo, para todos los productos
+                        candidatos.append(self._parsear_tarjeta(i, tarjeta))
+                    except Exception as e:
+                        errores += 1
+                        print(f"\n[ERROR] Error procesando producto {i + 1}: {e}\n")
+                        # Debug: mostrar el texto de la tarjeta para diagnóstico
+                        print(f"[DEBUG] Texto del elemento: {(tarjeta.get('texto') or '')[:200]}...")
+
+                if carga_siguiente is None:
+                    # Entera solo si Amazon no ofrece más páginas y se leyeron todas las tarjetas
+                    completa = not hay_siguiente and leidas < cantidad and not errores
+                    break
+                if not await carga_siguiente:
+                    break
+                page, pestaña_siguiente = pestaña_siguiente, page
+                numero += 1
 
-            # Extraer productos
-            elements = await page.query_selector_all('[data-component-type="s-search-result"]')
-            print(f"[INFO] Encontrados {len(elements)} elementos\n")
-            scraped_count = 0
+            print(f"[INFO] {leidas} productos en {numero} página(s), {deduplicador.duplicados} repetidos descartados\n")
+            return candidatos, completa
 
-            for i, elem in enumerate(elements[:cantidad]):
+        finally:
+            # Se cierran las pestañas de la búsqueda; el navegador sigue abierto para la próxima
+            for pestaña in (page, pestaña_siguiente):
+                if pestaña is not None:
+                    await pestaña.close()
+
+    async def _cargar_resultados(self, page, url):
+        """Navega a una página de resultados y espera a sus tarjetas; devuelve False si falla."""
+        print(f"[NAVEGACIÓN] Precargando: {url}")
+        try:
+            with self.perfil.medir(page, url):
+                await page.goto(url, timeout=60000, wait_until='domcontentloaded')
+        except Exception as e:
+            print(f"[WARN] No se pudo cargar la página de resultados: {e}")
+            return False
+        if not await primer_selector(page, [SELECTOR_RESULTADOS], 15, 'resultados_precargados'):
+            print("[WARN] La página de resultados no tiene productos")
+            return False
+        return True
+
+    def _parsear_tarjeta(self, i, tarjeta):
+        """Convierte los textos de una tarjeta (ver `CAMPOS_TARJETA`) en un producto."""
+        texto = tarjeta['texto'] or ''
+
+        # TÍTULO - MÚLTIPLES ESTRATEGIAS
+        titulo = "Sin título"
+
+        # Estrategia 1: Selector específico dentro del elemento de producto
+        for titulo_text in tarjeta['titulo']:
+            if titulo_text and len(titulo_text) > 5:  # Verificar que tenga contenido
+                titulo = titulo_text
+                break
+
+        # Estrategia 2: Buscar por atributos ARIA
+        if titulo == "Sin título":
+            aria_label = tarjeta['titulo_aria'][0]
+            if aria_label and len(aria_label) > 10:
+                titulo = aria_label
+
+        # Estrategia 3: Buscar cualquier texto que parezca un título
+        if titulo == "Sin título":
+            # Tomar la primera línea significativa del texto del elemento
+            lines = [line.strip() for line in texto.split('\n') if line.strip()]
+            for line in lines:
+                if len(line) > 10 and not any(
+                        word in line.lower() for word in ['€', 'eur', 'precio', 'rating']):
+                    titulo = line
+                    break
+
+        # PRECIO - Estrategias mejoradas
+        precio = "N/A"
+        precio_num = 0
+
+        for precio_text in tarjeta['precio']:
+            if precio_text:
+                # Limpiar y convertir precio
+                cleaned_price = precio_text.replace('€', '').replace(',', '.').strip()
                 try:
-                    # TÍTULO - MÚLTIPLES ESTRATEGIAS
-                    titulo = "Sin título"
-
-                    # Estrategia 1: Selector específico dentro del elemento de producto
-                    titulo_selectors = [
-                        'h2 a span',  # Selector más común
-                        'span.a-size-medium',  # Clase de tamaño medio
-                        'span.a-text-normal',  # Texto normal
-                        'h2 span',  # Span dentro de h2
-                        'a span',  # Span dentro de enlace
-                        '.a-size-base-plus'  # Clase base plus
-                    ]
+                    precio_num = float(cleaned_price)
+                    precio = f"{precio_num:.2f}".replace('.', ',') + " EUR"
+                    break
+                except:
+                    continue
 
-                    for selector in titulo_selectors:
-                        try:
-                            titulo_elem = await elem.query_selector(selector)
-                            if titulo_elem:
-                                titulo_text = await titulo_elem.inner_text()
-                                if titulo_text and len(titulo_text) > 5:  # Verificar que tenga contenido
-                                    titulo = titulo_text
-                                    break
-                        except:
-                            continue
-
-                    # Estrategia 2: Buscar por atributos ARIA
-                    if titulo == "Sin título":
-                        try:
-                            aria_elem = await elem.query_selector('[aria-label]')
-                            if aria_elem:
-                                aria_label = await aria_elem.get_attribute('aria-label')
-                                if aria_label and len(aria_label) > 10:
-                                    titulo = aria_label
-                        except:
-                            pass
-
-                    # Estrategia 3: Buscar cualquier texto que parezca un título
-                    if titulo == "Sin título":
-                        try:
-                            # Obtener todo el texto del elemento y tomar la primera línea significativa
-                            all_text = await elem.inner_text()
-                            lines = [line.strip() for line in all_text.split('\n') if line.strip()]
-                            for line in lines:
-                                if len(line) > 10 and not any(
-                                        word in line.lower() for word in ['€', 'eur', 'precio', 'rating']):
-                                    titulo = line
-                                    break
-                        except:
-                            pass
-
-                    # PRECIO - Estrategias mejoradas
-                    precio = "N/A"
-                    precio_num = 0
-
-                    # Selectores de precio
-                    precio_selectors = [
-                        '.a-price-whole',
-                        '.a-price .a-offscreen',
-                        '.a-price[data-a-size="xl"]',
-                        '.a-text-price',
-                        '[aria-label*="precio"]'
-                    ]
+        # Si no encontramos precio con selectores, buscar en el texto
+        if precio == "N/A":
+            price_match = re.search(r'(\d+[.,]\d{2})\s*€', texto)
+            if price_match:
+                precio_num = float(price_match.group(1).replace(',', '.'))
+                precio = f"{precio_num:.2f} EUR".replace('.', ',')
+
+        # RATING - Estrategias mejoradas
+        rating_text = "Sin valoración"
+        rating_num = 0
+        num_reviews = 0
+
+        for rating_content in tarjeta['rating']:
+            if rating_content and 'estrellas' in rating_content.lower():
+                rating_text = rating_content
+                # Extraer número de rating
+                rating_match = re.search(r'(\d+[.,]\d+)', rating_content)
+                if rating_match:
+                    rating_num = float(rating_match.group(1).replace(',', '.'))
+                break
 
-                    for p_selector in precio_selectors:
-                        try:
-                            precio_elem = await elem.query_selector(p_selector)
-                            if precio_elem:
-                                precio_text = await precio_elem.inner_text()
-                                if precio_text:
-                                    # Limpiar y convertir precio
-                                    cleaned_price = precio_text.replace('€', '').replace(',', '.').strip()
-                                    try:
-                                        precio_num = float(cleaned_price)
-                                        precio = f"{precio_num:.2f}".replace('.', ',') + " EUR"
-                                        break
-                                    except:
-                                        continue
-                        except:
-                            continue
-
-                    # Si no encontramos precio con selectores, buscar en el texto
-                    if precio == "N/A":
-                        try:
-                            elem_text = await elem.inner_text()
-                            import re
-                            price_match = re.search(r'(\d+[.,]\d{2})\s*€', elem_text)
-                            if price_match:
-                                precio_num = float(price_match.group(1).replace(',', '.'))
-                                precio = f"{precio_num:.2f} EUR".replace('.', ',')
-                        except:
-                            pass
-
-                    # RATING - Estrategias mejoradas
-                    rating_text = "Sin valoración"
-                    rating_num = 0
-                    num_reviews = 0
-
-                    # Selectores de rating
-                    rating_selectors = [
-                        '.a-icon-alt',
-                        '[aria-label*="estrellas"]',
-                        '.a-size-base',
-                        '.a-icon-star'
-                    ]
+        # RESEÑAS
+        reviews_match = re.search(r'(\d+[,.]?\d*)\s*(reseñas|valoraciones|opiniones)', texto, re.IGNORECASE)
+        if reviews_match:
+            num_reviews = int(reviews_match.group(1).replace('.', '').replace(',', ''))
+
+        # URL: el primer enlace encontrado, aunque no tenga href
+        url_completa = ""
+        link = next((enlace for enlace in tarjeta['enlace'] if enlace is not None), None)
+        if link and not link.startswith('http'):
+            url_completa = f"https://www.amazon.es{link}"
+        elif link:
+            url_completa = link
+
+        return {
+            'id': i + 1,
+            'titulo': titulo.strip(),
+            'precio': precio,
+            'precio_num': precio_num,
+            'rating': rating_text,
+            'rating_num': rating_num,
+            'num_reviews': num_reviews,
+            'url': url_completa,
+        }
 
-                    for r_selector in rating_selectors:
-                        try:
-                            rating_elem = await elem.query_selector(r_selector)
-                            if rating_elem:
-                                rating_content = await rating_elem.inner_text() if not r_selector.startswith(
-                                    '[') else await rating_elem.get_attribute('aria-label')
-                                if rating_content and 'estrellas' in rating_content.lower():
-                                    rating_text = rating_content
-                                    # Extraer número de rating
-                                    import re
-                                    rating_match = re.search(r'(\d+[.,]\d+)', rating_content)
-                                    if rating_match:
-                                        rating_num = float(rating_match.group(1).replace(',', '.'))
-                                    break
-                        except:
-                            continue
-
-                    # RESEÑAS
-                    try:
-                        reviews_text = await elem.inner_text()
-                        import re
-                        reviews_match = re.search(r'(\d+[,.]?\d*)\s*(reseñas|valoraciones|opiniones)', reviews_text,
-                                                  re.IGNORECASE)
-                        if reviews_match:
-                            num_reviews = int(reviews_match.group(1).replace('.', '').replace(',', ''))
-                    except:
-                        num_reviews = 0
-
-                    # URL
-                    url_completa = ""
-                    link_selectors = ['h2 a', 'a.a-link-normal', 'a[href*="/dp/"]']
-
-                    for l_selector in link_selectors:
-                        try:
-                            link_elem = await elem.query_selector(l_selector)
-                            if link_elem:
-                                link = await link_elem.get_attribute('href')
-                                if link and not link.startswith('http'):
-                                    url_completa = f"https://www.amazon.es{link}"
-                                elif link:
-                                    url_completa = link
-                                break
-                        except:
-                            continue
-
-                    # --- NAVEGAR A LA PÁGINA DEL PRODUCTO PARA DETALLES ---
-                    features = []
-                    reviews = []
-                    if url_completa:
-                        print(f"    -> Visitando página de producto para obtener detalles...")
-                        product_page = await context.new_page()
-                        await product_page.goto(url_completa, timeout=45000, wait_until='domcontentloaded')
-
-                        # Extraer características (bullet points)
-                        try:
-                            feature_elements = await product_page.query_selector_all('#feature-bullets ul li span.a-list-item')
-                            for feature_elem in feature_elements:
-                                feature_text = await feature_elem.inner_text()
-                                if feature_text:
-                                    features.append(feature_text.strip())
-                        except Exception as e:
-                            print(f"      [WARN] No se pudieron extraer las características: {e}")
-
-                        # Extraer comentarios/reseñas
-                        try:
-                            review_elements = await product_page.query_selector_all('[data-hook="review-collapsed"]')
-                            for review_elem in review_elements[:5]: # Limitar a 5 para no sobrecargar
-                                review_text = await review_elem.inner_text()
-                                if review_text:
-                                    reviews.append(review_text.strip())
-                        except Exception as e:
-                            print(f"      [WARN] No se pudieron extraer las reseñas: {e}")
-
-                        await product_page.close()
-                    else:
-                        print("    -> [WARN] No se encontró URL para este producto, no se pueden obtener detalles.")
-
-                    # --- FILTRADO POR PRECIO INICIAL ---
-                    if not (min_price <= precio_num <= max_price):
-                        continue # Saltar este producto si está fuera del rango de precios
-
-                    producto = {
-                        'id': i + 1,
-                        'titulo': titulo.strip(),
-                        'precio': precio,
-                        'precio_num': precio_num,
-                        'rating': rating_text,
-                        'rating_num': rating_num,
-                        'num_reviews': num_reviews,
-                        'url': url_completa,
-                        'features': features,
-                        'reviews': reviews
-                    }
-
-                    self.productos.append(producto)
-                    scraped_count += 1
-                    print(f"{i + 1}. {titulo[:70]}...")
-                    print(f"   Precio: {precio} | Rating: {rating_text}")
-                    if features:
-                        print(f"   ✓ {len(features)} características encontradas.")
-                    if reviews:
-                        print(f"   ✓ {len(reviews)} reseñas encontradas.")
-
-                except Exception as e:
-                    print(f"\n[ERROR] Error procesando producto {i + 1}: {e}\n")
-                    # Debug: mostrar HTML del elemento para diagnóstico
-                    try:
-                        elem_html = await elem.inner_html()
-                        print(f"[DEBUG] HTML del elemento: {elem_html[:200]}...")
-                    except:
-                        pass
+    async def _obtener_detalles(self, pool, producto):
+        """Visita la página de un producto con una página del pool y devuelve (features, reviews)."""
+        features = []
+        reviews = []
+        if not producto['url']:
+            print(f"    -> [WARN] Producto {producto['id']}: no se encontró URL, no se pueden obtener detalles.")
+            return features, reviews
+
+        async with pool.pagina() as product_page:
+            print(f"    -> Visitando página del producto {producto['id']}...")
+            self.estadisticas['paginas_cargadas'] += 1
+            try:
+                with self.perfil.medir(product_page, producto['url']):
+                    await product_page.goto(producto['url'], timeout=45000, wait_until='domcontentloaded')
+            except Exception as e:
+                print(f"      [WARN] No se pudo cargar la página del producto {producto['id']}: {e}")
+                return features, reviews
+
+            # Extraer características (bullet points)
+            try:
+                feature_elements = await product_page.query_selector_all('#feature-bullets ul li span.a-list-item')
+                for feature_elem in feature_elements:
+                    feature_text = await feature_elem.inner_text()
+                    if feature_text:
+                        features.append(feature_text.strip())
+            except Exception as e:
+                print(f"      [WARN] No se pudieron extraer las características: {e}")
 
-            # Cerrar
-            await context.close()
-            await browser.close()
+            # Extraer comentarios/reseñas
+            try:
+                review_elements = await product_page.query_selector_all('[data-hook="review-collapsed"]')
+                for review_elem in review_elements[:5]: # Limitar a 5 para no sobrecargar
+                    review_text = await review_elem.inner_text()
+                    if review_text:
+                        reviews.append(review_text.strip())
+            except Exception as e:
+                print(f"      [WARN] No se pudieron extraer las reseñas: {e}")
 
-        print(f"\n[OK] Scraping completado: {scraped_count} productos procesados.")
-        return self.productos
+        return features, reviews
 
     def mostrar_productos(self):
         """Muestra lista de productos"""
@@ -551,6 +723,19 @@ async def main():
         except ValueError:
             print("[ERROR] Por favor, ingresa un número válido para el precio. Inténtalo de nuevo.")
 
+    # Filtros que se aplican antes de visitar las páginas de producto
+    try:
+        rating_str = input("  Valoración mínima (0-5, dejar en blanco para no tener mínimo): ").strip()
+        min_rating = float(rating_str.replace(',', '.')) if rating_str else 0
+    except ValueError:
+        min_rating = 0
+    try:
+        reviews_str = input("  Número mínimo de reseñas (dejar en blanco para no tener mínimo): ").strip()
+        min_reviews = int(reviews_str) if reviews_str else 0
+    except ValueError:
+        min_reviews = 0
+    filtro = FiltroProductos(min_price, max_price, min_rating, min_reviews)
+
     try:
         cantidad_input = input("¿Cuántos productos quieres ver? [20]: ").strip()
         cantidad = int(cantidad_input) if cantidad_input else 20
@@ -561,7 +746,10 @@ async def main():
     scraper = AmazonScraper()
 
     # Scrapear
-    await scraper.scrape_productos(busqueda, cantidad, min_price, max_price)
+    try:
+        await scraper.scrape_productos(busqueda, cantidad, filtro=filtro)
+    finally:
+        await scraper.cerrar()
 
     if not scraper.productos:
         print("\n[ERROR] No se pudieron extraer productos. Verifica:")
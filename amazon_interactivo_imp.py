@@ -3,23 +3,27 @@ Scraper Interactivo de Amazon con Selenium y Flask
 Ejecutar: python amazon_interactivo_imp.py
 """
 
-import time
 import json
 import re
 import webbrowser
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+
+from extraccion_amazon import MAX_PAGINAS, SELECTOR_PAGINA_SIGUIENTE, SELECTOR_RESULTADOS, DeduplicadorAsin, url_busqueda
+from pool_drivers import TAMAÑO_POOL, PoolScrapers, ruta_chromedriver
+from cola_trabajos import ColaTrabajos, quiere_json, registrar_rutas
+from cache_resultados import cache_compartida
+from esperas import esperar_desaparicion, metricas_esperas, primer_elemento
+
+SITIO_CACHE = 'amazon.es/selenium'
 
 # Intentar importar Flask
 try:
-    from flask import Flask, render_template_string, request
+    from flask import Flask, jsonify, redirect, render_template_string, request, url_for
     FLASK_AVAILABLE = True
 except ImportError:
     FLASK_AVAILABLE = False
@@ -47,12 +51,14 @@ class AmazonScraperSelenium:
         chrome_options.add_argument("--start-maximized")
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option('useAutomationExtension', False)
+        # `get` vuelve con el DOM listo (DOMContentLoaded), sin esperar a imágenes ni anuncios
+        chrome_options.page_load_strategy = 'eager'
 
         chrome_options.add_argument(
             "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
 
         try:
-            service = Service(ChromeDriverManager().install())
+            service = Service(ruta_chromedriver())
             self.driver = webdriver.Chrome(service=service, options=chrome_options)
             self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
             print("✅ Navegador Chrome iniciado correctamente")
@@ -65,16 +71,19 @@ class AmazonScraperSelenium:
         """Maneja cookies y popups emergentes"""
         print("🔄 Manejando cookies y popups...")
         cookie_selectors = ["#sp-cc-accept", "#a-autoid-0"]
-        for selector in cookie_selectors:
-            try:
-                cookie_btn = WebDriverWait(self.driver, 3).until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-                cookie_btn.click()
-                print("✅ Cookies aceptadas")
-                time.sleep(1)
-                return True
-            except (TimeoutException, ElementClickInterceptedException):
-                continue
-        return False
+        # Se vigilan a la vez los botones de cookies y los resultados: si llegan los
+        # resultados sin aviso (ya se aceptaron en este navegador) no se espera más
+        selector, cookie_btn = primer_elemento(self.driver, cookie_selectors + [SELECTOR_RESULTADOS], 3, 'cookies',
+                                               clicable=True)
+        if selector not in cookie_selectors:
+            return False
+        try:
+            cookie_btn.click()
+        except ElementClickInterceptedException:
+            return False
+        print("✅ Cookies aceptadas")
+        esperar_desaparicion(self.driver, cookie_btn, 1, 'cierre_cookies')
+        return True
 
     def extract_product_data(self, element, index):
         """Extrae datos de un producto individual"""
@@ -154,46 +163,133 @@ class AmazonScraperSelenium:
         if min_price > 0 or max_price < float('inf'):
             print(f"💰 Rango de precios: {min_price:.2f}€ - {max_price:.2f}€")
 
+        en_cache = productos_en_cache(busqueda, cantidad, min_price, max_price)
+        if en_cache is not None:
+            self.productos = en_cache
+            print(f"⚡ {len(en_cache)} productos servidos desde la caché, sin abrir Amazon")
+            return self.productos
+
+        # Todos los productos leídos, pasen o no el filtro de precio, para la caché
+        leidos = []
+        agotada = False  # True solo si se llegó a la última página de resultados
+        errores = 0
         try:
-            url = f"https://www.amazon.es/s?k={busqueda.replace(' ', '+')}"
-            self.driver.get(url)
-            WebDriverWait(self.driver, 15).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+            url = url_busqueda(busqueda)
+            with metricas_esperas.medir('carga_busqueda'):
+                self.driver.get(url)
             self.handle_cookies_and_popups()
-            WebDriverWait(self.driver, 15).until(EC.presence_of_element_located((By.CSS_SELECTOR, '[data-component-type="s-search-result"]')))
-
-            elements = self.driver.find_elements(By.CSS_SELECTOR, '[data-component-type="s-search-result"]')
-            if not elements:
-                print("❌ No se pudieron encontrar productos en la página")
-                return []
+            if primer_elemento(self.driver, [SELECTOR_RESULTADOS], 15, 'resultados')[0] is None:
+                raise TimeoutException("No aparecieron resultados de búsqueda")
 
-            print(f"\n--- 📦 Productos Encontrados --- ({len(elements)} resultados iniciales)")
+            # Se recorren páginas de resultados hasta reunir `cantidad`. Si una página no
+            # basta, la siguiente se abre en otra pestaña mientras se procesa la actual
             productos_procesados = 0
-            for i, elem in enumerate(elements):
-                if productos_procesados >= cantidad:
+            deduplicador = DeduplicadorAsin()
+            numero = 1
+            while True:
+                elements = self.driver.find_elements(By.CSS_SELECTOR, SELECTOR_RESULTADOS)
+                if not elements and numero == 1:
+                    # Sin caché: puede ser un fallo de carga y no una búsqueda sin resultados
+                    print("❌ No se pudieron encontrar productos en la página")
+                    return []
+
+                nuevos = [elem for elem in elements if deduplicador.es_nuevo(elem.get_attribute('data-asin'))]
+                print(f"\n--- 📦 Productos Encontrados --- (página {numero}: {len(nuevos)} resultados nuevos)")
+                hay_siguiente = bool(self.driver.find_elements(By.CSS_SELECTOR, SELECTOR_PAGINA_SIGUIENTE))
+                hay_mas = bool(nuevos) and numero < MAX_PAGINAS and hay_siguiente
+
+                # Precarga solo si esta página no basta aunque todos sus productos pasen el filtro
+                pestaña_siguiente = None
+                if hay_mas and productos_procesados + len(nuevos) < cantidad:
+                    pestaña_siguiente = self.abrir_en_pestaña(url_busqueda(busqueda, numero + 1))
+
+                for elem in nuevos:
+                    if productos_procesados >= cantidad:
+                        break
+                    producto = self.extract_product_data(elem, productos_procesados)
+                    if producto:
+                        leidos.append(producto)
+                    else:
+                        errores += 1
+                    if producto and min_price <= producto['precio_num'] <= max_price:
+                        self.productos.append(producto)
+                        productos_procesados += 1
+                        # Mostrar progreso en la consola
+                        print(f"\n{productos_procesados}. {producto['titulo'][:70]}...")
+                        print(f"   💰 Precio: {producto['precio']} | ⭐ Rating: {producto['rating']}")
+
+                if productos_procesados >= cantidad or not hay_mas:
+                    # Entera solo si Amazon no ofrece más páginas y se leyeron todas las tarjetas
+                    agotada = not hay_siguiente and productos_procesados < cantidad and not errores
+                    if pestaña_siguiente:
+                        self.cerrar_pestaña(pestaña_siguiente)
                     break
-                producto = self.extract_product_data(elem, productos_procesados)
-                if producto and min_price <= producto['precio_num'] <= max_price:
-                    self.productos.append(producto)
-                    productos_procesados += 1
-                    # Mostrar progreso en la consola
-                    print(f"\n{productos_procesados}. {producto['titulo'][:70]}...")
-                    print(f"   💰 Precio: {producto['precio']} | ⭐ Rating: {producto['rating']}")
-            
+                if pestaña_siguiente is None:
+                    pestaña_siguiente = self.abrir_en_pestaña(url_busqueda(busqueda, numero + 1))
+
+                # La página actual ya no hace falta: se pasa a la precargada
+                self.driver.close()
+                self.driver.switch_to.window(pestaña_siguiente)
+                if primer_elemento(self.driver, [SELECTOR_RESULTADOS], 15, 'resultados_precargados')[0] is None:
+                    print(f"⚠️  La página {numero + 1} no tiene resultados")
+                    break
+                numero += 1
+
+            if leidos:
+                cache_compartida().guardar(SITIO_CACHE, busqueda, leidos, completa=agotada)
+            print(f"\n📄 {numero} página(s) recorrida(s), {deduplicador.duplicados} productos repetidos descartados")
             print("\n---------------------------------")
             print(f"✅ Scraping completado: {len(self.productos)} productos obtenidos y listos para mostrar en la web.")
+            metricas_esperas.resumen()
             return self.productos
         except Exception as e:
             print(f"❌ Error durante el scraping: {e}")
             return []
 
+    def abrir_en_pestaña(self, url):
+        """Abre `url` en una pestaña nueva sin cambiar a ella; devuelve su identificador.
+
+        La pestaña carga en segundo plano mientras el driver sigue trabajando en la actual.
+        """
+        anteriores = set(self.driver.window_handles)
+        self.driver.execute_script("window.open(arguments[0], '_blank');", url)
+        return (set(self.driver.window_handles) - anteriores).pop()
+
+    def cerrar_pestaña(self, pestaña):
+        actual = self.driver.current_window_handle
+        self.driver.switch_to.window(pestaña)
+        self.driver.close()
+        self.driver.switch_to.window(actual)
+
+    def reiniciar(self):
+        """Deja el scraper listo para otra búsqueda (lo usa el pool de navegadores)."""
+        self.productos = []
+        pestañas = self.driver.window_handles
+        for pestaña in pestañas[1:]:
+            self.driver.switch_to.window(pestaña)
+            self.driver.close()
+        self.driver.switch_to.window(pestañas[0])
+
     def close(self):
         if self.driver:
             self.driver.quit()
             print("✅ Navegador cerrado")
 
 
+def productos_en_cache(busqueda, cantidad, min_price, max_price):
+    """Productos de una búsqueda anterior que están en el rango de precios, o None."""
+    return cache_compartida().consultar(SITIO_CACHE, busqueda, cantidad,
+                                        lambda p: min_price <= p['precio_num'] <= max_price)
+
+
 app = Flask(__name__)
 
+# Navegadores arrancados una vez y compartidos por todas las peticiones a /scrape
+pool_scrapers = PoolScrapers(lambda: AmazonScraperSelenium(headless=True))
+
+# Un worker por navegador: los trabajos de más esperan en la cola, no en el pool
+cola_trabajos = ColaTrabajos(num_workers=TAMAÑO_POOL)
+
 HTML_FORM_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="es">
@@ -291,6 +387,11 @@ HTML_RESULTS_TEMPLATE = """
 def index():
     return render_template_string(HTML_FORM_TEMPLATE)
 
+@app.route('/metricas')
+def metricas():
+    """Tiempos de espera por paso de todos los scrapers del proceso."""
+    return jsonify(metricas_esperas.a_dict())
+
 @app.route('/scrape', methods=['POST'])
 def scrape():
     busqueda = request.form.get('busqueda', 'guitarra electrica')
@@ -302,16 +403,33 @@ def scrape():
     min_price = float(min_price_str) if min_price_str and min_price_str.isdigit() else 0.0
     max_price = float(max_price_str) if max_price_str and max_price_str.isdigit() else float('inf')
 
-    scraper = None
-    try:
-        scraper = AmazonScraperSelenium(headless=True)
-        productos = scraper.scrape_productos(busqueda, cantidad, min_price, max_price)
-        return render_template_string(HTML_RESULTS_TEMPLATE, productos=productos, busqueda=busqueda)
-    except Exception as e:
-        return f"<h1>Error durante el scraping</h1><p>{e}</p>"
-    finally:
-        if scraper:
-            scraper.close()
+    clave = ('amazon', busqueda.strip().lower(), cantidad, min_price, max_price)
+    trabajo, nuevo = cola_trabajos.enviar(clave, ejecutar_busqueda, busqueda, cantidad, min_price, max_price,
+                                          descripcion=busqueda)
+    if not nuevo:
+        print(f"🔗 Búsqueda '{busqueda}' unida al trabajo en curso {trabajo.id}")
+
+    if quiere_json(request):
+        respuesta = trabajo.a_dict()
+        respuesta['estado_url'] = url_for('estado_trabajo', id_trabajo=trabajo.id)
+        respuesta['resultado_url'] = url_for('resultado_trabajo', id_trabajo=trabajo.id)
+        return jsonify(respuesta), 202
+    return redirect(url_for('resultado_trabajo', id_trabajo=trabajo.id), code=303)
+
+def ejecutar_busqueda(busqueda, cantidad, min_price, max_price):
+    """Trabajo de la cola: responde desde la caché o hace el scraping con un navegador del pool."""
+    productos = productos_en_cache(busqueda, cantidad, min_price, max_price)
+    if productos is not None:
+        return productos
+    with pool_scrapers.scraper() as scraper:
+        return scraper.scrape_productos(busqueda, cantidad, min_price, max_price)
+
+def mostrar_resultado(trabajo):
+    if quiere_json(request):
+        return jsonify(trabajo.resultado)
+    return render_template_string(HTML_RESULTS_TEMPLATE, productos=trabajo.resultado, busqueda=trabajo.descripcion)
+
+registrar_rutas(app, cola_trabajos, mostrar_resultado)
 
 if __name__ == "__main__":
     if not FLASK_AVAILABLE:
@@ -321,5 +439,7 @@ if __name__ == "__main__":
         url = "http://127.0.0.1:5000"
         print(f"Iniciando servidor web en {url}")
         print("Abre tu navegador y ve a esa dirección para usar la aplicación.")
+        # Los navegadores arrancan antes de la primera petición
+        pool_scrapers.precalentar()
         webbrowser.open_new(url)
-        app.run(debug=False, port=5000)
+        app.run(debug=False, port=5000, threaded=True)
@@ -1,160 +1,304 @@
 """
 Amazon Scraper Module using Playwright (Sync version)
 """
-import time
 import re
 from playwright.sync_api import sync_playwright
 
+from perfil_navegacion import PerfilNavegacion
+from cache_resultados import cache_compartida
+from esperas import metricas_esperas, primer_selector_sync
+from extraccion_amazon import (MAX_PAGINAS, SELECTOR_PAGINA_SIGUIENTE, SELECTOR_RESULTADOS, DeduplicadorAsin,
+                               argumentos_busqueda, url_busqueda)
+from extraccion_tarjetas import JS_EXTRAER_TARJETAS
+
+SITIO_CACHE = 'amazon.es/playwright-sync'
+
+# Selectores de cada tarjeta de búsqueda: (selector, atributo o None para el texto)
+CAMPOS_TARJETA = {
+    'titulo': [('h2 a span', None)],
+    'precio': [('.a-price-whole', None)],
+    'rating': [('.a-icon-alt', None)],
+    'reseñas': [('.a-size-base.s-underline-text', None)],
+    'enlace': [('h2 a', 'href')],
+}
+
 
 class AmazonScraper:
-    def __init__(self, headless=True):
+    def __init__(self, headless=None, rapido=True):
         self.productos = []
-        self.headless = headless
+        # Perfil rápido: sin interfaz, sin imágenes/fuentes/vídeo/rastreadores
+        self.perfil = PerfilNavegacion(rapido)
+        self.headless = self.perfil.headless if headless is None else headless
+        # Navegador y contexto, reutilizados entre búsquedas hasta llamar a `cerrar`
+        self._playwright = None
+        self._browser = None
+        self.context = None
+        self._marca_precarga = None
+
+    def _obtener_contexto(self):
+        """Devuelve el contexto del navegador, lanzándolo la primera vez."""
+        if self.context is None:
+            self._playwright = sync_playwright().start()
+            self._browser = self._playwright.chromium.launch(headless=self.headless)
+            opciones = {'viewport': self.perfil.viewport} if self.perfil.rapido else {}
+            self.context = self._browser.new_context(
+                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                **opciones
+            )
+        return self.context
+
+    def _nueva_pagina(self):
+        """Abre una página con el bloqueo de recursos y las métricas de red del perfil."""
+        page = self.context.new_page()
+        try:
+            cdp = self.context.new_cdp_session(page)
+            self.perfil.escuchar(cdp, page)
+            for metodo, parametros in self.perfil.comandos_cdp():
+                cdp.send(metodo, parametros)
+        except Exception as e:
+            print(f"[WARN] Página sin perfil de red: {e}")
+        return page
+
+    def cerrar(self):
+        """Cierra el navegador reutilizado entre búsquedas."""
+        if self._browser:
+            self._browser.close()
+        if self._playwright:
+            self._playwright.stop()
+        self._playwright = self._browser = self.context = None
 
     def scrape_productos(self, busqueda, cantidad=20, min_price=0, max_price=float('inf')):
-        """Scrapea productos de Amazon de forma síncrona."""
+        """Scrapea productos de Amazon de forma síncrona.
+
+        Los productos leídos (también los que no pasan el filtro de precio) se guardan
+        en la caché de resultados; si la búsqueda ya está en ella se responde desde
+        ahí y solo se visitan las páginas de detalle que falten.
+        """
         print(f"\n[BUSQUEDA] Buscando: {busqueda}")
         print(f"[INFO] Cantidad: {cantidad} productos | Rango: {min_price}-{max_price} EUR\n")
 
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=self.headless)
-            context = browser.new_context(
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            )
-            page = context.new_page()
+        def filtro(producto):
+            return min_price <= producto['precio_num'] <= max_price
+
+        en_cache = cache_compartida().consultar(SITIO_CACHE, busqueda, cantidad, filtro)
+        if en_cache is not None:
+            print(f"[CACHE] {len(en_cache)} productos de una búsqueda anterior, sin abrir la búsqueda")
+            pendientes = [producto for producto in en_cache if 'features' not in producto]
+            if pendientes:
+                self._obtener_contexto()
+                for producto in pendientes:
+                    producto['features'], producto['reviews'] = self._obtener_detalles(producto['url'])
+                cache_compartida().guardar(SITIO_CACHE, busqueda, en_cache)
+            self.productos.extend(en_cache)
+            return self.productos
 
-            url = f"https://www.amazon.es/s?k={busqueda.replace(' ', '+')}"
+        self._obtener_contexto()
+        page = self._nueva_pagina()
+        pestaña_siguiente = None
+        marca_red = self.perfil.marca_resumen()
+        try:
+            url = url_busqueda(busqueda)
             print(f"[NAVEGACIÓN] Accediendo a: {url}")
 
             try:
-                page.goto(url, timeout=60000, wait_until='domcontentloaded')
+                with self.perfil.medir(page, url):
+                    page.goto(url, timeout=60000, wait_until='domcontentloaded')
                 print("[OK] Página cargada")
             except Exception as e:
                 print(f"[ERROR] No se pudo cargar la página: {e}")
-                browser.close()
                 return []
 
-            # Aceptar cookies
+            # Aceptar cookies: se espera a la vez al botón o a los resultados, así que si
+            # los resultados llegan sin aviso (ya se aceptaron) no se espera más
             cookie_selector = '#sp-cc-accept'
-            try:
-                page.click(cookie_selector, timeout=5000)
+            aceptadas = False
+            if primer_selector_sync(page, [cookie_selector, SELECTOR_RESULTADOS], 5, 'cookies'):
+                boton = page.query_selector(cookie_selector)
+                try:
+                    if boton:
+                        boton.click(timeout=2000)
+                        aceptadas = True
+                except Exception:
+                    pass
+            if aceptadas:
                 print("[OK] Cookies aceptadas")
-            except Exception:
+            else:
                 print("[INFO] No se encontró el botón de cookies o ya estaban aceptadas.")
 
             # Esperar productos
-            try:
-                page.wait_for_selector('[data-component-type="s-search-result"]', timeout=15000)
-                print("[OK] Productos detectados")
-            except Exception as e:
-                print(f"[ERROR] No se encontraron productos: {e}")
-                browser.close()
+            if not primer_selector_sync(page, [SELECTOR_RESULTADOS], 15, 'resultados'):
+                print("[ERROR] No se encontraron productos")
                 return []
+            print("[OK] Productos detectados")
 
-            elements = page.query_selector_all('[data-component-type="s-search-result"]')
-            print(f"[INFO] Encontrados {len(elements)} elementos. Procesando hasta {cantidad}...\n")
-
+            # Una llamada al navegador por página de resultados. Mientras se procesan los
+            # productos de la página N (con sus páginas de detalle), la N+1 se carga en otra pestaña
             scraped_count = 0
-            for i, elem in enumerate(elements):
-                if scraped_count >= cantidad:
-                    break
+            leidos = []  # todos los productos leídos, pasen o no el filtro, para la caché
+            agotada = False  # True solo si se llegó a la última página de resultados
+            errores = 0
+            deduplicador = DeduplicadorAsin()
+            numero = 1
+            while True:
+                tarjetas = deduplicador.filtrar(page.evaluate(JS_EXTRAER_TARJETAS, argumentos_busqueda(CAMPOS_TARJETA)))
+                print(f"[INFO] Página {numero}: {len(tarjetas)} elementos nuevos. Procesando hasta {cantidad}...\n")
+                hay_siguiente = page.query_selector(SELECTOR_PAGINA_SIGUIENTE) is not None
+                hay_mas = bool(tarjetas) and numero < MAX_PAGINAS and hay_siguiente
 
-                try:
-                    # Título
-                    titulo_elem = elem.query_selector('h2 a span')
-                    titulo = titulo_elem.inner_text() if titulo_elem else "Sin titulo"
-
-                    # Precio
-                    precio = "N/A"
-                    precio_num = 0
-                    precio_elem = elem.query_selector('.a-price-whole')
-                    if precio_elem:
-                        precio_text = precio_elem.inner_text()
-                        cleaned_price = precio_text.replace('.', '').replace(',', '.').strip()
-                        try:
-                            precio_num = float(cleaned_price)
-                            precio = f"{precio_num:.2f}".replace('.', ',') + " EUR"
-                        except ValueError:
-                            pass
-
-                    # --- FILTRADO POR PRECIO ---
-                    if not (min_price <= precio_num <= max_price):
-                        continue  # Saltar este producto si está fuera del rango
-
-                    # Rating
-                    rating_text = "Sin valoración"
-                    rating_num = 0
-                    rating_elem = elem.query_selector('.a-icon-alt')
-                    if rating_elem:
-                        rating_content = rating_elem.inner_text()
+                # Precarga solo si esta página no basta aunque todos sus productos pasen el filtro
+                precargada = False
+                if hay_mas and scraped_count + len(tarjetas) < cantidad:
+                    pestaña_siguiente = pestaña_siguiente or self._nueva_pagina()
+                    precargada = self._iniciar_carga(pestaña_siguiente, url_busqueda(busqueda, numero + 1))
+
+                for tarjeta in tarjetas:
+                    if scraped_count >= cantidad:
+                        break
+
+                    try:
+                        # Título
+                        titulo = tarjeta['titulo'][0]
+                        if titulo is None:
+                            titulo = "Sin titulo"
+
+                        # Precio
+                        precio = "N/A"
+                        precio_num = 0
+                        precio_text = tarjeta['precio'][0]
+                        if precio_text is not None:
+                            cleaned_price = precio_text.replace('.', '').replace(',', '.').strip()
+                            try:
+                                precio_num = float(cleaned_price)
+                                precio = f"{precio_num:.2f}".replace('.', ',') + " EUR"
+                            except ValueError:
+                                pass
+
+                        # Rating
+                        rating_text = "Sin valoración"
+                        rating_num = 0
+                        rating_content = tarjeta['rating'][0]
                         if rating_content and 'estrellas' in rating_content:
                             rating_text = rating_content
                             match = re.search(r'(\d+[,.]\d+)', rating_content)
                             if match:
                                 rating_num = float(match.group(1).replace(',', '.'))
 
-                    # Reseñas
-                    num_reviews = 0
-                    reviews_elem = elem.query_selector('.a-size-base.s-underline-text')
-                    if reviews_elem:
-                        try:
-                            num_reviews = int(reviews_elem.inner_text().replace('.', '').replace(',', ''))
-                        except (ValueError, TypeError):
-                            pass
-
-                    # URL
-                    url_completa = ""
-                    link_elem = elem.query_selector('h2 a')
-                    if link_elem:
-                        link = link_elem.get_attribute('href')
+                        # Reseñas
+                        num_reviews = 0
+                        reviews_text = tarjeta['reseñas'][0]
+                        if reviews_text is not None:
+                            try:
+                                num_reviews = int(reviews_text.replace('.', '').replace(',', ''))
+                            except (ValueError, TypeError):
+                                pass
+
+                        # URL
+                        url_completa = ""
+                        link = tarjeta['enlace'][0]
                         if link:
                             url_completa = f"https://www.amazon.es{link}" if not link.startswith('http') else link
 
-                    # --- NAVEGAR A LA PÁGINA DEL PRODUCTO PARA DETALLES ---
-                    features = []
-                    reviews = []
-                    if url_completa:
-                        print(f"    -> Visitando página de producto para obtener detalles...")
-                        product_page = context.new_page()
-                        try:
-                            product_page.goto(url_completa, timeout=45000, wait_until='domcontentloaded')
-
-                            # Extraer características
-                            feature_elements = product_page.query_selector_all('#feature-bullets ul li span.a-list-item')
-                            for feature_elem in feature_elements:
-                                features.append(feature_elem.inner_text().strip())
-
-                            # Extraer comentarios
-                            review_elements = product_page.query_selector_all('[data-hook="review-collapsed"]')
-                            for review_elem in review_elements[:3]:  # Limitar a 3
-                                reviews.append(review_elem.inner_text().strip())
-
-                        except Exception as e:
-                            print(f"      [WARN] No se pudieron obtener detalles: {e}")
-                        finally:
-                            product_page.close()
-
-                    producto = {
-                        'id': scraped_count + 1,
-                        'titulo': titulo.strip(),
-                        'precio': precio,
-                        'precio_num': precio_num,
-                        'rating': rating_text,
-                        'rating_num': rating_num,
-                        'num_reviews': num_reviews,
-                        'url': url_completa,
-                        'features': features,
-                        'reviews': reviews
-                    }
-
-                    self.productos.append(producto)
-                    scraped_count += 1
-                    print(f"  ✓ Producto {scraped_count}: {titulo[:60]}... | Precio: {precio}")
-
-                except Exception as e:
-                    print(f"\n[ERROR] Error procesando un producto: {e}\n")
-
-            browser.close()
+                        producto = {
+                            'id': scraped_count + 1,
+                            'titulo': titulo.strip(),
+                            'precio': precio,
+                            'precio_num': precio_num,
+                            'rating': rating_text,
+                            'rating_num': rating_num,
+                            'num_reviews': num_reviews,
+                            'url': url_completa,
+                        }
+                        leidos.append(producto)
+
+                        # --- FILTRADO POR PRECIO ---
+                        if not filtro(producto):
+                            continue  # Saltar este producto si está fuera del rango
+
+                        # --- NAVEGAR A LA PÁGINA DEL PRODUCTO PARA DETALLES ---
+                        producto['features'], producto['reviews'] = self._obtener_detalles(url_completa)
+
+                        self.productos.append(producto)
+                        scraped_count += 1
+                        print(f"  ✓ Producto {scraped_count}: {titulo[:60]}... | Precio: {precio}")
+
+                    except Exception as e:
+                        errores += 1
+                        print(f"\n[ERROR] Error procesando un producto: {e}\n")
+
+                if scraped_count >= cantidad or not hay_mas:
+                    # Entera solo si Amazon no ofrece más páginas y se leyeron todas las tarjetas
+                    agotada = not hay_siguiente and scraped_count < cantidad and not errores
+                    break
+                if not precargada:
+                    pestaña_siguiente = pestaña_siguiente or self._nueva_pagina()
+                    precargada = self._iniciar_carga(pestaña_siguiente, url_busqueda(busqueda, numero + 1))
+                if not precargada or not self._esperar_resultados(pestaña_siguiente):
+                    break
+                page, pestaña_siguiente = pestaña_siguiente, page
+                numero += 1
+
+            print(f"[INFO] {numero} página(s) recorrida(s), {deduplicador.duplicados} productos repetidos descartados")
+            if leidos:
+                cache_compartida().guardar(SITIO_CACHE, busqueda, leidos, completa=agotada)
+        finally:
+            # Se cierran las pestañas de la búsqueda; el navegador sigue abierto para la próxima
+            for pestaña in (page, pestaña_siguiente):
+                if pestaña is not None:
+                    pestaña.close()
 
         print(f"\n[OK] Scraping completado: {len(self.productos)} productos procesados.")
-        return self.productos
\ No newline at end of file
+        self.perfil.resumen(marca_red)
+        metricas_esperas.resumen()
+        return self.productos
+
+    def _obtener_detalles(self, url):
+        """Visita la página de un producto y devuelve (features, reviews)."""
+        features = []
+        reviews = []
+        if not url:
+            return features, reviews
+
+        print(f"    -> Visitando página de producto para obtener detalles...")
+        product_page = self._nueva_pagina()
+        try:
+            with self.perfil.medir(product_page, url):
+                product_page.goto(url, timeout=45000, wait_until='domcontentloaded')
+
+            # Extraer características
+            feature_elements = product_page.query_selector_all('#feature-bullets ul li span.a-list-item')
+            for feature_elem in feature_elements:
+                features.append(feature_elem.inner_text().strip())
+
+            # Extraer comentarios
+            review_elements = product_page.query_selector_all('[data-hook="review-collapsed"]')
+            for review_elem in review_elements[:3]:  # Limitar a 3
+                reviews.append(review_elem.inner_text().strip())
+
+        except Exception as e:
+            print(f"      [WARN] No se pudieron obtener detalles: {e}")
+        finally:
+            product_page.close()
+        return features, reviews
+
+    def _iniciar_carga(self, page, url):
+        """Empieza a cargar una página de resultados sin esperar a que termine."""
+        print(f"[NAVEGACIÓN] Precargando: {url}")
+        # La medición termina en `_esperar_resultados`, así que su tiempo incluye lo
+        # que se hizo mientras la página cargaba
+        self._marca_precarga = self.perfil.iniciar(page, url)
+        try:
+            # 'commit' vuelve en cuanto llega la respuesta; el navegador sigue cargando
+            page.goto(url, timeout=60000, wait_until='commit')
+            return True
+        except Exception as e:
+            print(f"[WARN] No se pudo cargar la página de resultados: {e}")
+            return False
+
+    def _esperar_resultados(self, page):
+        try:
+            if not primer_selector_sync(page, [SELECTOR_RESULTADOS], 15, 'resultados_precargados'):
+                print("[WARN] La página de resultados no tiene productos")
+                return False
+            return True
+        finally:
+            self.perfil.terminar(self._marca_precarga)
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""
+Caché de Inferencia - resultados de los modelos por texto, en SQLite, invalidados por versión de modelo
+Uso: from cache_inferencia import cache_inferencia_compartida, version_analizador
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from lectura_corpus import CARPETA_CACHE
+
+RUTA_CACHE_INFERENCIA = os.path.join(CARPETA_CACHE, 'inferencia.sqlite')
+
+# Subir la versión invalida toda la caché (p. ej. si cambia lo que se guarda)
+VERSION_CACHE_INFERENCIA = 1
+
+# Resultados (texto y modelo) guardados como máximo; al pasarse se borran los usados hace más tiempo
+MAX_ENTRADAS_INFERENCIA = 200_000
+
+# Variables por consulta: SQLite admite 999 en versiones antiguas
+_MAX_VARIABLES = 900
+
+# Resultado leído de la caché: mismos `output` y `probas` que el de pysentimiento
+ResultadoCacheado = namedtuple('ResultadoCacheado', ['output', 'probas'])
+
+
+def clave_texto(texto):
+    return hashlib.sha256(texto.encode('utf-8')).digest()[:16]
+
+
+def version_analizador(analizador):
+    """Identifica el modelo de un analizador: nombre, revisión, versión de pysentimiento y preprocesado.
+
+    Si cambia cualquiera de ellos, los resultados guardados con la versión anterior
+    dejan de servir.
+    """
+    import pysentimiento
+    config = analizador.model.config
+    return (f"v{VERSION_CACHE_INFERENCIA}|{config._name_or_path}@{getattr(config, '_commit_hash', None)}"
+            f"|pysentimiento {getattr(pysentimiento, '__version__', '?')}"
+            f"|{sorted(analizador.preprocessing_args.items())}")
+
+
+def _trozos(elementos, tamaño=_MAX_VARIABLES):
+    for inicio in range(0, len(elementos), tamaño):
+        yield elementos[inicio:inicio + tamaño]
+
+
+class CacheInferencia:
+    """Resultados de cada modelo por texto, con clave el hash del contenido.
+
+    Cada fila guarda el `output` y las `probas` de un modelo para un texto y la
+    versión del modelo que lo calculó (`version_analizador`): al consultar con otra
+    versión, las filas antiguas de ese modelo se borran. Por encima de
+    `max_entradas` filas se borran las usadas hace más tiempo. La base de datos
+    vive en disco, así que los textos repetidos (retuits, búsquedas repetidas)
+    tampoco se recalculan entre ejecuciones. Es segura entre hilos.
+    """
+
+    def __init__(self, ruta=RUTA_CACHE_INFERENCIA, max_entradas=MAX_ENTRADAS_INFERENCIA):
+        self.ruta = ruta
+        self.max_entradas = max_entradas
+        self.aciertos = 0
+        self.fallos = 0
+        self.repetidos = 0  # textos iguales a otro del mismo lote
+        self._versiones = {}
+        self._lock = threading.Lock()
+        if ruta != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._conexion.execute('PRAGMA journal_mode=WAL')
+        self._conexion.execute("""
+            CREATE TABLE IF NOT EXISTS resultados (
+                modelo TEXT NOT NULL,
+                clave BLOB NOT NULL,
+                version TEXT NOT NULL,
+                resultado TEXT NOT NULL,
+                usado REAL NOT NULL,
+                PRIMARY KEY (modelo, clave)
+            )""")
+        self._conexion.execute('CREATE INDEX IF NOT EXISTS resultados_usado ON resultados (usado)')
+        self._conexion.commit()
+
+    def _fijar_version(self, modelo, version):
+        """Borra los resultados de `modelo` calculados con otra versión (una vez por modelo y versión)."""
+        if self._versiones.get(modelo) != version:
+            borradas = self._conexion.execute(
+                'DELETE FROM resultados WHERE modelo = ? AND version != ?', (modelo, version)).rowcount
+            if borradas:
+                print(f"[CACHE] {borradas} resultados de '{modelo}' invalidados por cambio de modelo")
+            self._versiones[modelo] = version
+
+    def _leer(self, modelo, version, claves):
+        guardados = {}
+        for trozo in _trozos(claves):
+            filas = self._conexion.execute(
+                f"SELECT clave, resultado FROM resultados WHERE modelo = ? AND version = ? "
+                f"AND clave IN ({','.join('?' * len(trozo))})", (modelo, version, *trozo))
+            for clave, resultado in filas:
+                datos = json.loads(resultado)
+                guardados[clave] = ResultadoCacheado(datos['output'], datos['probas'])
+        return guardados
+
+    def _recortar(self):
+        total = self._conexion.execute('SELECT COUNT(*) FROM resultados').fetchone()[0]
+        if total > self.max_entradas:
+            # Se deja un 10 % de margen para no recortar en cada lote
+            sobrantes = total - int(self.max_entradas * 0.9)
+            self._conexion.execute(
+                'DELETE FROM resultados WHERE rowid IN (SELECT rowid FROM resultados ORDER BY usado LIMIT ?)',
+                (sobrantes,))
+
+    def predecir(self, textos, versiones, predecir):
+        """Resultados de los modelos de `versiones` para cada texto, calculando solo los que faltan.
+
+        `versiones` es `{modelo: version}`. `predecir(textos)` recibe los textos no
+        guardados (sin repetir) y devuelve, por texto, un dict `{modelo: resultado}`
+        con `output` y `probas`. Devuelve una lista de esos dicts en el orden de `textos`.
+        """
+        claves = [clave_texto(texto) for texto in textos]
+        unicas = list(dict.fromkeys(claves))
+        with self._lock:
+            ahora = time.time()
+            guardados = {}
+            for modelo, version in versiones.items():
+                self._fijar_version(modelo, version)
+                guardados[modelo] = self._leer(modelo, version, unicas)
+            completas = [clave for clave in unicas if all(clave in guardados[modelo] for modelo in versiones)]
+            for trozo in _trozos(completas):
+                self._conexion.execute(
+                    f"UPDATE resultados SET usado = ? WHERE clave IN ({','.join('?' * len(trozo))})", (ahora, *trozo))
+            self._conexion.commit()
+
+        resultados = {clave: {modelo: guardados[modelo][clave] for modelo in versiones} for clave in completas}
+        faltan = [clave for clave in unicas if clave not in resultados]
+        if faltan:
+            texto_de = dict(zip(claves, textos))
+            calculados = predecir([texto_de[clave] for clave in faltan])
+            resultados.update(zip(faltan, calculados))
+            filas = [(modelo, clave, version,
+                      json.dumps({'output': calculado[modelo].output,
+                                  'probas': {k: float(v) for k, v in calculado[modelo].probas.items()}}),
+                      ahora)
+                     for clave, calculado in zip(faltan, calculados)
+                     for modelo, version in versiones.items()]
+            with self._lock:
+                self._conexion.executemany('INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?, ?)', filas)
+                self._recortar()
+                self._conexion.commit()
+
+        with self._lock:
+            self.aciertos += len(completas)
+            self.fallos += len(faltan)
+            self.repetidos += len(claves) - len(unicas)
+        return [resultados[clave] for clave in claves]
+
+    def vaciar(self):
+        with self._lock:
+            self._conexion.execute('DELETE FROM resultados')
+            self._conexion.commit()
+
+    def cerrar(self):
+        with self._lock:
+            self._conexion.close()
+
+    def resumen(self):
+        with self._lock:
+            total = self._conexion.execute('SELECT COUNT(*) FROM resultados').fetchone()[0]
+        consultados = self.aciertos + self.fallos
+        tasa = self.aciertos / consultados if consultados else 0.0
+        print(f"[CACHE] Inferencia: {self.aciertos} textos guardados y {self.fallos} calculados ({tasa:.0%} de aciertos), "
+              f"{self.repetidos} repetidos en el mismo lote | {total} resultados en {self.ruta}")
+
+
+_cache = None
+_lock_cache = threading.Lock()
+
+
+def cache_inferencia_compartida():
+    """Caché de inferencia del proceso (se crea al primer uso)."""
+    global _cache
+    with _lock_cache:
+        if _cache is None:
+            _cache = CacheInferencia()
+        return _cache
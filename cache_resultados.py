@@ -0,0 +1,153 @@
+"""
+Caché de Resultados - resultados de búsquedas anteriores de los scrapers, con caducidad y en disco
+Uso: from cache_resultados import cache_compartida
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+RUTA_CACHE = "cache_resultados.json"
+
+# Segundos que una búsqueda guardada sigue siendo válida (los precios cambian)
+TTL_CACHE = 60 * 60
+
+# Búsquedas guardadas como máximo; al pasarse se olvida la usada hace más tiempo
+MAX_ENTRADAS = 100
+
+
+def normalizar_termino(termino):
+    """'  Guitarra   Eléctrica ' y 'guitarra eléctrica' son la misma búsqueda."""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', termino)).strip().lower()
+
+
+def _clave_elemento(elemento):
+    return elemento.get('url') or elemento.get('titulo') or id(elemento)
+
+
+class CacheResultados:
+    """Resultados de búsqueda sin filtrar, por sitio y término normalizado.
+
+    Cada entrada guarda todos los elementos que leyó el scraper, pasaran o no sus
+    filtros, y si la búsqueda se leyó entera (`completa`). Así una búsqueda
+    repetida con otro rango de precios, de rating o de años se responde filtrando
+    lo guardado, sin abrir el navegador. Las entradas caducan a los `ttl` segundos
+    y, por encima de `max_entradas`, se descarta la usada hace más tiempo.
+
+    Con `ruta` la caché se lee al crearla y se reescribe tras cada cambio, de modo
+    que sobrevive entre ejecuciones. Es segura entre hilos.
+    """
+
+    def __init__(self, ruta=RUTA_CACHE, ttl=TTL_CACHE, max_entradas=MAX_ENTRADAS):
+        self.ruta = ruta
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.aciertos = 0
+        self.fallos = 0
+        self._entradas = OrderedDict()  # (sitio, término) -> entrada, de menos a más reciente
+        self._lock = threading.Lock()
+        if ruta:
+            self._cargar()
+
+    def consultar(self, sitio, termino, cantidad, filtro=None):
+        """Hasta `cantidad` elementos guardados que pasan `filtro`, o None si la caché no basta.
+
+        No basta si no hay entrada vigente o si tiene menos de `cantidad` elementos
+        que pasen el filtro y la búsqueda no se leyó entera. Los elementos devueltos
+        son copias numeradas desde 1.
+        """
+        with self._lock:
+            clave = (sitio, normalizar_termino(termino))
+            entrada = self._vigente(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            seleccion = [e for e in entrada['elementos'] if filtro is None or filtro(e)][:cantidad]
+            if len(seleccion) < cantidad and not entrada['completa']:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+        return [{**elemento, 'id': i + 1} for i, elemento in enumerate(seleccion)]
+
+    def guardar(self, sitio, termino, elementos, completa=False):
+        """Guarda los elementos leídos (sin filtrar) de una búsqueda.
+
+        Si ya había una entrada vigente se combinan: los elementos con la misma URL
+        (o título) se sustituyen por los nuevos y el resto se conserva detrás.
+        """
+        with self._lock:
+            clave = (sitio, normalizar_termino(termino))
+            anterior = self._vigente(clave)
+            nuevos = {_clave_elemento(e): dict(e) for e in elementos}
+            if anterior is not None:
+                restantes = [e for e in anterior['elementos'] if _clave_elemento(e) not in nuevos]
+                completa = completa or anterior['completa']
+            else:
+                restantes = []
+            self._entradas[clave] = {
+                'guardado': time.time(),
+                'completa': completa,
+                'elementos': list(nuevos.values()) + restantes,
+            }
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+            self._escribir()
+
+    def vaciar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._escribir()
+
+    def _vigente(self, clave):
+        entrada = self._entradas.get(clave)
+        if entrada is not None and time.time() - entrada['guardado'] > self.ttl:
+            del self._entradas[clave]
+            return None
+        return entrada
+
+    def _cargar(self):
+        if not os.path.exists(self.ruta):
+            return
+        try:
+            with open(self.ruta, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  No se pudo leer la caché {self.ruta}: {e}")
+            return
+        limite = time.time() - self.ttl
+        for entrada in datos:
+            if entrada['guardado'] >= limite:
+                clave = (entrada.pop('sitio'), entrada.pop('termino'))
+                self._entradas[clave] = entrada
+        while len(self._entradas) > self.max_entradas:
+            self._entradas.popitem(last=False)
+
+    def _escribir(self):
+        if not self.ruta:
+            return
+        datos = [{'sitio': sitio, 'termino': termino, **entrada}
+                 for (sitio, termino), entrada in self._entradas.items()]
+        # Se escribe en un temporal y se renombra para no dejar nunca un fichero a medias
+        temporal = f"{self.ruta}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, ensure_ascii=False)
+        os.replace(temporal, self.ruta)
+
+
+_cache = None
+_lock_cache = threading.Lock()
+
+
+def cache_compartida():
+    """Caché del proceso, compartida por todos los scrapers (se crea al primer uso)."""
+    global _cache
+    with _lock_cache:
+        if _cache is None:
+            _cache = CacheResultados()
+        return _cache
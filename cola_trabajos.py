@@ -0,0 +1,206 @@
+"""
+Cola de Trabajos - scraping en segundo plano para las aplicaciones Flask
+Uso: from cola_trabajos import ColaTrabajos, registrar_rutas
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Segundos que se conserva un trabajo terminado para consultar su resultado
+TTL_TRABAJOS = 15 * 60
+
+# Máximo de segundos que una consulta de estado puede quedarse esperando
+MAX_ESPERA_CONSULTA = 30
+
+PLANTILLA_ESPERA = """
+<!DOCTYPE html>
+<html lang="es">
+<head>
+    <meta charset="UTF-8">
+    <title>Scraping en curso</title>
+    <style>
+        body { font-family: Arial, sans-serif; max-width: 600px; margin: 40px auto; padding: 20px; text-align: center; }
+        #estado { color: #555; }
+    </style>
+</head>
+<body>
+    <h1>Buscando "{{ busqueda }}"...</h1>
+    <p id="estado">Trabajo {{ trabajo.id }}: {{ trabajo.estado }}</p>
+    <script>
+        // Consulta larga: el servidor responde en cuanto el trabajo termina (o a los 25 s)
+        async function consultar() {
+            while (true) {
+                try {
+                    const respuesta = await fetch("/trabajos/{{ trabajo.id }}?esperar=25");
+                    if (respuesta.status === 404) {
+                        // El trabajo ya no existe: la página de resultado lo explica
+                        location.reload();
+                        return;
+                    }
+                    if (respuesta.ok) {
+                        const datos = await respuesta.json();
+                        document.getElementById("estado").textContent =
+                            `Trabajo ${datos.id}: ${datos.estado} (${datos.segundos_totales} s)`;
+                        if (datos.estado === "terminado" || datos.estado === "error") {
+                            location.reload();
+                            return;
+                        }
+                    }
+                } catch (e) {
+                    // Error de red: se reintenta tras la pausa
+                }
+                // Pausa antes de cada nueva consulta, para no saturar al servidor si responde al momento
+                await new Promise(r => setTimeout(r, 2000));
+            }
+        }
+        consultar();
+    </script>
+</body>
+</html>
+"""
+
+PLANTILLA_ERROR = """
+<h1>Error durante el scraping</h1>
+<p>{{ trabajo.error }}</p>
+<a href="/">Volver</a>
+"""
+
+
+class Trabajo:
+    """Un trabajo de scraping y su estado: 'en_cola', 'en_curso', 'terminado' o 'error'."""
+
+    def __init__(self, clave, descripcion=""):
+        self.id = uuid.uuid4().hex[:12]
+        self.clave = clave
+        self.descripcion = descripcion
+        self.estado = 'en_cola'
+        self.resultado = None
+        self.error = None
+        self.suscriptores = 1  # peticiones que comparten este trabajo
+        self.creado = time.time()
+        self.inicio = None
+        self.fin = None
+        self._evento_fin = threading.Event()
+
+    @property
+    def terminado(self):
+        return self._evento_fin.is_set()
+
+    def esperar(self, timeout=None):
+        """Espera a que el trabajo termine; devuelve False si vence el `timeout`."""
+        return self._evento_fin.wait(timeout)
+
+    def a_dict(self):
+        ahora = time.time()
+        return {
+            'id': self.id,
+            'descripcion': self.descripcion,
+            'estado': self.estado,
+            'suscriptores': self.suscriptores,
+            'segundos_en_cola': round((self.inicio or ahora) - self.creado, 1),
+            'segundos_totales': round((self.fin or ahora) - self.creado, 1),
+            'num_resultados': len(self.resultado) if self.resultado is not None else None,
+            'error': self.error,
+        }
+
+
+class ColaTrabajos:
+    """Ejecuta trabajos de scraping en un pool de hilos.
+
+    `enviar` devuelve enseguida el trabajo, que se consulta por su id. Si llega una
+    petición con la misma clave que un trabajo que aún no ha terminado, se une a
+    ese trabajo en lugar de lanzar otro scraping idéntico. Los trabajos terminados
+    se conservan `ttl` segundos.
+    """
+
+    def __init__(self, num_workers, ttl=TTL_TRABAJOS):
+        self.ttl = ttl
+        self._ejecutor = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix='trabajo')
+        self._trabajos = {}  # id -> Trabajo
+        self._en_curso = {}  # clave -> Trabajo sin terminar
+        self._lock = threading.Lock()
+
+    def enviar(self, clave, funcion, *args, descripcion=""):
+        """Encola `funcion(*args)`. Devuelve `(trabajo, nuevo)`; `nuevo` es False si se unió a otro."""
+        with self._lock:
+            self._purgar()
+            trabajo = self._en_curso.get(clave)
+            if trabajo is not None:
+                trabajo.suscriptores += 1
+                return trabajo, False
+
+            trabajo = Trabajo(clave, descripcion)
+            self._trabajos[trabajo.id] = trabajo
+            self._en_curso[clave] = trabajo
+        self._ejecutor.submit(self._ejecutar, trabajo, funcion, args)
+        return trabajo, True
+
+    def obtener(self, id_trabajo):
+        with self._lock:
+            return self._trabajos.get(id_trabajo)
+
+    def _ejecutar(self, trabajo, funcion, args):
+        trabajo.estado = 'en_curso'
+        trabajo.inicio = time.time()
+        try:
+            trabajo.resultado = funcion(*args)
+            trabajo.estado = 'terminado'
+        except Exception as e:
+            trabajo.error = str(e) or type(e).__name__
+            trabajo.estado = 'error'
+        finally:
+            trabajo.fin = time.time()
+            with self._lock:
+                if self._en_curso.get(trabajo.clave) is trabajo:
+                    del self._en_curso[trabajo.clave]
+            trabajo._evento_fin.set()
+
+    def _purgar(self):
+        limite = time.time() - self.ttl
+        for id_trabajo in [t.id for t in self._trabajos.values() if t.terminado and t.fin < limite]:
+            del self._trabajos[id_trabajo]
+
+
+def registrar_rutas(app, cola, mostrar_resultado):
+    """Añade a `app` las rutas para consultar trabajos.
+
+    - GET /trabajos/<id>: estado en JSON. Con `?esperar=N` la respuesta espera hasta
+      N segundos a que el trabajo termine (consulta larga).
+    - GET /trabajos/<id>/resultado: `mostrar_resultado(trabajo)` si terminó bien, el
+      error si falló o una página que espera al trabajo si sigue en marcha.
+    """
+    from flask import jsonify, render_template_string, request
+
+    @app.route('/trabajos/<id_trabajo>')
+    def estado_trabajo(id_trabajo):
+        trabajo = cola.obtener(id_trabajo)
+        if trabajo is None:
+            return jsonify({'error': 'Trabajo no encontrado'}), 404
+        try:
+            esperar = min(float(request.args.get('esperar', 0)), MAX_ESPERA_CONSULTA)
+        except ValueError:
+            esperar = 0
+        if esperar > 0:
+            trabajo.esperar(esperar)
+        return jsonify(trabajo.a_dict())
+
+    @app.route('/trabajos/<id_trabajo>/resultado')
+    def resultado_trabajo(id_trabajo):
+        trabajo = cola.obtener(id_trabajo)
+        if trabajo is None:
+            return "<h1>Trabajo no encontrado</h1><p>Puede que haya caducado.</p><a href='/'>Volver</a>", 404
+        if trabajo.estado == 'terminado':
+            return mostrar_resultado(trabajo)
+        if trabajo.estado == 'error':
+            # Plantilla con escape automático: el error puede contener la búsqueda o texto de la página
+            return render_template_string(PLANTILLA_ERROR, trabajo=trabajo)
+        return render_template_string(PLANTILLA_ESPERA, trabajo=trabajo, busqueda=trabajo.descripcion), 202
+
+
+def quiere_json(request):
+    """True si el cliente pide JSON (cabecera Accept o `formato=json`) en vez de HTML."""
+    if request.values.get('formato') == 'json':
+        return True
+    return request.accept_mimetypes.best == 'application/json'
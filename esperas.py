@@ -0,0 +1,141 @@
+"""
+Esperas - esperas por eventos para los scrapers (Selenium y Playwright) y sus métricas
+Uso: from esperas import metricas_esperas, primer_elemento, primer_selector
+"""
+
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Cada cuánto comprueba Selenium las condiciones de espera (por defecto 0,5 s)
+INTERVALO_SONDEO = 0.1
+
+
+class MetricasEspera:
+    """Tiempo esperado en cada paso de los scrapers (cookies, resultados, páginas...).
+
+    Por paso se guardan las esperas, las que acabaron sin encontrar nada
+    (`agotadas`), el total y el máximo en segundos. Es segura entre hilos.
+    """
+
+    def __init__(self):
+        self._pasos = defaultdict(lambda: {'esperas': 0, 'agotadas': 0, 'segundos': 0.0, 'maximo': 0.0})
+        self._lock = threading.Lock()
+
+    def registrar(self, paso, segundos, encontrado=True):
+        with self._lock:
+            datos = self._pasos[paso]
+            datos['esperas'] += 1
+            datos['agotadas'] += not encontrado
+            datos['segundos'] += segundos
+            datos['maximo'] = max(datos['maximo'], segundos)
+
+    @contextmanager
+    def medir(self, paso):
+        """Mide el bloque como una espera de `paso` (agotada si lanza una excepción)."""
+        inicio = time.perf_counter()
+        encontrado = False
+        try:
+            yield
+            encontrado = True
+        finally:
+            self.registrar(paso, time.perf_counter() - inicio, encontrado)
+
+    def a_dict(self):
+        with self._lock:
+            return {
+                paso: {**datos, 'media': datos['segundos'] / datos['esperas']}
+                for paso, datos in self._pasos.items()
+            }
+
+    def resumen(self):
+        for paso, datos in sorted(self.a_dict().items()):
+            print(f"[ESPERAS] {paso}: {datos['esperas']} esperas, {datos['media']:.2f}s de media, "
+                  f"{datos['maximo']:.2f}s máx., {datos['agotadas']} sin resultado")
+
+
+# Métricas del proceso, compartidas por todos los scrapers
+metricas_esperas = MetricasEspera()
+
+
+def _localizador(selector):
+    from selenium.webdriver.common.by import By
+    return selector if isinstance(selector, tuple) else (By.CSS_SELECTOR, selector)
+
+
+def primer_elemento(driver, selectores, timeout, paso, clicable=False):
+    """Espera (Selenium) a que aparezca cualquiera de `selectores` y devuelve el primero.
+
+    Todos los selectores se comprueban en cada sondeo, así que gana el primero que
+    encaja en vez de agotar el tiempo de cada uno por turnos. Un selector es una
+    cadena CSS o una tupla `(By.XPATH, ...)`. Con `clicable=True` solo valen
+    elementos visibles y habilitados. Devuelve `(selector, elemento)` o
+    `(None, None)` si se agota `timeout`.
+    """
+    from selenium.common.exceptions import InvalidSelectorException, StaleElementReferenceException, TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    localizadores = [(selector, _localizador(selector)) for selector in selectores]
+
+    def alguno(driver):
+        for selector, localizador in list(localizadores):
+            try:
+                for elemento in driver.find_elements(*localizador):
+                    if not clicable or (elemento.is_displayed() and elemento.is_enabled()):
+                        return selector, elemento
+            except InvalidSelectorException:
+                localizadores.remove((selector, localizador))  # no se vuelve a probar
+            except StaleElementReferenceException:
+                continue
+        return False
+
+    inicio = time.perf_counter()
+    try:
+        encontrado = WebDriverWait(driver, timeout, poll_frequency=INTERVALO_SONDEO).until(alguno)
+    except TimeoutException:
+        encontrado = (None, None)
+    metricas_esperas.registrar(paso, time.perf_counter() - inicio, encontrado[0] is not None)
+    return encontrado
+
+
+def esperar_desaparicion(driver, elemento, timeout, paso):
+    """Espera (Selenium) a que `elemento` se oculte o salga del DOM, en vez de un `sleep` fijo."""
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    inicio = time.perf_counter()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=INTERVALO_SONDEO).until(EC.invisibility_of_element(elemento))
+        oculto = True
+    except TimeoutException:
+        oculto = False
+    metricas_esperas.registrar(paso, time.perf_counter() - inicio, oculto)
+    return oculto
+
+
+async def primer_selector(page, selectores, timeout, paso, estado='visible'):
+    """Espera (Playwright asíncrono) al primer elemento de cualquiera de `selectores`.
+
+    Los selectores se unen en una lista CSS, de modo que el navegador vigila todos a
+    la vez. `timeout` en segundos. Devuelve el elemento o None si se agota.
+    """
+    inicio = time.perf_counter()
+    try:
+        elemento = await page.wait_for_selector(', '.join(selectores), state=estado, timeout=timeout * 1000)
+    except Exception:
+        elemento = None
+    metricas_esperas.registrar(paso, time.perf_counter() - inicio, elemento is not None)
+    return elemento
+
+
+def primer_selector_sync(page, selectores, timeout, paso, estado='visible'):
+    """Como `primer_selector`, para la API síncrona de Playwright."""
+    inicio = time.perf_counter()
+    try:
+        elemento = page.wait_for_selector(', '.join(selectores), state=estado, timeout=timeout * 1000)
+    except Exception:
+        elemento = None
+    metricas_esperas.registrar(paso, time.perf_counter() - inicio, elemento is not None)
+    return elemento
@@ -0,0 +1,51 @@
+"""
+Extracción de Amazon - argumentos de extracción de las tarjetas de búsqueda, paginación y deduplicación
+Uso: from extraccion_amazon import argumentos_busqueda, url_busqueda, DeduplicadorAsin
+"""
+
+from extraccion_tarjetas import argumentos_extraccion
+
+SELECTOR_RESULTADOS = '[data-component-type="s-search-result"]'
+ATRIBUTO_ASIN = 'data-asin'
+
+# Enlace a la página siguiente; en la última página Amazon lo sustituye por un <span> deshabilitado
+SELECTOR_PAGINA_SIGUIENTE = 'a.s-pagination-next'
+
+# Límite de páginas de resultados que se recorren en una búsqueda
+MAX_PAGINAS = 20
+
+
+def argumentos_busqueda(campos, limite=None):
+    """Argumento de `JS_EXTRAER_TARJETAS` para los resultados de una búsqueda, con el ASIN como clave."""
+    return argumentos_extraccion(campos, SELECTOR_RESULTADOS, limite, atributo_clave=ATRIBUTO_ASIN)
+
+
+def url_busqueda(busqueda, pagina=1):
+    """URL de la página `pagina` de resultados de una búsqueda en Amazon.es."""
+    url = f"https://www.amazon.es/s?k={busqueda.replace(' ', '+')}"
+    return url if pagina == 1 else f"{url}&page={pagina}"
+
+
+class DeduplicadorAsin:
+    """Recuerda los ASIN ya vistos para no repetir productos entre páginas.
+
+    Amazon repite productos (sobre todo patrocinados) en páginas distintas. Los
+    resultados sin ASIN no se pueden comparar y siempre se consideran nuevos.
+    """
+
+    def __init__(self):
+        self.vistos = set()
+        self.duplicados = 0
+
+    def es_nuevo(self, asin):
+        if not asin:
+            return True
+        if asin in self.vistos:
+            self.duplicados += 1
+            return False
+        self.vistos.add(asin)
+        return True
+
+    def filtrar(self, tarjetas):
+        """Devuelve solo las tarjetas (de `JS_EXTRAER_TARJETAS`) con un ASIN no visto."""
+        return [tarjeta for tarjeta in tarjetas if self.es_nuevo(tarjeta['clave'])]
@@ -0,0 +1,44 @@
+"""
+Extracción de Tarjetas - lectura de todos los resultados de una página en una sola llamada al navegador
+Uso: from extraccion_tarjetas import JS_EXTRAER_TARJETAS, argumentos_extraccion
+"""
+
+# Recorre en la página todos los resultados y, para cada campo, prueba su cascada de
+# selectores. Por cada selector devuelve el texto (o el atributo indicado) del primer
+# elemento que encaja, '' si el atributo no existe y null si no hay elemento.
+# `clave` es el atributo identificador del propio resultado ('' si no se pide o no lo tiene).
+JS_EXTRAER_TARJETAS = """
+({selector, campos, limite, atributo_clave}) => {
+    let nodos = Array.from(document.querySelectorAll(selector));
+    if (limite !== null) nodos = nodos.slice(0, limite);
+    return nodos.map(nodo => {
+        const tarjeta = {
+            clave: (atributo_clave && nodo.getAttribute(atributo_clave)) || '',
+            texto: nodo.innerText,
+        };
+        for (const [campo, cascada] of Object.entries(campos)) {
+            tarjeta[campo] = cascada.map(([sel, atributo]) => {
+                const el = nodo.querySelector(sel);
+                if (!el) return null;
+                return (atributo ? el.getAttribute(atributo) : el.innerText) ?? '';
+            });
+        }
+        return tarjeta;
+    });
+}
+"""
+
+
+def argumentos_extraccion(campos, selector, limite=None, atributo_clave=None):
+    """Argumento para `page.evaluate(JS_EXTRAER_TARJETAS, ...)` (o `execute_script` en Selenium).
+
+    `selector` encuentra cada resultado y `campos` asocia cada campo a su cascada
+    de selectores: una lista de `(selector, atributo)`, con `atributo=None` para
+    leer el texto visible.
+    """
+    return {
+        'selector': selector,
+        'campos': {campo: [list(paso) for paso in cascada] for campo, cascada in campos.items()},
+        'limite': limite,
+        'atributo_clave': atributo_clave,
+    }
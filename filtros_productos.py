@@ -0,0 +1,60 @@
+"""
+Filtros de Productos - filtros por precio, valoración y reseñas para los scrapers de Amazon
+Uso: from filtros_productos import FiltroProductos, aplicar_filtro
+"""
+
+from collections import Counter
+
+
+class FiltroProductos:
+    """Filtro por rango de precio, valoración mínima y número mínimo de reseñas.
+
+    Solo usa campos de la tarjeta de búsqueda (`precio_num`, `rating_num`,
+    `num_reviews`), así que se aplica antes de visitar la página del producto.
+    Cualquier callable `producto -> bool` puede usarse como filtro en su lugar.
+    """
+
+    def __init__(self, min_price=0, max_price=float('inf'), min_rating=0, min_reviews=0):
+        self.min_price = min_price
+        self.max_price = max_price
+        self.min_rating = min_rating
+        self.min_reviews = min_reviews
+
+    def motivo_descarte(self, producto):
+        """Devuelve por qué se descarta un producto ('precio', 'rating', 'reseñas') o None."""
+        if not (self.min_price <= producto['precio_num'] <= self.max_price):
+            return 'precio'
+        if producto['rating_num'] < self.min_rating:
+            return 'rating'
+        if producto['num_reviews'] < self.min_reviews:
+            return 'reseñas'
+        return None
+
+    def __call__(self, producto):
+        return self.motivo_descarte(producto) is None
+
+    def __repr__(self):
+        return (f"FiltroProductos(precio={self.min_price:.2f}-{self.max_price:.2f}, "
+                f"rating>={self.min_rating}, reseñas>={self.min_reviews})")
+
+
+def aplicar_filtro(productos, filtro):
+    """Separa los productos que pasan el filtro.
+
+    Devuelve `(aceptados, descartes)`, donde `descartes` cuenta los productos
+    descartados por motivo. Los filtros sin `motivo_descarte` cuentan como 'filtro'.
+    """
+    motivo_descarte = getattr(filtro, 'motivo_descarte', None)
+    aceptados = []
+    descartes = Counter()
+    for producto in productos:
+        if motivo_descarte is not None:
+            motivo = motivo_descarte(producto)
+        else:
+            motivo = None if filtro(producto) else 'filtro'
+
+        if motivo is None:
+            aceptados.append(producto)
+        else:
+            descartes[motivo] += 1
+    return aceptados, descartes
@@ -0,0 +1,103 @@
+"""
+Flujo por Lotes - descarga paginada y análisis solapados (productor/consumidor con asyncio)
+Uso: from flujo_lotes import procesar_en_flujo
+"""
+
+import asyncio
+import time
+from collections import Counter
+
+# Páginas descargadas que pueden esperar a ser analizadas; si se llena, la descarga se detiene
+MAX_PAGINAS_EN_COLA = 8
+
+# Tamaño máximo de cada lote que se pasa al analizador
+TAMAÑO_MICROLOTE = 32
+
+_FIN = object()
+
+
+async def _producir(paginas, cola, metricas):
+    """Recorre el iterable (bloqueante) de páginas en un hilo y las deja en la cola."""
+    iterador = iter(paginas)
+    error = None
+    try:
+        while True:
+            inicio = time.perf_counter()
+            pagina = await asyncio.to_thread(next, iterador, _FIN)
+            metricas['segundos_descarga'] += time.perf_counter() - inicio
+            if pagina is _FIN:
+                break
+            metricas['paginas'] += 1
+            await cola.put(pagina)  # espera si el análisis va por detrás
+    except Exception as e:
+        error = e
+    # Se avisa del final también tras un error; si se cancela, ya no hay consumidor
+    await cola.put(_FIN)
+    if error is not None:
+        raise error
+
+
+async def flujo_analisis(paginas, analizar_lote, tamaño_lote=TAMAÑO_MICROLOTE,
+                         max_paginas_en_cola=MAX_PAGINAS_EN_COLA, metricas=None):
+    """Generador asíncrono que analiza lo ya descargado mientras se descargan más páginas.
+
+    `paginas` es un iterable bloqueante de listas (una por página) que se recorre en
+    un hilo aparte. Cada vez que llegan páginas se juntan todas las que esperan en la
+    cola y se analizan en lotes de como mucho `tamaño_lote` con `analizar_lote(lista)`,
+    también en un hilo, entregando cada lote analizado en cuanto está listo. Si el
+    análisis va más lento que la descarga los lotes salen llenos; si va más rápido,
+    no espera a completarlos.
+    """
+    metricas = Counter() if metricas is None else metricas
+    cola = asyncio.Queue(maxsize=max_paginas_en_cola)
+    productor = asyncio.create_task(_producir(paginas, cola, metricas))
+    try:
+        terminado = False
+        while not terminado:
+            pendientes = []
+            pagina = await cola.get()
+            while pagina is not _FIN:
+                pendientes.extend(pagina)
+                if cola.empty():
+                    break
+                pagina = cola.get_nowait()
+            terminado = pagina is _FIN
+
+            for inicio_lote in range(0, len(pendientes), tamaño_lote):
+                lote = pendientes[inicio_lote:inicio_lote + tamaño_lote]
+                inicio = time.perf_counter()
+                resultado = await asyncio.to_thread(analizar_lote, lote)
+                metricas['segundos_analisis'] += time.perf_counter() - inicio
+                metricas['lotes'] += 1
+                metricas['elementos'] += len(lote)
+                yield resultado
+        await productor  # propaga los errores de la descarga
+    finally:
+        productor.cancel()
+
+
+def procesar_en_flujo(paginas, analizar_lote, al_lote=None, tamaño_lote=TAMAÑO_MICROLOTE,
+                      max_paginas_en_cola=MAX_PAGINAS_EN_COLA):
+    """Versión síncrona de `flujo_analisis`: devuelve todos los resultados en orden.
+
+    `al_lote(resultados)` se llama con cada lote analizado según va saliendo.
+    Al terminar imprime cuánto se solapó la descarga con el análisis.
+    """
+    metricas = Counter()
+
+    async def recorrer():
+        resultados = []
+        async for lote in flujo_analisis(paginas, analizar_lote, tamaño_lote, max_paginas_en_cola, metricas):
+            resultados.extend(lote)
+            if al_lote is not None:
+                al_lote(lote)
+        return resultados
+
+    inicio = time.perf_counter()
+    resultados = asyncio.run(recorrer())
+    total = time.perf_counter() - inicio
+    en_serie = metricas['segundos_descarga'] + metricas['segundos_analisis']
+    print(f"[FLUJO] {metricas['elementos']} elementos de {metricas['paginas']} páginas en {metricas['lotes']} lotes: "
+          f"descarga {metricas['segundos_descarga']:.1f}s, análisis {metricas['segundos_analisis']:.1f}s, "
+          f"total {total:.1f}s (en serie serían {en_serie:.1f}s)")
+    return resultados
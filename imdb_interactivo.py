@@ -10,16 +10,45 @@ import webbrowser
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException
+from selenium.common.exceptions import ElementClickInterceptedException
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+
+from pool_drivers import TAMAÑO_POOL, PoolScrapers, ruta_chromedriver
+from cola_trabajos import ColaTrabajos, quiere_json, registrar_rutas
+from cache_resultados import cache_compartida
+from esperas import esperar_desaparicion, metricas_esperas, primer_elemento
+from extraccion_tarjetas import JS_EXTRAER_TARJETAS, argumentos_extraccion
+
+SITIO_CACHE = 'imdb.com/selenium'
+
+# Contenedores de resultados de búsqueda, de más a menos preferido
+SELECTORES_RESULTADOS = [
+    ".find-result",
+    ".ipc-metadata-list-summary-item",
+    ".find-title-result",
+    ".result_text",
+]
+
+# Cascadas de selectores de cada resultado: (selector, atributo o None para el texto)
+CAMPOS_PELICULA = {
+    'titulo': [(selector, None) for selector in
+               ["h3 a", "h3", ".ipc-title__text", ".ipc-title-link-wrapper", ".find-result-item h3", ".result_text a"]],
+    'rating': [(selector, None) for selector in
+               [".ipc-rating-star", ".rating-rating", ".ratings-imdb-rating", "[data-testid='ratingGroup']"]],
+    'enlace': [(selector, 'href') for selector in
+               ["h3 a", "a.ipc-title-link-wrapper", ".result_text a", ".find-result-item a"]],
+    'imagen': [(selector, 'src') for selector in ["img", ".ipc-image", ".find-result-item img", ".poster img"]],
+}
+
+GENEROS_COMUNES = ['action', 'comedy', 'drama', 'horror', 'sci-fi', 'romance', 'thriller', 'documentary']
+
+# Lee todos los resultados de la página en una sola llamada al navegador
+JS_REGISTROS = f"return ({JS_EXTRAER_TARJETAS})(arguments[0]);"
 
 # Intentar importar Flask
 try:
-    from flask import Flask, render_template_string, request
+    from flask import Flask, jsonify, redirect, render_template_string, request, url_for
 
     FLASK_AVAILABLE = True
 except ImportError:
@@ -48,12 +77,14 @@ class IMDbScraperSelenium:
         chrome_options.add_argument("--start-maximized")
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option('useAutomationExtension', False)
+        # `get` vuelve con el DOM listo (DOMContentLoaded), sin esperar a imágenes ni anuncios
+        chrome_options.page_load_strategy = 'eager'
 
         chrome_options.add_argument(
             "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
 
         try:
-            service = Service(ChromeDriverManager().install())
+            service = Service(ruta_chromedriver())
             self.driver = webdriver.Chrome(service=service, options=chrome_options)
             self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
             print("✅ Navegador Chrome iniciado correctamente")
@@ -68,151 +99,86 @@ class IMDbScraperSelenium:
         cookie_selectors = [
             "#onetrust-accept-btn-handler",
             'button[data-testid="accept-button"]',
-            'button:contains("Accept")',
-            'button:contains("Aceptar")'
+            (By.XPATH, '//button[contains(., "Accept")]'),
+            (By.XPATH, '//button[contains(., "Aceptar")]'),
         ]
-        for selector in cookie_selectors:
+        # Se vigilan a la vez los botones de cookies y los resultados: si llegan los
+        # resultados sin aviso (ya se aceptaron en este navegador) no se espera más
+        selector, cookie_btn = primer_elemento(self.driver, cookie_selectors + SELECTORES_RESULTADOS, 3, 'cookies',
+                                               clicable=True)
+        if selector in cookie_selectors:
             try:
-                cookie_btn = WebDriverWait(self.driver, 3).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                )
                 cookie_btn.click()
                 print("✅ Cookies/popups manejados")
-                time.sleep(1)
+                esperar_desaparicion(self.driver, cookie_btn, 1, 'cierre_cookies')
                 return True
-            except (TimeoutException, ElementClickInterceptedException):
-                continue
+            except ElementClickInterceptedException:
+                pass
         print("ℹ️ No se encontraron popups de cookies")
         return False
 
-    def extract_movie_data(self, element, index):
-        """Extrae datos de una película individual con selectores más robustos"""
+    def extract_movie_data(self, registro, index):
+        """Construye los datos de una película a partir de su registro de `JS_EXTRAER_TARJETAS`.
+
+        El registro trae, por cada campo de `CAMPOS_PELICULA`, el valor de cada selector
+        de su cascada (None si no encaja), y el texto visible del resultado.
+        """
         try:
             print(f"🔍 Procesando elemento {index + 1}...")
+            element_text = registro['texto'] or ""
 
-            # TÍTULO - Múltiples estrategias
+            # TÍTULO - primer selector con un texto válido
             titulo = "Sin título"
-            titulo_selectors = [
-                "h3 a",
-                "h3",
-                ".ipc-title__text",
-                ".ipc-title-link-wrapper",
-                ".find-result-item h3",
-                ".result_text a"
-            ]
-
-            for selector in titulo_selectors:
-                try:
-                    titulo_elem = element.find_element(By.CSS_SELECTOR, selector)
-                    titulo_text = titulo_elem.text.strip()
-                    if titulo_text and len(titulo_text) > 2:
-                        titulo = titulo_text
-                        # Limpiar número si existe
-                        titulo = re.sub(r'^\d+\.\s*', '', titulo)
-                        print(f"  ✅ Título encontrado: {titulo[:50]}...")
-                        break
-                except NoSuchElementException:
-                    continue
-
-            # AÑO
+            for titulo_text in registro['titulo']:
+                titulo_text = (titulo_text or "").strip()
+                if len(titulo_text) > 2:
+                    # Limpiar número si existe
+                    titulo = re.sub(r'^\d+\.\s*', '', titulo_text)
+                    print(f"  ✅ Título encontrado: {titulo[:50]}...")
+                    break
+
+            # AÑO - en el texto del elemento completo
             año = "N/A"
-            try:
-                # Buscar año en el texto del elemento completo
-                element_text = element.text
-                year_match = re.search(r'(19|20)\d{2}', element_text)
-                if year_match:
-                    año = year_match.group()
-                print(f"  📅 Año: {año}")
-            except:
-                pass
+            year_match = re.search(r'(19|20)\d{2}', element_text)
+            if year_match:
+                año = year_match.group()
+            print(f"  📅 Año: {año}")
 
-            # RATING - Estrategias múltiples
+            # RATING
             rating_text = "Sin rating"
             rating_num = 0.0
-            rating_selectors = [
-                ".ipc-rating-star",
-                ".rating-rating",
-                ".ratings-imdb-rating",
-                "[data-testid='ratingGroup']"
-            ]
-
-            for selector in rating_selectors:
-                try:
-                    rating_elem = element.find_element(By.CSS_SELECTOR, selector)
-                    rating_content = rating_elem.text.strip()
-                    if rating_content:
-                        rating_match = re.search(r'(\d+[.,]\d+)', rating_content)
-                        if rating_match:
-                            rating_num = float(rating_match.group(1).replace(',', '.'))
-                            rating_text = f"{rating_num}/10"
-                            print(f"  ⭐ Rating: {rating_text}")
-                            break
-                except NoSuchElementException:
-                    continue
-
-            # DURACIÓN
+            for rating_content in registro['rating']:
+                rating_match = re.search(r'(\d+[.,]\d+)', rating_content or "")
+                if rating_match:
+                    rating_num = float(rating_match.group(1).replace(',', '.'))
+                    rating_text = f"{rating_num}/10"
+                    print(f"  ⭐ Rating: {rating_text}")
+                    break
+
+            # DURACIÓN - patrones de duración en el texto
             duracion = "N/A"
-            try:
-                # Buscar patrones de duración en el texto
-                element_text = element.text
-                duration_match = re.search(r'(\d+h\s*\d+m|\d+ min)', element_text, re.IGNORECASE)
-                if duration_match:
-                    duracion = duration_match.group(1)
-                print(f"  ⏱️ Duración: {duracion}")
-            except:
-                pass
+            duration_match = re.search(r'(\d+h\s*\d+m|\d+ min)', element_text, re.IGNORECASE)
+            if duration_match:
+                duracion = duration_match.group(1)
+            print(f"  ⏱️ Duración: {duracion}")
 
-            # GÉNEROS
-            generos = []
-            try:
-                # Buscar géneros en el texto
-                element_text = element.text.lower()
-                common_genres = ['action', 'comedy', 'drama', 'horror', 'sci-fi', 'romance', 'thriller', 'documentary']
-                for genre in common_genres:
-                    if genre in element_text:
-                        generos.append(genre.title())
-                if generos:
-                    print(f"  🎭 Géneros: {generos}")
-            except:
-                pass
+            # GÉNEROS - géneros comunes en el texto
+            texto_minusculas = element_text.lower()
+            generos = [genre.title() for genre in GENEROS_COMUNES if genre in texto_minusculas]
+            if generos:
+                print(f"  🎭 Géneros: {generos}")
 
             # URL
             url_completa = ""
-            link_selectors = [
-                "h3 a",
-                "a.ipc-title-link-wrapper",
-                ".result_text a",
-                ".find-result-item a"
-            ]
-            for selector in link_selectors:
-                try:
-                    link_elem = element.find_element(By.CSS_SELECTOR, selector)
-                    url_relativa = link_elem.get_attribute('href')
-                    if url_relativa:
-                        url_completa = f"https://www.imdb.com{url_relativa}" if url_relativa.startswith(
-                            '/') else url_relativa
-                        print(f"  🔗 URL: {url_completa[:50]}...")
-                        break
-                except NoSuchElementException:
-                    continue
+            url_relativa = next((url for url in registro['enlace'] if url), "")
+            if url_relativa:
+                url_completa = f"https://www.imdb.com{url_relativa}" if url_relativa.startswith('/') else url_relativa
+                print(f"  🔗 URL: {url_completa[:50]}...")
 
             # IMAGEN
-            imagen_url = ""
-            img_selectors = [
-                "img",
-                ".ipc-image",
-                ".find-result-item img",
-                ".poster img"
-            ]
-            for selector in img_selectors:
-                try:
-                    img_elem = element.find_element(By.CSS_SELECTOR, selector)
-                    imagen_url = img_elem.get_attribute('src')
-                    if imagen_url and 'http' in imagen_url:
-                        print(f"  🖼️ Imagen encontrada")
-                        break
-                except NoSuchElementException:
-                    continue
+            imagen_url = next((src for src in registro['imagen'] if src and 'http' in src), "")
+            if imagen_url:
+                print(f"  🖼️ Imagen encontrada")
 
             movie_data = {
                 'id': index + 1,
@@ -245,43 +211,34 @@ class IMDbScraperSelenium:
         print(f"⭐ Rango de rating: {min_rating}-{max_rating}")
         print(f"📅 Años: {min_year}-{max_year}")
 
+        en_cache = peliculas_en_cache(busqueda, cantidad, min_rating, max_rating, min_year, max_year)
+        if en_cache is not None:
+            self.movies = en_cache
+            print(f"⚡ {len(en_cache)} películas servidas desde la caché, sin abrir IMDb")
+            return self.movies
+
         try:
             # Estrategia 1: Búsqueda directa
             search_query = busqueda.replace(' ', '+')
             url = f"https://www.imdb.com/find?q={search_query}&s=tt&ttype=ft"
 
             print(f"🌐 Navegando a: {url}")
-            self.driver.get(url)
-
-            # Esperar a que cargue
-            WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
+            with metricas_esperas.medir('carga_busqueda'):
+                self.driver.get(url)
 
             self.handle_cookies_and_popups()
 
-            # Esperar resultados con múltiples selectores posibles
+            # Esperar resultados: todos los selectores a la vez, gana el primero que aparezca
             print("🔍 Esperando resultados...")
-            selectors_to_try = [
-                ".find-result",
-                ".ipc-metadata-list-summary-item",
-                ".find-title-result",
-                ".result_text",
-                "h3"  # Último recurso: cualquier h3
-            ]
-
-            elements = []
-            for selector in selectors_to_try:
-                try:
-                    WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                    )
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if elements:
-                        print(f"✅ Encontrados {len(elements)} elementos con selector: {selector}")
-                        break
-                except TimeoutException:
-                    continue
+            selector, _ = primer_elemento(self.driver, SELECTORES_RESULTADOS, 10, 'resultados')
+            resultados_cargados = selector is not None
+            if selector is None:
+                selector = "h3"  # Último recurso: cualquier h3
+            inicio = time.perf_counter()
+            elements = self.driver.execute_script(JS_REGISTROS, argumentos_extraccion(CAMPOS_PELICULA, selector))
+            if elements:
+                print(f"✅ Encontrados {len(elements)} elementos con selector: {selector} "
+                      f"(leídos en {(time.perf_counter() - inicio) * 1000:.0f} ms)")
 
             if not elements:
                 print("❌ No se pudieron encontrar resultados en la página")
@@ -292,6 +249,8 @@ class IMDbScraperSelenium:
 
             print(f"\n--- 🎬 Procesando {len(elements)} elementos encontrados ---")
             peliculas_procesadas = 0
+            leidas = []  # todas las películas leídas, pasen o no los filtros, para la caché
+            errores = 0
 
             for i, elem in enumerate(elements):
                 if peliculas_procesadas >= cantidad:
@@ -300,23 +259,26 @@ class IMDbScraperSelenium:
                 print(f"\n📝 Procesando elemento {i + 1}/{len(elements)}...")
                 pelicula = self.extract_movie_data(elem, peliculas_procesadas)
 
-                if pelicula:
-                    # Aplicar filtros
-                    año_valido = (pelicula['año'] != "N/A" and
-                                  pelicula['año'].isdigit() and
-                                  min_year <= int(pelicula['año']) <= max_year)
-
-                    rating_valido = min_rating <= pelicula['rating_num'] <= max_rating
-
-                    if año_valido and rating_valido:
+                if not pelicula:
+                    errores += 1
+                else:
+                    leidas.append(pelicula)
+                    if cumple_filtros(pelicula, min_rating, max_rating, min_year, max_year):
                         self.movies.append(pelicula)
                         peliculas_procesadas += 1
                         print(f"🎉 ✅ Añadida: {pelicula['titulo'][:40]}...")
                     else:
                         print(f"⏭️  Filtrada: {pelicula['titulo'][:40]}... (no cumple filtros)")
 
+            # La página de búsqueda es única: está entera si cargó bien, se recorrieron todos
+            # sus resultados sin llegar a `cantidad` y ninguno falló al leerse
+            completa = resultados_cargados and peliculas_procesadas < cantidad and not errores
+            if leidas:
+                cache_compartida().guardar(SITIO_CACHE, busqueda, leidas, completa=completa)
+
             print("\n---------------------------------")
             print(f"✅ Scraping completado: {len(self.movies)} películas obtenidas")
+            metricas_esperas.resumen()
 
             if not self.movies:
                 print("💡 Consejo: Prueba con menos filtros o otra búsqueda")
@@ -329,14 +291,44 @@ class IMDbScraperSelenium:
             traceback.print_exc()
             return []
 
+    def reiniciar(self):
+        """Deja el scraper listo para otra búsqueda (lo usa el pool de navegadores)."""
+        self.movies = []
+        pestañas = self.driver.window_handles
+        for pestaña in pestañas[1:]:
+            self.driver.switch_to.window(pestaña)
+            self.driver.close()
+        self.driver.switch_to.window(pestañas[0])
+
     def close(self):
         if self.driver:
             self.driver.quit()
             print("✅ Navegador cerrado")
 
 
+def cumple_filtros(pelicula, min_rating, max_rating, min_year, max_year):
+    año_valido = (pelicula['año'] != "N/A" and
+                  pelicula['año'].isdigit() and
+                  min_year <= int(pelicula['año']) <= max_year)
+    rating_valido = min_rating <= pelicula['rating_num'] <= max_rating
+    return año_valido and rating_valido
+
+
+def peliculas_en_cache(busqueda, cantidad, min_rating, max_rating, min_year, max_year):
+    """Películas de una búsqueda anterior que cumplen los filtros, o None."""
+    return cache_compartida().consultar(
+        SITIO_CACHE, busqueda, cantidad,
+        lambda pelicula: cumple_filtros(pelicula, min_rating, max_rating, min_year, max_year))
+
+
 app = Flask(__name__)
 
+# Navegadores arrancados una vez y compartidos por todas las peticiones a /scrape
+pool_scrapers = PoolScrapers(lambda: IMDbScraperSelenium(headless=False))  # Con ventana para debugging
+
+# Un worker por navegador: los trabajos de más esperan en la cola, no en el pool
+cola_trabajos = ColaTrabajos(num_workers=TAMAÑO_POOL)
+
 HTML_FORM_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="es">
@@ -495,6 +487,12 @@ def index():
     return render_template_string(HTML_FORM_TEMPLATE)
 
 
+@app.route('/metricas')
+def metricas():
+    """Tiempos de espera por paso de todos los scrapers del proceso."""
+    return jsonify(metricas_esperas.a_dict())
+
+
 @app.route('/scrape', methods=['POST'])
 def scrape():
     busqueda = request.form.get('busqueda', 'avengers')
@@ -510,16 +508,36 @@ def scrape():
     min_year = int(min_year_str) if min_year_str and min_year_str.isdigit() else 2000
     max_year = int(max_year_str) if max_year_str and max_year_str.isdigit() else 2024
 
-    scraper = None
-    try:
-        scraper = IMDbScraperSelenium(headless=False)  # Cambiado a False para debugging
-        peliculas = scraper.scrape_movies(busqueda, cantidad, min_rating, max_rating, min_year, max_year)
-        return render_template_string(HTML_RESULTS_TEMPLATE, peliculas=peliculas, busqueda=busqueda)
-    except Exception as e:
-        return f"<h1>Error durante el scraping</h1><p>{e}</p><a href='/'>Volver</a>"
-    finally:
-        if scraper:
-            scraper.close()
+    clave = ('imdb', busqueda.strip().lower(), cantidad, min_rating, max_rating, min_year, max_year)
+    trabajo, nuevo = cola_trabajos.enviar(clave, ejecutar_busqueda, busqueda, cantidad,
+                                          min_rating, max_rating, min_year, max_year, descripcion=busqueda)
+    if not nuevo:
+        print(f"🔗 Búsqueda '{busqueda}' unida al trabajo en curso {trabajo.id}")
+
+    if quiere_json(request):
+        respuesta = trabajo.a_dict()
+        respuesta['estado_url'] = url_for('estado_trabajo', id_trabajo=trabajo.id)
+        respuesta['resultado_url'] = url_for('resultado_trabajo', id_trabajo=trabajo.id)
+        return jsonify(respuesta), 202
+    return redirect(url_for('resultado_trabajo', id_trabajo=trabajo.id), code=303)
+
+
+def ejecutar_busqueda(busqueda, cantidad, min_rating, max_rating, min_year, max_year):
+    """Trabajo de la cola: responde desde la caché o hace el scraping con un navegador del pool."""
+    peliculas = peliculas_en_cache(busqueda, cantidad, min_rating, max_rating, min_year, max_year)
+    if peliculas is not None:
+        return peliculas
+    with pool_scrapers.scraper() as scraper:
+        return scraper.scrape_movies(busqueda, cantidad, min_rating, max_rating, min_year, max_year)
+
+
+def mostrar_resultado(trabajo):
+    if quiere_json(request):
+        return jsonify(trabajo.resultado)
+    return render_template_string(HTML_RESULTS_TEMPLATE, peliculas=trabajo.resultado, busqueda=trabajo.descripcion)
+
+
+registrar_rutas(app, cola_trabajos, mostrar_resultado)
 
 
 if __name__ == "__main__":
@@ -530,5 +548,7 @@ if __name__ == "__main__":
         url = "http://127.0.0.1:5000"
         print(f"Iniciando servidor web en {url}")
         print("Abre tu navegador y ve a esa dirección para usar la aplicación.")
+        # Los navegadores arrancan antes de la primera petición
+        pool_scrapers.precalentar()
         webbrowser.open_new(url)
-        app.run(debug=False, port=5000)
\ No newline at end of file
+        app.run(debug=False, port=5000, threaded=True)
\ No newline at end of file
@@ -0,0 +1,145 @@
+"""
+Inferencia por Lotes - predicción de los analizadores de pysentimiento en lotes agrupados por longitud
+Ejecutar: python inferencia_lotes.py  (prueba de tamaños de lote e hilos en esta CPU)
+Uso: from inferencia_lotes import InferenciaPorLotes
+"""
+
+import os
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+# Textos por llamada al modelo: acota la memoria y el relleno de cada lote
+TAMAÑO_LOTE_INFERENCIA = 32
+
+# Hilos de PyTorch en CPU (None: los que decida PyTorch)
+HILOS_INFERENCIA = None
+
+
+def configurar_hilos(hilos):
+    """Fija los hilos que usa PyTorch en CPU para todo el proceso."""
+    if hilos:
+        import torch
+        torch.set_num_threads(hilos)
+
+
+def longitudes_tokens(analizador, textos):
+    """Longitud en tokens de cada texto ya preprocesado, con el tokenizador del analizador si lo tiene."""
+    tokenizador = getattr(analizador, 'tokenizer', None)
+    if tokenizador is None:
+        return np.array([len(texto.split()) for texto in textos])
+    preprocesado = getattr(analizador, 'preprocessing_args', None)
+    if preprocesado is not None:
+        from pysentimiento.preprocessing import preprocess_tweet
+        textos = [preprocess_tweet(texto, **preprocesado) for texto in textos]
+    ids = tokenizador(list(textos), truncation=True)['input_ids']
+    return np.array([len(fila) for fila in ids])
+
+
+def lotes_por_longitud(longitudes, tamaño_lote):
+    """Índices de cada lote tras ordenar por longitud: en cada lote las longitudes son parecidas."""
+    orden = np.argsort(longitudes, kind='stable')
+    return [orden[inicio:inicio + tamaño_lote] for inicio in range(0, len(orden), tamaño_lote)]
+
+
+def relleno(longitudes, lotes):
+    """Fracción de posiciones de relleno (padding) si cada lote se rellena hasta su texto más largo."""
+    total = sum(int(longitudes[lote].max()) * len(lote) for lote in lotes if len(lote))
+    return 1 - int(np.sum(longitudes)) / total if total else 0.0
+
+
+class InferenciaPorLotes:
+    """Pasa textos a un analizador de pysentimiento en lotes de `tamaño_lote`.
+
+    Los textos se ordenan por longitud en tokens antes de partirlos en lotes, así
+    cada lote se rellena hasta una longitud parecida a la de todos sus textos; los
+    resultados se devuelven en el orden original. Si el analizador sabe tokenizar
+    por su cuenta (`AnalizadorCombinado`), cada texto se tokeniza una sola vez y
+    los lotes llegan ya tokenizados al modelo. Por modelo se acumulan textos,
+    lotes, segundos y relleno para `resumen` (tweets por segundo).
+    """
+
+    def __init__(self, tamaño_lote=TAMAÑO_LOTE_INFERENCIA, hilos=HILOS_INFERENCIA):
+        self.tamaño_lote = tamaño_lote
+        self.hilos = hilos
+        self._metricas = defaultdict(lambda: {'textos': 0, 'lotes': 0, 'segundos': 0.0,
+                                              'relleno': 0.0, 'relleno_sin_ordenar': 0.0})
+        self._lock = threading.Lock()
+        configurar_hilos(hilos)
+
+    def predecir(self, analizador, textos, nombre='modelo'):
+        """Como `analizador.predict(textos)`, pero por lotes agrupados por longitud."""
+        if not textos:
+            return []
+        inicio = time.perf_counter()
+        if hasattr(analizador, 'tokenizar'):
+            # Una sola tokenización: se ordena por los mismos input_ids que reciben los modelos
+            entradas = analizador.tokenizar(textos)
+            longitudes = np.array([analizador.longitud(entrada) for entrada in entradas])
+            predecir_lote = analizador.predecir_tokenizados
+        else:
+            entradas = textos
+            longitudes = longitudes_tokens(analizador, textos)
+            predecir_lote = analizador.predict
+        lotes = lotes_por_longitud(longitudes, self.tamaño_lote)
+        resultados = [None] * len(textos)
+        for lote in lotes:
+            for i, resultado in zip(lote.tolist(), predecir_lote([entradas[i] for i in lote])):
+                resultados[i] = resultado
+        segundos = time.perf_counter() - inicio
+
+        # Relleno que habría con lotes en el orden de llegada, para comparar
+        sin_ordenar = [np.arange(i, min(i + self.tamaño_lote, len(textos))) for i in range(0, len(textos), self.tamaño_lote)]
+        with self._lock:
+            datos = self._metricas[nombre]
+            datos['textos'] += len(textos)
+            datos['lotes'] += len(lotes)
+            datos['segundos'] += segundos
+            # Medias ponderadas por textos
+            datos['relleno'] += relleno(longitudes, lotes) * len(textos)
+            datos['relleno_sin_ordenar'] += relleno(longitudes, sin_ordenar) * len(textos)
+        return resultados
+
+    def a_dict(self):
+        with self._lock:
+            return {
+                nombre: {
+                    'textos': datos['textos'],
+                    'lotes': datos['lotes'],
+                    'segundos': datos['segundos'],
+                    'textos_por_segundo': datos['textos'] / datos['segundos'] if datos['segundos'] else 0.0,
+                    'relleno': datos['relleno'] / datos['textos'],
+                    'relleno_sin_ordenar': datos['relleno_sin_ordenar'] / datos['textos'],
+                }
+                for nombre, datos in self._metricas.items()
+            }
+
+    def resumen(self):
+        hilos = self.hilos or 'auto'
+        for nombre, datos in sorted(self.a_dict().items()):
+            print(f"[INFERENCIA] {nombre}: {datos['textos']} textos en {datos['lotes']} lotes de {self.tamaño_lote} "
+                  f"({hilos} hilos): {datos['segundos']:.1f}s, {datos['textos_por_segundo']:.1f} tweets/s, "
+                  f"relleno {datos['relleno']:.0%} (sin ordenar {datos['relleno_sin_ordenar']:.0%})")
+
+
+def main():
+    from pysentimiento import create_analyzer
+
+    analizador = create_analyzer(task="sentiment", lang="es")
+    base = ["Me encanta este día", "Qué desastre de servicio, no vuelvo nunca más a comprar aquí",
+            "Bueno", "No sé qué pensar del partido de ayer, el segundo tiempo fue muy raro pero al final ganamos",
+            "Horrible", "@usuario gracias por la información, muy útil #datos"]
+    textos = [f"{base[i % len(base)]} {i}" for i in range(512)]
+
+    print(f"Prueba con {len(textos)} textos en {os.cpu_count()} CPU(s)")
+    for hilos in sorted({1, os.cpu_count() or 1}):
+        for tamaño_lote in (8, 16, 32, 64):
+            inferencia = InferenciaPorLotes(tamaño_lote, hilos)
+            inferencia.predecir(analizador, textos, 'sentimiento')
+            inferencia.resumen()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Lectura de Corpus - lectores de archivos para los ejercicios de limpieza y sentimientos
+Uso: from lectura_corpus import CorpusTxt, iterar_bloques, extraer_frases_pdf, leer_con_cache
+Benchmark PDF: python lectura_corpus.py [archivo.pdf] [workers...]
+"""
+
+import codecs
+import hashlib
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+# Tamaño aproximado (en bytes) de cada bloque leído del archivo
+TAM_BLOQUE = 1 << 20
+
+# Número de frases por bloque cuando el corpus ya está en memoria
+FRASES_POR_BLOQUE = 5000
+
+
+def iterar_bloques_txt(nombre_archivo, tam_bloque=TAM_BLOQUE):
+    """Recorre un .txt mapeado en memoria y produce listas de frases (una por línea).
+
+    Cada bloque se corta en un salto de línea, así que ninguna frase queda partida.
+    La memoria usada es proporcional a `tam_bloque`, no al tamaño del archivo.
+    """
+    with open(nombre_archivo, 'rb') as archivo:
+        total = os.fstat(archivo.fileno()).st_size
+        if total == 0:
+            return
+
+        with mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            inicio = 0
+            while inicio < total:
+                fin = min(inicio + tam_bloque, total)
+                if fin < total:
+                    corte = mapa.rfind(b'\n', inicio, fin)
+                    if corte == -1:
+                        # Línea más larga que el bloque: se extiende hasta su final
+                        corte = mapa.find(b'\n', fin)
+                    fin = total if corte == -1 else corte + 1
+
+                # Mismos saltos de línea que `open(..., 'r')` (\n, \r\n y \r)
+                texto = mapa[inicio:fin].decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+                frases = [linea.strip() for linea in texto.split('\n') if linea.strip()]
+                if frases:
+                    yield frases
+                inicio = fin
+
+
+def comprobar_utf8(nombre_archivo, tam_bloque=TAM_BLOQUE):
+    """Decodifica el archivo entero en streaming; lanza `UnicodeDecodeError` si no es UTF-8.
+
+    `CorpusTxt` decodifica cada bloque al leerlo, así que sin esta comprobación un
+    archivo con otra codificación fallaría en mitad del análisis.
+    """
+    decodificador = codecs.getincrementaldecoder('utf-8')()
+    with open(nombre_archivo, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(tam_bloque), b''):
+            decodificador.decode(bloque)
+    decodificador.decode(b'', final=True)
+
+
+class CorpusTxt:
+    """Corpus .txt que se lee en streaming cada vez que se recorre.
+
+    Se comporta como la lista de frases que devolvía `leer_txt` (se puede iterar
+    varias veces y evaluar como booleano), pero nunca carga el archivo completo.
+    """
+
+    def __init__(self, nombre_archivo, tam_bloque=TAM_BLOQUE):
+        self.nombre_archivo = nombre_archivo
+        self.tam_bloque = tam_bloque
+
+    def bloques(self):
+        return iterar_bloques_txt(self.nombre_archivo, self.tam_bloque)
+
+    def __iter__(self):
+        for bloque in self.bloques():
+            yield from bloque
+
+    def __bool__(self):
+        return next(self.bloques(), None) is not None
+
+
+def iterar_bloques(corpus, frases_por_bloque=FRASES_POR_BLOQUE):
+    """Produce el corpus en bloques de frases, sea una lista o un `CorpusTxt`."""
+    if hasattr(corpus, 'bloques'):
+        yield from corpus.bloques()
+        return
+
+    for i in range(0, len(corpus), frases_por_bloque):
+        yield corpus[i:i + frases_por_bloque]
+
+
+# --- PDF ---
+
+def dividir_en_frases(texto):
+    """Divide un texto en frases usando puntos como delimitadores."""
+    return [frase.strip() for frase in texto.split('.') if frase.strip()]
+
+
+def contexto_procesos():
+    """Contexto de multiprocessing para los pools de este módulo.
+
+    Los scripts de los ejercicios ejecutan código (y piden datos con `input`) al
+    importarse, así que los workers no pueden arrancar con 'spawn', que vuelve a
+    importar el script principal. Solo se usa 'fork'; si no existe (Windows)
+    devuelve None y el llamador debe trabajar en serie.
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return None
+
+
+def _frases_paginas(lector_pdf, inicio, fin):
+    """Frases de las páginas [inicio, fin) de un `PdfReader` ya abierto."""
+    frases = []
+    for numero in range(inicio, fin):
+        texto = lector_pdf.pages[numero].extract_text()
+        if texto:
+            frases.extend(dividir_en_frases(texto))
+    return frases
+
+
+def _extraer_rango_pdf(nombre_archivo, inicio, fin):
+    """Worker: extrae las frases de las páginas [inicio, fin) de un PDF."""
+    import PyPDF2
+    with open(nombre_archivo, 'rb') as archivo:
+        return _frases_paginas(PyPDF2.PdfReader(archivo), inicio, fin)
+
+
+def extraer_frases_pdf(nombre_archivo, num_workers=1):
+    """Extrae las frases de un PDF, opcionalmente repartiendo las páginas entre procesos.
+
+    Con `num_workers > 1` las páginas se dividen en rangos contiguos que se
+    procesan en un pool de procesos; los resultados se unen en orden de página,
+    así que la salida es idéntica a la extracción en serie.
+    """
+    import PyPDF2
+    contexto = contexto_procesos()
+    with open(nombre_archivo, 'rb') as archivo:
+        lector_pdf = PyPDF2.PdfReader(archivo)
+        num_paginas = len(lector_pdf.pages)
+        if num_workers <= 1 or num_paginas < 2 or contexto is None:
+            # En serie se extrae del mismo lector, sin volver a abrir el PDF
+            return _frases_paginas(lector_pdf, 0, num_paginas)
+
+    # Varios rangos por worker para repartir mejor páginas de distinto coste
+    num_rangos = min(num_paginas, num_workers * 4)
+    limites = [num_paginas * i // num_rangos for i in range(num_rangos + 1)]
+
+    frases = []
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=contexto) as pool:
+        for frases_rango in pool.map(_extraer_rango_pdf, [nombre_archivo] * num_rangos,
+                                     limites[:-1], limites[1:]):
+            frases.extend(frases_rango)
+    return frases
+
+
+def benchmark_pdf(nombre_archivo, workers=(1, 2, 4)):
+    """Compara la extracción en serie con la extracción paralela sobre un PDF."""
+    print(f"\n[BENCHMARK] Extracción de '{nombre_archivo}' ({os.cpu_count()} CPUs)")
+    referencia = None
+    tiempo_serie = None
+    for num_workers in workers:
+        inicio = time.perf_counter()
+        frases = extraer_frases_pdf(nombre_archivo, num_workers=num_workers)
+        duracion = time.perf_counter() - inicio
+
+        if referencia is None:
+            referencia, tiempo_serie = frases, duracion
+        iguales = "✓" if frases == referencia else "✗ DIFERENTE"
+        print(f"  workers={num_workers:<3} {duracion:7.2f}s  "
+              f"x{tiempo_serie / duracion:4.2f}  {len(frases)} frases {iguales}")
+
+
+# --- CACHÉ DE EXTRACCIÓN (PDF / DOCX) ---
+
+CARPETA_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache_corpus')
+
+# Subir la versión de un extractor invalida todas sus entradas en caché
+VERSIONES_EXTRACTOR = {
+    'pdf': 1,
+    'docx': 1,
+}
+
+# Formato: MAGIC | comprimido (1 byte) | datos
+# datos: nº de frases (uint32) | longitud en bytes de cada frase (uint32[]) | UTF-8 concatenado
+_MAGIC_CACHE = b'FRS1'
+
+
+def hash_archivo(nombre_archivo, tam_bloque=TAM_BLOQUE):
+    """Calcula el SHA-256 del contenido de un archivo."""
+    sha = hashlib.sha256()
+    with open(nombre_archivo, 'rb') as archivo:
+        for trozo in iter(lambda: archivo.read(tam_bloque), b''):
+            sha.update(trozo)
+    return sha.hexdigest()
+
+
+def guardar_frases(ruta, frases, comprimir=False):
+    """Guarda una lista de frases en formato binario con prefijos de longitud."""
+    codificadas = [frase.encode('utf-8') for frase in frases]
+    longitudes = array('I', map(len, codificadas))
+    if sys.byteorder != 'little':
+        longitudes.byteswap()
+    datos = struct.pack('<I', len(codificadas)) + longitudes.tobytes() + b''.join(codificadas)
+    if comprimir:
+        datos = zlib.compress(datos)
+
+    # Escritura atómica: nunca queda una entrada a medio escribir
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, 'wb') as archivo:
+        archivo.write(_MAGIC_CACHE + bytes([comprimir]) + datos)
+    os.replace(temporal, ruta)
+
+
+def cargar_frases(ruta):
+    """Carga una lista de frases guardada con `guardar_frases`."""
+    with open(ruta, 'rb') as archivo:
+        contenido = archivo.read()
+    if contenido[:4] != _MAGIC_CACHE:
+        raise ValueError(f"Archivo de caché no válido: {ruta}")
+
+    datos = zlib.decompress(contenido[5:]) if contenido[4] else contenido[5:]
+    (num_frases,) = struct.unpack_from('<I', datos)
+    longitudes = array('I')
+    longitudes.frombytes(datos[4:4 + 4 * num_frases])
+    if sys.byteorder != 'little':
+        longitudes.byteswap()
+
+    texto = memoryview(datos)
+    posicion = 4 + 4 * num_frases
+    frases = []
+    for longitud in longitudes:
+        frases.append(str(texto[posicion:posicion + longitud], 'utf-8'))
+        posicion += longitud
+    if posicion != len(datos):
+        raise ValueError(f"Archivo de caché truncado: {ruta}")
+    return frases
+
+
+def leer_con_cache(nombre_archivo, tipo, extractor, comprimir=False, carpeta=CARPETA_CACHE):
+    """Devuelve las frases de `nombre_archivo`, usando la caché en disco si es posible.
+
+    La clave es el hash del contenido más la versión del extractor `tipo`, así que
+    renombrar el archivo no invalida la caché y modificarlo sí. Solo se guardan
+    extracciones no vacías (una lista vacía indica un error de lectura).
+    """
+    clave = f"{hash_archivo(nombre_archivo)}-{tipo}-v{VERSIONES_EXTRACTOR[tipo]}"
+    ruta = os.path.join(carpeta, clave + ('.frases.z' if comprimir else '.frases'))
+
+    if os.path.exists(ruta):
+        try:
+            frases = cargar_frases(ruta)
+            print(f"✓ Caché: {len(frases)} frases cargadas sin volver a extraer")
+            return frases
+        except (OSError, ValueError, zlib.error, struct.error, UnicodeDecodeError) as e:
+            print(f"⚠️  Caché inválida, se vuelve a extraer: {e}")
+
+    frases = extractor(nombre_archivo)
+    if frases:
+        try:
+            os.makedirs(carpeta, exist_ok=True)
+            guardar_frases(ruta, frases, comprimir)
+        except OSError as e:
+            print(f"⚠️  No se pudo guardar la caché: {e}")
+    return frases
+
+
+if __name__ == "__main__":
+    archivo_pdf = sys.argv[1] if len(sys.argv) > 1 else os.path.join('Corpus', '1984.pdf')
+    lista_workers = [int(x) for x in sys.argv[2:]] or [1, 2, 4, os.cpu_count() or 1]
+    benchmark_pdf(archivo_pdf, lista_workers)
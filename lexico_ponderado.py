@@ -0,0 +1,269 @@
+"""
+Léxico Ponderado - entradas con peso, frases de varias palabras y negación
+Uso: from lexico_ponderado import LexicoPonderado, PuntuadorPonderado
+"""
+
+from collections import deque
+
+import numpy as np
+
+from motor_frecuencias import TOKEN_RE
+from sentimiento_lexico import PuntuadorLexico, clasificar, recuento_por_aparicion
+
+# Palabras que invierten el sentimiento de lo que viene detrás. Las contracciones se
+# tokenizan en dos ("don't" -> "don", "t") y se reconocen como pareja, nunca por la "t"
+# suelta. "neither"/"nor" no niegan: "neither expensive nor cheap" suma sus dos palabras
+NEGADORES = frozenset({
+    "not", "no", "never", "without", "cannot", "nothing", "nobody", "none",
+    "don't", "doesn't", "didn't", "isn't", "aren't", "wasn't", "weren't", "can't", "couldn't",
+    "won't", "wouldn't", "shouldn't", "haven't", "hasn't", "hadn't", "ain't", "mustn't",
+})
+
+
+class LexicoPonderado:
+    """Léxico de sentimiento con pesos, frases y ámbitos de negación.
+
+    Las entradas se compilan en un autómata de Aho-Corasick sobre tokens, así que
+    buscar todas las entradas en una frase es lineal en el número de tokens, sin
+    importar cuántas frases tenga el léxico. Un negador invierte (por
+    `factor_negacion`) el peso de las entradas que empiezan en los
+    `alcance_negacion` tokens siguientes.
+    """
+
+    def __init__(self, entradas=None, negadores=NEGADORES, alcance_negacion=3, factor_negacion=-1.0):
+        self.entradas = {}  # tupla de tokens -> peso
+        # tupla de tokens del negador -> texto con el que se etiqueta ("don't")
+        self.negadores = {tuple(TOKEN_RE.findall(negador.lower())): negador for negador in negadores}
+        self._max_negador = max(map(len, self.negadores), default=0)
+        self.alcance_negacion = alcance_negacion
+        self.factor_negacion = factor_negacion
+        self._automata = None
+        for frase, peso in (entradas or {}).items():
+            self.agregar(frase, peso)
+
+    @classmethod
+    def desde_lexicos(cls, positive_lex, negative_lex, **opciones):
+        """Crea un léxico con peso +1 para las palabras positivas y -1 para las negativas."""
+        entradas = dict.fromkeys(negative_lex, -1.0)
+        entradas.update(dict.fromkeys(positive_lex, 1.0))
+        return cls(entradas, **opciones)
+
+    @classmethod
+    def desde_archivo(cls, ruta, **opciones):
+        """Carga un léxico con una entrada por línea: `frase<TAB>peso` (# para comentarios)."""
+        lexico = cls(**opciones)
+        with open(ruta, 'r', encoding='utf-8') as archivo:
+            for numero, linea in enumerate(archivo, 1):
+                linea = linea.strip()
+                if not linea or linea.startswith('#'):
+                    continue
+                try:
+                    frase, peso = linea.rsplit('\t', 1)
+                    lexico.agregar(frase, float(peso))
+                except ValueError:
+                    print(f"⚠️  Línea {numero} ignorada en '{ruta}': {linea[:60]}")
+        return lexico
+
+    def agregar(self, frase, peso):
+        tokens = tuple(TOKEN_RE.findall(frase.lower()))
+        if tokens:
+            self.entradas[tokens] = float(peso)
+            self._automata = None
+
+    def actualizar(self, otro):
+        """Añade (o sobrescribe) las entradas de otro `LexicoPonderado`."""
+        self.entradas.update(otro.entradas)
+        self._automata = None
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def compilar(self):
+        """Construye el autómata (trie de tokens + enlaces de fallo y de salida)."""
+        hijos = [{}]  # nodo -> {token: nodo}
+        salida = [None]  # nodo -> (longitud, peso) si una entrada termina aquí
+
+        for tokens, peso in self.entradas.items():
+            nodo = 0
+            for token in tokens:
+                siguiente = hijos[nodo].get(token)
+                if siguiente is None:
+                    siguiente = len(hijos)
+                    hijos[nodo][token] = siguiente
+                    hijos.append({})
+                    salida.append(None)
+                nodo = siguiente
+            salida[nodo] = (len(tokens), peso)
+
+        # Enlaces de fallo (sufijo propio más largo presente en el trie) por anchura
+        fallo = [0] * len(hijos)
+        enlace_salida = [0] * len(hijos)  # siguiente nodo con salida por la cadena de fallos
+        cola = deque(hijos[0].values())
+        while cola:
+            nodo = cola.popleft()
+            for token, hijo in hijos[nodo].items():
+                estado = fallo[nodo]
+                while estado and token not in hijos[estado]:
+                    estado = fallo[estado]
+                destino = hijos[estado].get(token, 0)
+                fallo[hijo] = destino
+                enlace_salida[hijo] = fallo[hijo] if salida[fallo[hijo]] else enlace_salida[fallo[hijo]]
+                cola.append(hijo)
+
+        self._automata = (hijos, fallo, salida, enlace_salida)
+        return self
+
+    def buscar(self, tokens):
+        """Busca las entradas del léxico en una lista de tokens.
+
+        Devuelve una lista de `(inicio, fin, peso, negador)` sin solapamientos,
+        eligiendo de izquierda a derecha la entrada más larga. `peso` ya incluye la
+        negación y `negador` es el token que la provocó (o None).
+        """
+        if self._automata is None:
+            self.compilar()
+        hijos, fallo, salida, enlace_salida = self._automata
+
+        # Entrada más larga que empieza en cada posición
+        mejor = {}
+        estado = 0
+        for i, token in enumerate(tokens):
+            while estado and token not in hijos[estado]:
+                estado = fallo[estado]
+            estado = hijos[estado].get(token, 0)
+
+            nodo = estado if salida[estado] else enlace_salida[estado]
+            while nodo:
+                longitud, peso = salida[nodo]
+                inicio = i - longitud + 1
+                if longitud > mejor.get(inicio, (0,))[0]:
+                    mejor[inicio] = (longitud, peso)
+                nodo = enlace_salida[nodo]
+
+        if not mejor:
+            return []
+
+        coincidencias = []
+        negador = None
+        restantes = 0  # tokens que quedan dentro del ámbito de negación
+        i = 0
+        while i < len(tokens):
+            if i in mejor:
+                longitud, peso = mejor[i]
+                if restantes > 0:
+                    coincidencias.append((i, i + longitud, peso * self.factor_negacion, negador))
+                else:
+                    coincidencias.append((i, i + longitud, peso, None))
+                restantes -= longitud
+                i += longitud
+                continue
+
+            negacion = self._negador_en(tokens, i)
+            if negacion:
+                negador, longitud = negacion
+                restantes = self.alcance_negacion
+                i += longitud
+                continue
+
+            restantes -= 1
+            i += 1
+        return coincidencias
+
+    def _negador_en(self, tokens, i):
+        """`(texto, longitud)` del negador más largo que empieza en `tokens[i]`, o None."""
+        for longitud in range(self._max_negador, 0, -1):
+            negador = self.negadores.get(tuple(tokens[i:i + longitud]))
+            if negador is not None:
+                return negador, longitud
+        return None
+
+    def disparadores(self):
+        """Tokens que obligan a recorrer la frase con el autómata: inicios de frases y de negadores."""
+        return ({tokens[0] for tokens in self.entradas if len(tokens) > 1}
+                | {tokens[0] for tokens in self.negadores})
+
+
+class PuntuadorPonderado(PuntuadorLexico):
+    """Puntúa bloques de frases con un `LexicoPonderado`.
+
+    Las entradas de una sola palabra se compilan en el vocabulario de
+    `PuntuadorLexico`, con su peso, y el bloque se tokeniza de una vez como allí.
+    Solo las frases que contienen un disparador (un negador o el inicio de una
+    entrada de varias palabras) se recorren con el autómata; el resto se puntúa
+    con las reducciones de NumPy. Las entradas de una palabra que son stopwords no
+    puntúan; los negadores se detectan sobre el texto completo, porque "not" y
+    similares suelen ser stopwords.
+    """
+
+    def __init__(self, lexico, stopwords=()):
+        self.lexico = lexico.compilar()
+        self.stopwords = frozenset(stopwords)
+        pesos = {tokens[0]: peso for tokens, peso in lexico.entradas.items()
+                 if len(tokens) == 1 and tokens[0] not in self.stopwords and peso}
+        disparadores = lexico.disparadores()
+        palabras = sorted(set(pesos) | disparadores)
+        self._iniciar_vocabulario(palabras)
+        self.pesos = np.array([pesos.get(palabra, 0.0) for palabra in palabras], dtype=np.float64)
+        self.es_disparador = np.array([palabra in disparadores for palabra in palabras], dtype=bool)
+
+    def _coincidencias(self, frase):
+        """Textos y pesos de las entradas de una frase, recorriéndola con el autómata."""
+        tokens = TOKEN_RE.findall(frase.lower())
+        for inicio, fin, peso, negador in self.lexico.buscar(tokens):
+            if fin - inicio == 1 and tokens[inicio] in self.stopwords:
+                continue
+            texto = ' '.join(tokens[inicio:fin])
+            yield (f"{negador} {texto}" if negador else texto), peso
+
+    def analizar_bloque(self, frases):
+        num_frases = len(frases)
+        filas, ids = self.ids_bloque(frases)
+
+        # Frases con disparador: el autómata; el resto, directamente desde los ids
+        lenta = np.zeros(num_frases, dtype=bool)
+        lenta[filas[self.es_disparador[ids]]] = True
+        directas = ~lenta[filas] & (self.pesos[ids] != 0)
+        filas_directas, ids_directos = filas[directas], ids[directas]
+
+        textos = list(self.palabras)  # id -> texto; las frases y negaciones se añaden detrás
+        extra = {}
+        filas_lentas, ids_lentos, pesos_lentos = [], [], []
+        for fila in np.flatnonzero(lenta).tolist():
+            for texto, peso in self._coincidencias(frases[fila]):
+                id_texto = self.vocabulario.get(texto)
+                if id_texto is None:
+                    id_texto = extra.setdefault(texto, len(textos) + len(extra))
+                filas_lentas.append(fila)
+                ids_lentos.append(id_texto)
+                pesos_lentos.append(peso)
+        textos.extend(extra)
+
+        # Cada frase está entera en un grupo, así que ordenar por fila (estable) conserva
+        # el orden de las palabras dentro de cada frase
+        filas = np.concatenate([filas_directas, np.array(filas_lentas, dtype=np.int64)])
+        orden = np.argsort(filas, kind='stable')
+        filas = filas[orden]
+        ids = np.concatenate([ids_directos, np.array(ids_lentos, dtype=np.int64)])[orden]
+        pesos = np.concatenate([self.pesos[ids_directos], np.array(pesos_lentos, dtype=np.float64)])[orden]
+        puntuaciones = np.bincount(filas, weights=pesos, minlength=num_frases)
+
+        limites = np.searchsorted(filas, np.arange(num_frases + 1)).tolist()
+        ids_lista = ids.tolist()
+        pesos_lista = pesos.tolist()
+        resultados = []
+        for fila, (frase, puntuacion) in enumerate(zip(frases, puntuaciones.tolist())):
+            puntuacion = round(float(puntuacion), 3)
+            if puntuacion.is_integer():
+                puntuacion = int(puntuacion)
+            rango = range(limites[fila], limites[fila + 1])
+            resultados.append({
+                "text": frase,
+                "score": puntuacion,
+                "classification": clasificar(puntuacion),
+                "positive_words": [textos[ids_lista[k]] for k in rango if pesos_lista[k] > 0],
+                "negative_words": [textos[ids_lista[k]] for k in rango if pesos_lista[k] < 0],
+            })
+
+        return (resultados,
+                recuento_por_aparicion(ids[pesos > 0], textos),
+                recuento_por_aparicion(ids[pesos < 0], textos))
@@ -0,0 +1,147 @@
+"""
+Motor de Frecuencias - tokeniza el corpus una sola vez
+Uso: from motor_frecuencias import MotorFrecuencias
+"""
+
+import re
+from array import array
+from collections import Counter
+
+# Misma expresión regular que usan los ejercicios (`procesar_y_contar`)
+TOKEN_RE = re.compile(r'\b\w+\b')
+
+
+class MotorFrecuencias:
+    """Tokeniza el corpus una vez y deriva los conteos sin volver a tocar el texto.
+
+    Guarda el corpus como un array compacto de ids de token más un vocabulario.
+    El conteo base se calcula una sola vez; los conteos con limpieza se obtienen
+    quitando las stopwords de ese conteo base.
+    """
+
+    def __init__(self, frases=None, guardar_ids=True):
+        self.vocabulario = {}  # palabra -> id (ids asignados por orden de aparición)
+        # Con guardar_ids=False solo se guardan los conteos: la memoria depende del
+        # vocabulario y no del tamaño del corpus (útil al leer en streaming)
+        self.guardar_ids = guardar_ids
+        self.ids = array('I')  # tokens del corpus, en orden
+        self.inicio_frases = array('L', [0])  # offset de cada frase dentro de `ids`
+        self._conteo = Counter()  # palabra -> frecuencia, en orden de primera aparición
+        if frases is not None:
+            self.alimentar(frases)
+
+    def alimentar(self, frases):
+        """Añade frases al motor, tokenizando cada una exactamente una vez."""
+        conteo = self._conteo
+        vocabulario = self.vocabulario
+        nuevo_id = vocabulario.setdefault
+        ids = self.ids
+        inicio_frases = self.inicio_frases
+        guardar_ids = self.guardar_ids
+
+        for frase in frases:
+            tokens = TOKEN_RE.findall(frase.lower())
+            conteo.update(tokens)
+            if guardar_ids:
+                ids.extend([nuevo_id(token, len(vocabulario)) for token in tokens])
+                inicio_frases.append(len(ids))
+        return self
+
+    @property
+    def palabras(self):
+        """Lista id -> palabra."""
+        return list(self.vocabulario)
+
+    @property
+    def num_frases(self):
+        return len(self.inicio_frases) - 1
+
+    def ids_frase(self, indice):
+        """Devuelve los ids de token de la frase `indice` (requiere guardar_ids=True)."""
+        if not self.guardar_ids:
+            raise ValueError("El motor se creó con guardar_ids=False; no conserva los tokens por frase")
+        return self.ids[self.inicio_frases[indice]:self.inicio_frases[indice + 1]]
+
+    def conteo_base(self):
+        """Conteo de todas las palabras del corpus, sin limpieza."""
+        return self._conteo
+
+    def contar(self, stopwords=None):
+        """Equivalente a `procesar_y_contar(' '.join(corpus), stopwords)` sin re-tokenizar."""
+        conteo = Counter(self._conteo)
+        if stopwords:
+            # Solo las stopwords que aparecen en el vocabulario cuestan algo
+            for palabra in self._conteo.keys() & set(stopwords):
+                del conteo[palabra]
+        return conteo
+
+
+class SesionRefinamiento:
+    """Sesión de refinamiento interactivo de stopwords.
+
+    Mantiene el conteo limpio y el top-N actuales. Agregar stopwords solo quita
+    esas claves del conteo, así que el coste depende del número de palabras
+    agregadas y no del tamaño del corpus. Cada agregado se puede deshacer.
+    """
+
+    def __init__(self, conteo_limpio, stopwords, top_n):
+        self.conteo = Counter(conteo_limpio)
+        self.stopwords = set(stopwords)
+        self.top_n = top_n
+        # Ranking completo calculado una sola vez; mismo orden que `most_common`
+        self._ranking = self.conteo.most_common()
+        self._posicion = {palabra: i for i, (palabra, _) in enumerate(self._ranking)}
+        self._top = self._ranking[:top_n]
+        self._fin_top = len(self._top)  # el top son las primeras entradas vivas de _ranking[:_fin_top]
+        self._historial = []  # pila de (stopwords nuevas, {palabra: frecuencia quitada})
+
+    def top(self):
+        """Devuelve el top-N actual como lista de (palabra, frecuencia)."""
+        return list(self._top)
+
+    def agregar(self, palabras):
+        """Agrega stopwords y actualiza el conteo y el top-N por diferencia."""
+        nuevas = set(palabras) - self.stopwords
+        if not nuevas:
+            return set()
+
+        self.stopwords |= nuevas
+        quitadas = {palabra: self.conteo.pop(palabra) for palabra in nuevas if palabra in self.conteo}
+        self._historial.append((nuevas, quitadas))
+
+        if any(palabra in quitadas for palabra, _ in self._top):
+            self._actualizar_top([entrada for entrada in self._top if entrada[0] not in quitadas])
+        return nuevas
+
+    def deshacer(self):
+        """Deshace el último agregado. Devuelve las stopwords retiradas (vacío si no hay nada)."""
+        if not self._historial:
+            return set()
+
+        nuevas, quitadas = self._historial.pop()
+        self.stopwords -= nuevas
+        for palabra, frecuencia in quitadas.items():
+            self.conteo[palabra] = frecuencia
+
+        # Solo las palabras restauradas dentro del tramo ya recorrido pueden volver al top
+        restauradas = [(palabra, frecuencia) for palabra, frecuencia in quitadas.items()
+                       if self._posicion[palabra] < self._fin_top]
+        if restauradas:
+            self._actualizar_top(self._top + restauradas)
+        return nuevas
+
+    def _actualizar_top(self, candidatos):
+        """Reordena los candidatos y completa el top avanzando por el ranking."""
+        top = sorted(candidatos, key=lambda entrada: self._posicion[entrada[0]])
+        if len(top) >= self.top_n:
+            top = top[:self.top_n]
+            self._fin_top = self._posicion[top[-1][0]] + 1 if top else 0
+        else:
+            i = self._fin_top
+            while len(top) < self.top_n and i < len(self._ranking):
+                palabra, frecuencia = self._ranking[i]
+                if palabra in self.conteo:
+                    top.append((palabra, frecuencia))
+                i += 1
+            self._fin_top = i
+        self._top = top
@@ -0,0 +1,77 @@
+"""
+Motor de Similitud - matriz de similitud de Jaccard con matrices dispersas
+Uso: from motor_similitud import matriz_similitud_jaccard
+"""
+
+import numpy as np
+from scipy import sparse
+
+# Filas de la matriz documento-término que se multiplican en cada paso
+FILAS_POR_BLOQUE = 2000
+
+
+def matriz_documento_termino(conjuntos):
+    """Construye la matriz binaria dispersa (documentos x términos) de una lista de conjuntos."""
+    vocabulario = {}
+    indices = []
+    indptr = [0]
+    for conjunto in conjuntos:
+        indices.extend(vocabulario.setdefault(palabra, len(vocabulario)) for palabra in conjunto)
+        indptr.append(len(indices))
+
+    datos = np.ones(len(indices), dtype=np.int32)
+    return sparse.csr_matrix((datos, np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+                             shape=(len(conjuntos), len(vocabulario)))
+
+
+def matriz_similitud_jaccard(conjuntos, densa=True, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Similitud de Jaccard entre todos los pares de conjuntos.
+
+    Las intersecciones salen del producto disperso X·Xᵀ de la matriz
+    documento-término; las uniones, de los tamaños de fila
+    (|A ∪ B| = |A| + |B| - |A ∩ B|). Solo se calcula el triángulo superior, por
+    bloques de filas, y los pares sin palabras en común nunca se materializan.
+
+    Con `densa=True` devuelve la matriz simétrica completa (np.ndarray). Con
+    `densa=False` devuelve el triángulo superior, diagonal incluida, como matriz
+    dispersa CSR; es la opción para decenas de miles de frases.
+    """
+    n = len(conjuntos)
+    X = matriz_documento_termino(conjuntos)
+    XT = X.T.tocsr()
+    tamaños = np.diff(X.indptr)
+
+    filas, columnas, valores = [], [], []
+    for inicio in range(0, n, filas_por_bloque):
+        fin = min(inicio + filas_por_bloque, n)
+        # Solo las columnas desde `inicio`: el resto pertenece al triángulo inferior
+        interseccion = (X[inicio:fin] @ XT[:, inicio:]).tocoo()
+        fila = interseccion.row + inicio
+        columna = interseccion.col + inicio
+        superior = columna > fila
+        fila, columna, comunes = fila[superior], columna[superior], interseccion.data[superior]
+
+        filas.append(fila)
+        columnas.append(columna)
+        valores.append(comunes / (tamaños[fila] + tamaños[columna] - comunes))
+
+    # Dos conjuntos vacíos se consideran idénticos (igual que `jaccard_similarity`)
+    vacios = np.flatnonzero(tamaños == 0)
+    if len(vacios) > 1:
+        fila, columna = np.triu_indices(len(vacios), k=1)
+        filas.append(vacios[fila])
+        columnas.append(vacios[columna])
+        valores.append(np.ones(len(fila)))
+
+    # La diagonal siempre es 1.0: cada frase es idéntica a sí misma
+    filas.append(np.arange(n))
+    columnas.append(np.arange(n))
+    valores.append(np.ones(n))
+
+    superior = sparse.csr_matrix((np.concatenate(valores), (np.concatenate(filas), np.concatenate(columnas))),
+                                 shape=(n, n))
+    if not densa:
+        return superior
+
+    matriz = superior.toarray()
+    return matriz + np.triu(matriz, k=1).T
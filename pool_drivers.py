@@ -0,0 +1,139 @@
+"""
+Pool de Drivers - scrapers Selenium precalentados y reutilizables para los endpoints Flask
+Uso: from pool_drivers import PoolScrapers, PoolAgotadoError, ruta_chromedriver
+"""
+
+import atexit
+import functools
+import queue
+import threading
+from contextlib import contextmanager
+
+# Configuración por defecto del pool
+TAMAÑO_POOL = 2
+MAX_USOS = 20
+TIMEOUT_ESPERA = 60
+
+
+class PoolAgotadoError(TimeoutError):
+    """No quedó ningún scraper libre dentro del tiempo de espera."""
+
+
+@functools.lru_cache(maxsize=None)
+def ruta_chromedriver():
+    """Ruta de chromedriver, resuelta (y descargada si hace falta) una sola vez por proceso."""
+    from webdriver_manager.chrome import ChromeDriverManager
+    return ChromeDriverManager().install()
+
+
+class PoolScrapers:
+    """Pool acotado de scrapers Selenium ya arrancados.
+
+    `fabrica()` crea un scraper con un atributo `driver` y los métodos `reiniciar()`
+    (borra los resultados de la petición anterior) y `close()`. Como mucho hay
+    `tamaño` navegadores vivos. Cada petición saca uno con `with pool.scraper() as s`.
+    Si están todos ocupados espera hasta `timeout` segundos y después lanza
+    `PoolAgotadoError`.
+
+    Al sacar un scraper se comprueba que su navegador responde. Tras `max_usos`
+    usos, o si falló durante una petición, se cierra y se crea otro.
+    """
+
+    def __init__(self, fabrica, tamaño=TAMAÑO_POOL, max_usos=MAX_USOS, timeout=TIMEOUT_ESPERA):
+        self.fabrica = fabrica
+        self.tamaño = tamaño
+        self.max_usos = max_usos
+        self.timeout = timeout
+        self._plazas = threading.BoundedSemaphore(tamaño)  # scrapers en uso
+        self._libres = queue.LifoQueue()  # LIFO: se reutiliza el último usado
+        self._usos = {}
+        self._lock = threading.Lock()
+        atexit.register(self.cerrar)
+
+    def precalentar(self, cantidad=None):
+        """Arranca por adelantado `cantidad` navegadores (por defecto, el tamaño del pool)."""
+        cantidad = self.tamaño if cantidad is None else min(cantidad, self.tamaño)
+        for _ in range(cantidad - self._libres.qsize()):
+            self._libres.put(self._crear())
+        print(f"✅ Pool de navegadores listo: {self._libres.qsize()} precalentados")
+
+    @contextmanager
+    def scraper(self):
+        if not self._plazas.acquire(timeout=self.timeout):
+            raise PoolAgotadoError(f"Los {self.tamaño} navegadores siguen ocupados tras {self.timeout}s")
+        try:
+            scraper = self._sacar()
+            try:
+                yield scraper
+            except Exception:
+                self._descartar(scraper)
+                raise
+            self._devolver(scraper)
+        finally:
+            self._plazas.release()
+
+    def _crear(self):
+        scraper = self.fabrica()
+        with self._lock:
+            self._usos[id(scraper)] = 0
+        return scraper
+
+    def _sacar(self):
+        """Saca un scraper libre que responda, o crea uno nuevo."""
+        while True:
+            try:
+                scraper = self._libres.get_nowait()
+            except queue.Empty:
+                scraper = self._crear()
+                break
+            if self._responde(scraper):
+                break
+            print("⚠️  Navegador del pool sin respuesta, se sustituye")
+            self._descartar(scraper)
+
+        try:
+            scraper.reiniciar()
+        except Exception:
+            # Se cierra su navegador y se deja uno nuevo en su lugar para que el pool no encoja
+            self._descartar(scraper)
+            try:
+                self._libres.put(self._crear())
+            except Exception as e:
+                print(f"⚠️  No se pudo sustituir el navegador del pool: {e}")
+            raise
+        with self._lock:
+            self._usos[id(scraper)] += 1
+        return scraper
+
+    def _devolver(self, scraper):
+        with self._lock:
+            agotado = self._usos[id(scraper)] >= self.max_usos
+        if agotado:
+            print(f"🔄 Navegador reciclado tras {self.max_usos} usos")
+            self._descartar(scraper)
+        else:
+            self._libres.put(scraper)
+
+    def _descartar(self, scraper):
+        with self._lock:
+            self._usos.pop(id(scraper), None)
+        try:
+            scraper.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _responde(scraper):
+        try:
+            scraper.driver.window_handles
+            return True
+        except Exception:
+            return False
+
+    def cerrar(self):
+        """Cierra los navegadores libres (se llama también al salir del programa)."""
+        while True:
+            try:
+                self._descartar(self._libres.get_nowait())
+            except queue.Empty:
+                break
@@ -0,0 +1,145 @@
+"""
+Registro de Modelos - analizadores de pysentimiento compartidos en el proceso y análisis combinado
+Ejecutar: python registro_modelos.py  (compara el análisis combinado con dos pasadas independientes)
+Uso: from registro_modelos import obtener_analizador, analizador_combinado
+"""
+
+import threading
+import time
+
+_analizadores = {}
+_combinados = {}
+_lock = threading.Lock()
+
+
+def obtener_analizador(tarea, lang="es"):
+    """Devuelve el analizador de pysentimiento de `tarea`, cargándolo solo la primera vez en el proceso."""
+    with _lock:
+        clave = (tarea, lang)
+        if clave not in _analizadores:
+            from pysentimiento import create_analyzer
+            _analizadores[clave] = create_analyzer(task=tarea, lang=lang)
+        return _analizadores[clave]
+
+
+def _compatibles(a, b):
+    """True si dos analizadores preprocesan y tokenizan igual (y pueden compartir la tokenización)."""
+    return (a.preprocessing_args == b.preprocessing_args
+            and a.tokenizer.model_max_length == b.tokenizer.model_max_length
+            and a.tokenizer.get_vocab() == b.tokenizer.get_vocab())
+
+
+class AnalizadorCombinado:
+    """Varios analizadores de clasificación sobre los mismos textos con una sola tokenización.
+
+    Cada texto se preprocesa y se tokeniza una vez, y el lote de tensores resultante
+    se pasa a cada modelo, sin el `Dataset` ni el `Trainer` que monta `predict` en
+    cada llamada. Los modelos no comparten pesos (cada uno tiene su codificador
+    ajustado), así que sigue habiendo una pasada por modelo. Los analizadores con
+    otro tokenizador forman su propio grupo.
+
+    `predict(textos)` devuelve, por texto, un dict `{nombre: AnalyzerOutput}`.
+    `InferenciaPorLotes` usa en su lugar `tokenizar`, `longitud` y
+    `predecir_tokenizados`: tokeniza todos los textos una vez, ordena los lotes por
+    esos mismos input_ids y pasa a los modelos los lotes ya tokenizados.
+    """
+
+    def __init__(self, **analizadores):
+        self.analizadores = analizadores
+        self._grupos = []
+        for nombre, analizador in analizadores.items():
+            analizador.model.eval()
+            for grupo in self._grupos:
+                if _compatibles(grupo[0][1], analizador):
+                    grupo.append((nombre, analizador))
+                    break
+            else:
+                self._grupos.append([(nombre, analizador)])
+
+    def tokenizar(self, textos):
+        """Preprocesa y tokeniza cada texto una vez por grupo, sin relleno.
+
+        Devuelve, por texto, una tupla con `(frase preprocesada, input_ids)` de cada grupo.
+        """
+        from pysentimiento.preprocessing import preprocess_tweet
+
+        por_grupo = []
+        for grupo in self._grupos:
+            primero = grupo[0][1]
+            frases = [preprocess_tweet(texto, **primero.preprocessing_args) for texto in textos]
+            ids = primero.tokenizer(frases, truncation=True, max_length=primero.tokenizer.model_max_length)['input_ids']
+            por_grupo.append(list(zip(frases, ids)))
+        return list(zip(*por_grupo))
+
+    @staticmethod
+    def longitud(tokenizado):
+        """Tokens de un texto tokenizado: los de su grupo más largo, que es lo que se rellena."""
+        return max(len(ids) for _, ids in tokenizado)
+
+    def predecir_tokenizados(self, tokenizados):
+        """Como `predict`, pero sobre la salida de `tokenizar` (solo se rellena hasta el más largo del lote)."""
+        import torch
+
+        resultados = [{} for _ in tokenizados]
+        for indice, grupo in enumerate(self._grupos):
+            tokenizador = grupo[0][1].tokenizer
+            frases = [tokenizado[indice][0] for tokenizado in tokenizados]
+            lote = tokenizador.pad({'input_ids': [tokenizado[indice][1] for tokenizado in tokenizados]},
+                                   padding='longest', return_tensors='pt')
+            entradas = {clave: lote[clave] for clave in ('input_ids', 'attention_mask')}
+            with torch.inference_mode():
+                for nombre, analizador in grupo:
+                    dispositivo = analizador.model.device
+                    logits = analizador.model(**{k: v.to(dispositivo) for k, v in entradas.items()}).logits
+                    for resultado, frase, fila in zip(resultados, frases, logits):
+                        resultado[nombre] = analizador._get_output(frase, fila.view(1, -1))
+        return resultados
+
+    def predict(self, textos):
+        return self.predecir_tokenizados(self.tokenizar(textos))
+
+
+def analizador_combinado(**analizadores):
+    """Devuelve el `AnalizadorCombinado` de esos analizadores, creado una sola vez en el proceso."""
+    clave = tuple((nombre, id(analizador)) for nombre, analizador in analizadores.items())
+    with _lock:
+        if clave not in _combinados:
+            _combinados[clave] = AnalizadorCombinado(**analizadores)
+        return _combinados[clave]
+
+
+def main():
+    from inferencia_lotes import InferenciaPorLotes
+
+    sentimiento = obtener_analizador("sentiment")
+    emocion = obtener_analizador("emotion")
+    combinado = analizador_combinado(sentimiento=sentimiento, emocion=emocion)
+    print(f"Grupos de tokenización: {[[nombre for nombre, _ in grupo] for grupo in combinado._grupos]}")
+
+    base = ["Me encanta este día", "Qué desastre de servicio, no vuelvo nunca más a comprar aquí",
+            "Bueno", "No sé qué pensar del partido de ayer, el segundo tiempo fue muy raro pero al final ganamos",
+            "Horrible", "@usuario gracias por la información, muy útil #datos https://t.co/abc"]
+    textos = [f"{base[i % len(base)]} {i}" for i in range(512)]
+    inferencia = InferenciaPorLotes()
+    inferencia.predecir(combinado, textos[:32])  # calentamiento
+
+    inicio = time.perf_counter()
+    sent = inferencia.predecir(sentimiento, textos, 'sentimiento')
+    emo = inferencia.predecir(emocion, textos, 'emocion')
+    separadas = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    juntas = inferencia.predecir(combinado, textos, 'combinado')
+    combinadas = time.perf_counter() - inicio
+
+    diferencia = max(abs(r[nombre].probas[etiqueta] - otro.probas[etiqueta])
+                     for r, s, e in zip(juntas, sent, emo)
+                     for nombre, otro in (('sentimiento', s), ('emocion', e))
+                     for etiqueta in otro.probas)
+    print(f"{len(textos)} textos | dos pasadas independientes: {separadas:.1f}s | "
+          f"combinado: {combinadas:.1f}s ({separadas / combinadas:.2f}x) | "
+          f"máxima diferencia de probabilidad: {diferencia:.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Registro de Stopwords - stopwords profesionales con caché en disco
+Uso: from registro_stopwords import cargar_stopwords_profesionales
+"""
+
+import os
+
+from lectura_corpus import CARPETA_CACHE
+
+RUTA_CACHE_STOPWORDS = os.path.join(CARPETA_CACHE, 'stopwords_en.txt')
+
+# Subir la versión invalida la caché (p. ej. si cambian las fuentes)
+VERSION_STOPWORDS = 1
+FUENTES = ('nltk', 'spacy', 'sklearn')
+
+_stopwords_memoria = None
+
+
+def _cabecera():
+    return f"# stopwords v{VERSION_STOPWORDS} {','.join(FUENTES)}"
+
+
+def _leer_cache(ruta):
+    """Lee la caché de stopwords; devuelve None si no existe o no es de esta versión."""
+    try:
+        with open(ruta, 'r', encoding='utf-8') as archivo:
+            if archivo.readline().rstrip('\n') != _cabecera():
+                return None
+            return frozenset(linea.rstrip('\n') for linea in archivo if linea.strip())
+    except OSError:
+        return None
+
+
+def _escribir_cache(ruta, stopwords):
+    try:
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            archivo.write(_cabecera() + '\n')
+            archivo.write('\n'.join(sorted(stopwords)) + '\n')
+        os.replace(temporal, ruta)
+    except OSError as e:
+        print(f"⚠️  No se pudo guardar la caché de stopwords: {e}")
+
+
+def _cargar_desde_librerias():
+    """Carga stopwords combinando NLTK, spaCy y Scikit-learn.
+
+    Devuelve el conjunto y las fuentes que se pudieron cargar.
+    """
+    stopwords_set = set()
+    cargadas = []
+
+    # 1. NLTK (179 palabras)
+    try:
+        from nltk.corpus import stopwords
+        # Descargar stopwords si no están disponibles
+        try:
+            stopwords.words('english')
+        except LookupError:
+            print("Descargando stopwords de NLTK...")
+            import nltk
+            nltk.download('stopwords', quiet=True)
+
+        stopwords_set.update(stopwords.words('english'))
+        cargadas.append('nltk')
+        print("✓ NLTK: 179 stopwords cargadas")
+    except (ImportError, LookupError):
+        print("✗ NLTK no disponible")
+
+    # 2. spaCy (326 palabras) - la lista es estática, no hace falta cargar en_core_web_sm
+    try:
+        from spacy.lang.en.stop_words import STOP_WORDS
+        stopwords_set.update(STOP_WORDS)
+        cargadas.append('spacy')
+        print("✓ spaCy: 326 stopwords cargadas")
+    except ImportError:
+        print("✗ spaCy no disponible")
+
+    # 3. Scikit-learn (318 palabras)
+    try:
+        from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+        stopwords_set.update(ENGLISH_STOP_WORDS)
+        cargadas.append('sklearn')
+        print("✓ Scikit-learn: 318 stopwords cargadas")
+    except ImportError:
+        print("✗ Scikit-learn no disponible")
+
+    return stopwords_set, cargadas
+
+
+def cargar_stopwords_profesionales(ruta_cache=RUTA_CACHE_STOPWORDS):
+    """Devuelve el frozenset de stopwords profesionales (NLTK + spaCy + Scikit-learn).
+
+    La primera ejecución importa las librerías y guarda el resultado en disco; las
+    siguientes leen la caché sin importar nada. Solo se guarda en caché cuando las
+    tres fuentes están disponibles, para no congelar una lista incompleta.
+    """
+    global _stopwords_memoria
+    if _stopwords_memoria is not None:
+        return _stopwords_memoria
+
+    stopwords = _leer_cache(ruta_cache)
+    if stopwords is not None:
+        print(f"✓ Stopwords cargadas desde caché ({len(stopwords)} palabras)")
+    else:
+        stopwords_set, cargadas = _cargar_desde_librerias()
+        stopwords = frozenset(stopwords_set)
+        if tuple(cargadas) == FUENTES:
+            _escribir_cache(ruta_cache, stopwords)
+
+    print(f"🎯 Total stopwords únicas: {len(stopwords)}")
+    _stopwords_memoria = stopwords
+    return stopwords
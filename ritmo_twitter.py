@@ -0,0 +1,128 @@
+"""
+Ritmo Twitter - cliente de la API v2 que se regula con las cabeceras de límite de peticiones
+Uso: from ritmo_twitter import ClienteTwitter
+"""
+
+import re
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+import tweepy
+
+from esperas import metricas_esperas
+
+URL_API = "https://api.twitter.com"
+
+# Identificadores de usuario, tweet, lista... dentro de la ruta (no cambian el endpoint);
+# el primer segmento es la versión de la API (/2) y se conserva
+_ID_EN_RUTA = re.compile(r'(?<!^)/\d+(?=/|$)')
+
+
+class RitmoLimites:
+    """Lleva la cuenta de la cuota de la ventana de límite y dice cuánto esperar.
+
+    Se alimenta con las cabeceras `x-rate-limit-remaining` y `x-rate-limit-reset`
+    de cada respuesta. Mientras quedan más de `reserva` peticiones no se espera
+    nada; al agotarse, se espera justo hasta que la ventana se reinicia (en lugar
+    de lanzar la petición, recibir un 429 y esperar entonces).
+    """
+
+    def __init__(self, reserva=0, reloj=time.time, dormir=time.sleep):
+        self.reserva = reserva
+        self.reloj = reloj
+        self.dormir = dormir
+        self.limite = None
+        self.restantes = None
+        self.reinicio = None  # segundos epoch
+        self.esperado = 0.0
+        self._lock = threading.Lock()
+
+    def actualizar(self, cabeceras):
+        with self._lock:
+            if 'x-rate-limit-remaining' in cabeceras:
+                self.restantes = int(cabeceras['x-rate-limit-remaining'])
+            if 'x-rate-limit-reset' in cabeceras:
+                self.reinicio = int(cabeceras['x-rate-limit-reset'])
+            if 'x-rate-limit-limit' in cabeceras:
+                self.limite = int(cabeceras['x-rate-limit-limit'])
+
+    def pausa(self):
+        """Segundos que hay que esperar antes de la siguiente petición."""
+        with self._lock:
+            if self.restantes is None or self.reinicio is None:
+                return 0.0
+            hasta_reinicio = self.reinicio - self.reloj()
+            if hasta_reinicio <= 0 or self.restantes > self.reserva:
+                return 0.0
+            return hasta_reinicio + 1  # margen por la diferencia de relojes
+
+    def esperar(self):
+        pausa = self.pausa()
+        if pausa > 0:
+            print(f"\n  ⏳ Cuota de la API agotada: esperando {pausa:.0f}s a que se reinicie la ventana...")
+            self.dormir(pausa)
+            self.esperado += pausa
+            metricas_esperas.registrar('limite_api_twitter', pausa)
+            with self._lock:
+                self.restantes = None  # se sabrá con la próxima respuesta
+
+
+class _AdaptadorRedireccion(requests.adapters.HTTPAdapter):
+    """Envía a `base` las peticiones dirigidas a la API real (para un servidor local de pruebas)."""
+
+    def __init__(self, base):
+        super().__init__()
+        self.base = urlsplit(base)
+
+    def send(self, request, **kwargs):
+        url = urlsplit(request.url)
+        request.url = urlunsplit((self.base.scheme, self.base.netloc, url.path, url.query, url.fragment))
+        return super().send(request, **kwargs)
+
+
+def ruta_limite(metodo, ruta):
+    """Endpoint al que se aplica el límite: método y ruta con los identificadores numéricos como `:id`."""
+    return metodo.upper(), _ID_EN_RUTA.sub('/:id', ruta)
+
+
+class ClienteTwitter(tweepy.Client):
+    """`tweepy.Client` que se regula con las cabeceras de límite de cada respuesta.
+
+    La API v2 limita cada endpoint por separado, así que hay un `RitmoLimites` por
+    endpoint (`ruta_limite`) y antes de cada petición se espera solo lo que indique
+    el de su endpoint. Conviene usarlo con `wait_on_rate_limit=True` por si otro
+    proceso gasta la misma cuota. Con `url_api` las peticiones van a otro servidor
+    (p. ej. `simulador_api_twitter`).
+    """
+
+    def __init__(self, *args, url_api=None, reserva=0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reserva = reserva
+        self.ritmos = {}
+        self._lock_ritmos = threading.Lock()
+        self.session.hooks['response'].append(self._leer_cabeceras)
+        if url_api:
+            self.session.mount(URL_API, _AdaptadorRedireccion(url_api))
+
+    @property
+    def esperado(self):
+        """Segundos esperados a la cuota, sumando todos los endpoints."""
+        with self._lock_ritmos:
+            return sum(ritmo.esperado for ritmo in self.ritmos.values())
+
+    def ritmo(self, metodo, ruta):
+        """`RitmoLimites` del endpoint de `ruta` (se crea la primera vez)."""
+        clave = ruta_limite(metodo, ruta)
+        with self._lock_ritmos:
+            if clave not in self.ritmos:
+                self.ritmos[clave] = RitmoLimites(self.reserva)
+            return self.ritmos[clave]
+
+    def _leer_cabeceras(self, respuesta, *args, **kwargs):
+        self.ritmo(respuesta.request.method, urlsplit(respuesta.url).path).actualizar(respuesta.headers)
+
+    def request(self, method, route, *args, **kwargs):
+        self.ritmo(method, route).esperar()
+        return super().request(method, route, *args, **kwargs)
@@ -0,0 +1,188 @@
+"""
+Sentimiento por Léxico - puntuación vectorizada de frases con NumPy
+Uso: from sentimiento_lexico import PuntuadorLexico, analizar_bloques_en_paralelo
+"""
+
+import itertools
+import os
+import re
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from lectura_corpus import contexto_procesos
+from motor_frecuencias import TOKEN_RE
+
+# Separador entre frases al tokenizar un bloque completo (\w nunca lo captura)
+_SEPARADOR = '\x00'
+_TOKEN_O_SEPARADOR_RE = re.compile(TOKEN_RE.pattern + '|' + _SEPARADOR)
+_ID_SEPARADOR = -2
+
+
+def recuento_por_aparicion(ids, palabras):
+    """Counter de `palabras[id]` para un array de ids, con las claves en orden de primera aparición."""
+    if not len(ids):
+        return Counter()
+    unicos, primera, cuentas = np.unique(ids, return_index=True, return_counts=True)
+    orden = np.argsort(primera)
+    return Counter({palabras[i]: int(c) for i, c in zip(unicos[orden].tolist(), cuentas[orden].tolist())})
+
+
+def clasificar(puntuacion):
+    if puntuacion > 0:
+        return "Positive"
+    elif puntuacion < 0:
+        return "Negative"
+    return "Neutral"
+
+
+class PuntuadorLexico:
+    """Puntúa bloques de frases con un léxico positivo y otro negativo.
+
+    Cada frase se tokeniza una sola vez y sus palabras del léxico se convierten en
+    ids. El bloque queda como una matriz dispersa (fila = frase, columna = id) en
+    formato de coordenadas, y puntuaciones, clasificaciones y recuentos de palabras
+    se obtienen con reducciones de NumPy sobre esa matriz.
+    """
+
+    def __init__(self, stopwords, positive_lex, negative_lex):
+        # Las stopwords nunca puntúan, así que quedan fuera del vocabulario
+        palabras = sorted((set(positive_lex) | set(negative_lex)) - set(stopwords))
+        self._iniciar_vocabulario(palabras)
+        self.es_positiva = np.array([p in positive_lex for p in palabras], dtype=bool)
+        self.es_negativa = np.array([p in negative_lex for p in palabras], dtype=bool)
+
+    def _iniciar_vocabulario(self, palabras):
+        self.vocabulario = {palabra: i for i, palabra in enumerate(palabras)}
+        self.palabras = palabras
+        self._codigos = dict(self.vocabulario, **{_SEPARADOR: _ID_SEPARADOR})
+
+    def ids_bloque(self, frases):
+        """Devuelve (filas, ids) de las palabras del léxico de cada frase, en orden.
+
+        El bloque se tokeniza de una vez, con un separador entre frases que luego
+        indica a qué fila pertenece cada token.
+        """
+        texto = _SEPARADOR.join(frases).lower()
+        if texto.count(_SEPARADOR) != max(len(frases) - 1, 0):
+            # Alguna frase contiene el separador: tokenizamos frase a frase
+            return self._ids_por_frase(frases)
+
+        buscar = self._codigos.get
+        codigos = np.array([buscar(token, -1) for token in _TOKEN_O_SEPARADOR_RE.findall(texto)], dtype=np.int64)
+        filas = np.cumsum(codigos == _ID_SEPARADOR)
+        en_lexico = codigos >= 0
+        return filas[en_lexico], codigos[en_lexico]
+
+    def _ids_por_frase(self, frases):
+        buscar = self.vocabulario.get
+        filas = []
+        ids = []
+        for fila, frase in enumerate(frases):
+            for token in TOKEN_RE.findall(frase.lower()):
+                token_id = buscar(token)
+                if token_id is not None:
+                    filas.append(fila)
+                    ids.append(token_id)
+        return np.array(filas, dtype=np.int64), np.array(ids, dtype=np.int64)
+
+    def analizar_bloque(self, frases):
+        """Analiza un bloque de frases.
+
+        Devuelve `(resultados, frecuencia_positivas, frecuencia_negativas)`, donde
+        cada resultado tiene las mismas claves que devolvía `analyze_sentiment`.
+        """
+        num_frases = len(frases)
+        filas, ids = self.ids_bloque(frases)
+        positivas = self.es_positiva[ids]
+        negativas = self.es_negativa[ids]
+
+        # Indicadores por frase: cuántas palabras positivas y negativas tiene cada una
+        puntuaciones = (np.bincount(filas[positivas], minlength=num_frases)
+                        - np.bincount(filas[negativas], minlength=num_frases))
+
+        # Límites de cada frase dentro de los arrays dispersos (filas está ordenado)
+        limites = np.searchsorted(filas, np.arange(num_frases + 1))
+        palabras = self.palabras
+        ids_lista = ids.tolist()
+        positivas_lista = positivas.tolist()
+        negativas_lista = negativas.tolist()
+
+        resultados = []
+        for fila, frase in enumerate(frases):
+            inicio, fin = limites[fila], limites[fila + 1]
+            puntuacion = int(puntuaciones[fila])
+            resultados.append({
+                "text": frase,
+                "score": puntuacion,
+                "classification": clasificar(puntuacion),
+                "positive_words": [palabras[ids_lista[k]] for k in range(inicio, fin) if positivas_lista[k]],
+                "negative_words": [palabras[ids_lista[k]] for k in range(inicio, fin) if negativas_lista[k]],
+            })
+
+        # Una palabra en ambos léxicos cuenta solo como positiva en los recuentos
+        return (resultados,
+                recuento_por_aparicion(ids[positivas], palabras),
+                recuento_por_aparicion(ids[negativas & ~positivas], palabras))
+
+
+# --- MODO PARALELO ---
+
+# Puntuador de cada proceso worker, recibido una sola vez por el inicializador del pool
+_puntuador_worker = None
+
+
+def _inicializar_worker(puntuador):
+    global _puntuador_worker
+    _puntuador_worker = puntuador
+
+
+def _analizar_bloque_worker(frases):
+    """Worker: analiza un bloque. El texto de cada frase no se devuelve (el padre ya lo tiene)."""
+    resultados, positivas, negativas = _puntuador_worker.analizar_bloque(frases)
+    for resultado in resultados:
+        del resultado["text"]
+    return resultados, positivas, negativas
+
+
+def analizar_bloques_en_paralelo(bloques, puntuador, num_workers=None):
+    """Analiza bloques de frases repartiéndolos entre un pool de procesos.
+
+    `puntuador` es cualquier objeto con `analizar_bloque(frases)` (p. ej. un
+    `PuntuadorLexico`). Se envía a cada worker una sola vez, a través del
+    inicializador del pool, junto con sus stopwords y léxicos; cada tarea solo
+    lleva su bloque de frases. Produce `(resultados, frecuencia_positivas,
+    frecuencia_negativas)` por bloque, en el mismo orden de entrada.
+
+    Como mucho hay 2 bloques pendientes por worker, así que un corpus leído en
+    streaming no se carga entero en memoria. Con un solo bloque, un solo worker o
+    sin 'fork' disponible, el análisis se hace en este proceso.
+    """
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+
+    bloques = iter(bloques)
+    primeros = list(itertools.islice(bloques, 2))
+    bloques = itertools.chain(primeros, bloques)
+
+    contexto = contexto_procesos()
+    if num_workers <= 1 or len(primeros) < 2 or contexto is None:
+        for bloque in bloques:
+            yield puntuador.analizar_bloque(bloque)
+        return
+
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=contexto,
+                             initializer=_inicializar_worker, initargs=(puntuador,)) as pool:
+        pendientes = deque()
+        for bloque in bloques:
+            pendientes.append((bloque, pool.submit(_analizar_bloque_worker, bloque)))
+            if len(pendientes) >= 2 * num_workers:
+                yield _unir_texto(*pendientes.popleft())
+        while pendientes:
+            yield _unir_texto(*pendientes.popleft())
+
+
+def _unir_texto(bloque, futuro):
+    resultados, positivas, negativas = futuro.result()
+    return [{"text": frase, **resultado} for frase, resultado in zip(bloque, resultados)], positivas, negativas
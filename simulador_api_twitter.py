@@ -0,0 +1,148 @@
+"""
+Simulador de la API de Twitter - servidor local del endpoint de búsqueda con límite de peticiones
+Ejecutar: python simulador_api_twitter.py  (descarga de prueba contra el simulador)
+Uso: from simulador_api_twitter import ServidorSimulado
+"""
+
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+RUTA_BUSQUEDA = "/2/tweets/search/recent"
+
+
+class ServidorSimulado:
+    """Servidor HTTP local que imita `GET /2/tweets/search/recent`.
+
+    Sirve `total_tweets` tweets inventados, paginados con `next_token` y
+    `max_results` (10-100, como la API real). Admite `limite` peticiones por
+    ventana de `ventana` segundos y manda las cabeceras `x-rate-limit-*`; al
+    pasarse responde 429. `latencia` simula el tiempo de respuesta de cada página.
+    """
+
+    def __init__(self, total_tweets=5000, limite=450, ventana=900, latencia=0.0):
+        self.total_tweets = total_tweets
+        self.limite = limite
+        self.ventana = ventana
+        self.latencia = latencia
+        self.peticiones = 0
+        self.rechazadas = 0
+        self._inicio_ventana = time.time()
+        self._usadas = 0
+        self._lock = threading.Lock()
+        self._servidor = ThreadingHTTPServer(('127.0.0.1', 0), self._manejador())
+        self._hilo = None
+
+    @property
+    def url(self):
+        host, puerto = self._servidor.server_address
+        return f"http://{host}:{puerto}"
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+    def _consumir_cuota(self):
+        """Cuenta una petición; devuelve `(aceptada, cabeceras de límite)`."""
+        with self._lock:
+            ahora = time.time()
+            if ahora - self._inicio_ventana >= self.ventana:
+                self._inicio_ventana = ahora
+                self._usadas = 0
+            self.peticiones += 1
+            aceptada = self._usadas < self.limite
+            if aceptada:
+                self._usadas += 1
+            else:
+                self.rechazadas += 1
+            cabeceras = {
+                'x-rate-limit-limit': str(self.limite),
+                'x-rate-limit-remaining': str(self.limite - self._usadas),
+                # La API redondea a segundos enteros; hacia arriba para no adelantarse
+                'x-rate-limit-reset': str(int(self._inicio_ventana + self.ventana) + 1),
+            }
+            return aceptada, cabeceras
+
+    def _pagina(self, parametros):
+        max_results = int(parametros.get('max_results', ['10'])[0])
+        if not 10 <= max_results <= 100:
+            return 400, {'errors': [{'message': 'max_results debe estar entre 10 y 100'}]}
+        desde = int(parametros.get('next_token', ['0'])[0])
+        hasta = min(desde + max_results, self.total_tweets)
+        fecha = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        tweets = [{
+            'id': str(1000 + i),
+            'text': f"Tweet simulado número {i}",
+            'author_id': str(i % 50),
+            'created_at': (fecha + timedelta(minutes=i)).strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+            'lang': 'es',
+            'public_metrics': {'like_count': i % 7, 'retweet_count': i % 3, 'reply_count': i % 2, 'quote_count': 0},
+        } for i in range(desde, hasta)]
+        usuarios = [{'id': autor, 'name': f"Usuario {autor}", 'username': f"usuario{autor}", 'verified': False}
+                    for autor in sorted({t['author_id'] for t in tweets})]
+        meta = {'result_count': len(tweets)}
+        if hasta < self.total_tweets:
+            meta['next_token'] = str(hasta)
+        return 200, {'data': tweets, 'includes': {'users': usuarios}, 'meta': meta}
+
+    def _manejador(self):
+        simulador = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                if url.path != RUTA_BUSQUEDA:
+                    return self._responder(404, {'errors': [{'message': 'Ruta no simulada'}]}, {})
+                aceptada, cabeceras = simulador._consumir_cuota()
+                if not aceptada:
+                    return self._responder(429, {'title': 'Too Many Requests'}, cabeceras)
+                time.sleep(simulador.latencia)
+                estado, cuerpo = simulador._pagina(parse_qs(url.query))
+                self._responder(estado, cuerpo, cabeceras)
+
+            def _responder(self, estado, cuerpo, cabeceras):
+                contenido = json.dumps(cuerpo).encode('utf-8')
+                self.send_response(estado)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(contenido)))
+                for nombre, valor in cabeceras.items():
+                    self.send_header(nombre, valor)
+                self.end_headers()
+                self.wfile.write(contenido)
+
+            def log_message(self, *args):
+                pass  # sin una línea por petición en la consola
+
+        return Manejador
+
+
+def main():
+    from ritmo_twitter import ClienteTwitter
+    from tweets_analisis_sentimientos import descargar_tweets_busqueda
+
+    # Ventana corta para ver el ritmo en acción: 5 peticiones cada 3 segundos
+    with ServidorSimulado(total_tweets=1500, limite=5, ventana=3, latencia=0.05) as servidor:
+        cliente = ClienteTwitter(bearer_token="simulado", url_api=servidor.url, wait_on_rate_limit=True)
+        inicio = time.perf_counter()
+        tweets = descargar_tweets_busqueda(cliente, "prueba", max_tweets=1500)
+        print(f"{len(tweets)} tweets en {time.perf_counter() - inicio:.1f}s | "
+              f"{servidor.peticiones} peticiones, {servidor.rechazadas} rechazadas con 429, "
+              f"{cliente.esperado:.1f}s esperando a la cuota")
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,13 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 
+from cache_inferencia import cache_inferencia_compartida, version_analizador
+from esperas import metricas_esperas
+from flujo_lotes import procesar_en_flujo
+from inferencia_lotes import InferenciaPorLotes
+from registro_modelos import analizador_combinado, obtener_analizador
+from ritmo_twitter import ClienteTwitter
+
 # Silenciar advertencias de HuggingFace
 os.environ['HF_HUB_DISABLE_SYMLINKS_WARNING'] = '1'
 warnings.filterwarnings('ignore')
@@ -32,11 +39,23 @@ warnings.filterwarnings('ignore')
 # CONFIGURACIÓN
 # ============================================
 
+# Tweets por página: el máximo que permite la API v2 (una petición por cada 100 tweets)
+MAX_RESULTADOS_PAGINA = 100
+
+# Inferencia en CPU: textos por lote (agrupados por longitud) e hilos de PyTorch (None: automático)
+inferencia = InferenciaPorLotes(tamaño_lote=32, hilos=None)
+
+# Sentimiento y emoción con una sola tokenización por texto (False: un predict por modelo)
+ANALISIS_COMBINADO = True
+
+# Guardar en disco el resultado de cada texto: los repetidos (retuits, búsquedas repetidas) no se recalculan
+USAR_CACHE_INFERENCIA = True
+
 BEARER_TOKEN = "AAAAAAAAAAAAAAAAAAAAAF445QEAAAAAjCxgFt6xBtmKFlFmEDuPEVKmpWc%3DZmvdUOvevSKimRt4lrgxnmF2mbGle3wJxlRoZhqHRjzCEIksYt1"
 
 # Verificar pysentimiento
 try:
-    from pysentimiento import create_analyzer
+    import pysentimiento
     print("✓ pysentimiento disponible")
     PYSENTIMIENTO_AVAILABLE = True
 except ImportError:
@@ -84,7 +103,9 @@ def inicializar_clientes():
 
     # Cliente de Twitter
     try:
-        twitter_client = tweepy.Client(bearer_token=BEARER_TOKEN)
+        # Se regula con las cabeceras de límite: al agotar la cuota espera a que se
+        # reinicie la ventana. Si aun así llega un 429, tweepy espera y reintenta
+        twitter_client = ClienteTwitter(bearer_token=BEARER_TOKEN, wait_on_rate_limit=True)
         print("✓ Cliente de Twitter inicializado")
     except Exception as e:
         print(f"✗ Error al inicializar Twitter: {e}")
@@ -93,8 +114,9 @@ def inicializar_clientes():
     # Analizadores de pysentimiento
     try:
         print("Cargando modelos de pysentimiento (puede tardar un momento)...")
-        sentiment_analyzer = create_analyzer(task="sentiment", lang="es")
-        emotion_analyzer = create_analyzer(task="emotion", lang="es")
+        # Una sola copia de cada modelo en el proceso
+        sentiment_analyzer = obtener_analizador("sentiment", "es")
+        emotion_analyzer = obtener_analizador("emotion", "es")
         print("✓ Analizadores de sentimientos y emociones cargados")
         return twitter_client, sentiment_analyzer, emotion_analyzer
     except Exception as e:
@@ -106,6 +128,119 @@ def inicializar_clientes():
 # DESCARGA DE TWEETS
 # ============================================
 
+def paginas_busqueda(twitter_client, query, max_tweets=100):
+    """Genera los tweets de una búsqueda página a página: una lista por página."""
+    usuarios = {}
+    tweets_descargados = 0
+
+    paginator = tweepy.Paginator(
+        twitter_client.search_recent_tweets,
+        query=query,
+        max_results=min(MAX_RESULTADOS_PAGINA, max(10, max_tweets)),  # La API admite de 10 a 100
+        tweet_fields=['created_at', 'author_id', 'public_metrics', 'lang'],
+        expansions=['author_id'],
+        user_fields=['username', 'name', 'verified']
+    )
+
+    print("Iniciando descarga paginada...")
+    inicio_pagina = time.perf_counter()
+    for i, response in enumerate(paginator):
+        metricas_esperas.registrar('pagina_tweets', time.perf_counter() - inicio_pagina)
+        print(f"  Página {i+1} procesada...", end='\r')
+
+        # Guardar usuarios de la página
+        if response.includes and 'users' in response.includes:
+            for user in response.includes['users']:
+                usuarios[user.id] = user
+
+        # Procesar tweets de la página (sin pasarse del límite)
+        pagina = []
+        for tweet in (response.data or [])[:max_tweets - tweets_descargados]:
+            autor = usuarios.get(tweet.author_id)
+            pagina.append({
+                'id': str(tweet.id),
+                'texto': tweet.text,
+                'fecha': tweet.created_at.strftime("%Y-%m-%d %H:%M:%S") if tweet.created_at else 'N/A',
+                'autor_username': autor.username if autor else 'N/A',
+                'autor_nombre': autor.name if autor else 'N/A',
+                'verificado': autor.verified if autor else False,
+                'idioma': tweet.lang if hasattr(tweet, 'lang') else 'N/A',
+                'likes': tweet.public_metrics['like_count'] if hasattr(tweet, 'public_metrics') else 0,
+                'retweets': tweet.public_metrics['retweet_count'] if hasattr(tweet, 'public_metrics') else 0,
+                'respuestas': tweet.public_metrics['reply_count'] if hasattr(tweet, 'public_metrics') else 0,
+            })
+        tweets_descargados += len(pagina)
+        yield pagina
+
+        if tweets_descargados >= max_tweets:
+            break # Salir del bucle de paginación
+
+        # Sin pausa fija: la siguiente página se pide ya y el cliente solo espera
+        # si la API indica que se alcanzó el límite de peticiones
+        inicio_pagina = time.perf_counter()
+
+
+def paginas_usuario(twitter_client, username, max_tweets=100):
+    """Genera los tweets de un usuario página a página: una lista por página."""
+    user = twitter_client.get_user(username=username)
+    if not user.data:
+        print(f"✗ Usuario @{username} no encontrado.")
+        return
+    user_id = user.data.id
+
+    tweets_descargados = 0
+
+    paginator = tweepy.Paginator(
+        twitter_client.get_users_tweets,
+        id=user_id,
+        max_results=min(MAX_RESULTADOS_PAGINA, max(5, max_tweets)),  # La API admite de 5 a 100
+        tweet_fields=['created_at', 'public_metrics', 'lang']
+    )
+
+    print("Iniciando descarga paginada...")
+    inicio_pagina = time.perf_counter()
+    for i, response in enumerate(paginator):
+        metricas_esperas.registrar('pagina_tweets', time.perf_counter() - inicio_pagina)
+        print(f"  Página {i+1} procesada...", end='\r')
+
+        pagina = []
+        for tweet in (response.data or [])[:max_tweets - tweets_descargados]:
+            pagina.append({
+                'id': str(tweet.id),
+                'texto': tweet.text,
+                'fecha': tweet.created_at.strftime("%Y-%m-%d %H:%M:%S") if tweet.created_at else 'N/A',
+                'autor_username': username,
+                'autor_nombre': user.data.name,
+                'verificado': user.data.verified if hasattr(user.data, 'verified') else False,
+                'idioma': tweet.lang if hasattr(tweet, 'lang') else 'N/A',
+                'likes': tweet.public_metrics['like_count'] if hasattr(tweet, 'public_metrics') else 0,
+                'retweets': tweet.public_metrics['retweet_count'] if hasattr(tweet, 'public_metrics') else 0,
+                'respuestas': tweet.public_metrics['reply_count'] if hasattr(tweet, 'public_metrics') else 0,
+            })
+        tweets_descargados += len(pagina)
+        yield pagina
+
+        if tweets_descargados >= max_tweets:
+            break
+
+        inicio_pagina = time.perf_counter()
+
+
+def _descargar(paginas):
+    """Descarga todas las páginas de uno de los generadores anteriores."""
+    try:
+        paginas = list(paginas)
+    except tweepy.TweepyException as e:
+        print(f"\n✗ Error al descargar tweets: {e}")
+        return []
+
+    tweets = [tweet for pagina in paginas for tweet in pagina]
+    print(f"\n✓ Descargados: {len(tweets)} tweets de {len(paginas)} página(s)")
+    metricas_esperas.resumen()
+    print(f"{'='*70}\n")
+    return tweets
+
+
 def descargar_tweets_busqueda(twitter_client, query, max_tweets=100):
     """Descarga tweets por búsqueda usando paginación para mayor eficiencia."""
     print(f"\n{'='*70}")
@@ -114,64 +249,7 @@ def descargar_tweets_busqueda(twitter_client, query, max_tweets=100):
     print(f"Cantidad solicitada: {max_tweets}")
     print("-" * 70)
 
-    tweets = []
-    usuarios = {}
-    tweets_descargados = 0
-
-    try:
-        paginator = tweepy.Paginator(
-            twitter_client.search_recent_tweets,
-            query=query,
-            max_results=10,  # Máximo por página
-            tweet_fields=['created_at', 'author_id', 'public_metrics', 'lang'],
-            expansions=['author_id'],
-            user_fields=['username', 'name', 'verified']
-        )
-
-        print("Iniciando descarga paginada...")
-        for i, response in enumerate(paginator):
-            print(f"  Página {i+1} procesada...", end='\r')
-            
-            # Guardar usuarios de la página
-            if response.includes and 'users' in response.includes:
-                for user in response.includes['users']:
-                    usuarios[user.id] = user
-
-            # Procesar tweets de la página
-            if response.data:
-                for tweet in response.data:
-                    if tweets_descargados < max_tweets:
-                        autor = usuarios.get(tweet.author_id)
-                        tweet_data = {
-                            'id': str(tweet.id),
-                            'texto': tweet.text,
-                            'fecha': tweet.created_at.strftime("%Y-%m-%d %H:%M:%S") if tweet.created_at else 'N/A',
-                            'autor_username': autor.username if autor else 'N/A',
-                            'autor_nombre': autor.name if autor else 'N/A',
-                            'verificado': autor.verified if autor else False,
-                            'idioma': tweet.lang if hasattr(tweet, 'lang') else 'N/A',
-                            'likes': tweet.public_metrics['like_count'] if hasattr(tweet, 'public_metrics') else 0,
-                            'retweets': tweet.public_metrics['retweet_count'] if hasattr(tweet, 'public_metrics') else 0,
-                            'respuestas': tweet.public_metrics['reply_count'] if hasattr(tweet, 'public_metrics') else 0,
-                        }
-                        tweets.append(tweet_data)
-                        tweets_descargados += 1
-                    else:
-                        break  # Límite alcanzado
-            
-            if tweets_descargados >= max_tweets:
-                break # Salir del bucle de paginación
-
-            # Pausa cortés para no saturar la API
-            time.sleep(1)
-
-        print(f"\n✓ Descargados: {len(tweets)} tweets de {i+1} página(s)")
-        print(f"{'='*70}\n")
-        return tweets
-
-    except tweepy.TweepyException as e:
-        print(f"\n✗ Error al descargar tweets: {e}")
-        return []
+    return _descargar(paginas_busqueda(twitter_client, query, max_tweets))
 
 
 def descargar_tweets_usuario(twitter_client, username, max_tweets=100):
@@ -182,91 +260,39 @@ def descargar_tweets_usuario(twitter_client, username, max_tweets=100):
     print(f"Cantidad solicitada: {max_tweets}")
     print("-" * 70)
 
-    try:
-        user = twitter_client.get_user(username=username)
-        if not user.data:
-            print(f"✗ Usuario @{username} no encontrado.")
-            return []
-        user_id = user.data.id
-
-        tweets = []
-        tweets_descargados = 0
-
-        paginator = tweepy.Paginator(
-            twitter_client.get_users_tweets,
-            id=user_id,
-            max_results=100,
-            tweet_fields=['created_at', 'public_metrics', 'lang']
-        )
-        
-        print("Iniciando descarga paginada...")
-        for i, response in enumerate(paginator):
-            print(f"  Página {i+1} procesada...", end='\r')
-
-            if response.data:
-                for tweet in response.data:
-                    if tweets_descargados < max_tweets:
-                        tweet_data = {
-                            'id': str(tweet.id),
-                            'texto': tweet.text,
-                            'fecha': tweet.created_at.strftime("%Y-%m-%d %H:%M:%S") if tweet.created_at else 'N/A',
-                            'autor_username': username,
-                            'autor_nombre': user.data.name,
-                            'verificado': user.data.verified if hasattr(user.data, 'verified') else False,
-                            'idioma': tweet.lang if hasattr(tweet, 'lang') else 'N/A',
-                            'likes': tweet.public_metrics['like_count'] if hasattr(tweet, 'public_metrics') else 0,
-                            'retweets': tweet.public_metrics['retweet_count'] if hasattr(tweet, 'public_metrics') else 0,
-                            'respuestas': tweet.public_metrics['reply_count'] if hasattr(tweet, 'public_metrics') else 0,
-                        }
-                        tweets.append(tweet_data)
-                        tweets_descargados += 1
-                    else:
-                        break
-            
-            if tweets_descargados >= max_tweets:
-                break
-            
-            time.sleep(1)
-
-        print(f"\n✓ Descargados: {len(tweets)} tweets de {i+1} página(s)")
-        print(f"{'='*70}\n")
-        return tweets
-
-    except tweepy.TweepyException as e:
-        print(f"\n✗ Error al descargar tweets: {e}")
-        return []
+    return _descargar(paginas_usuario(twitter_client, username, max_tweets))
 
 
 # ============================================
 # ANÁLISIS DE SENTIMIENTOS
 # ============================================
 
-def analizar_tweets(tweets, sentiment_analyzer, emotion_analyzer):
-    """Analiza sentimientos y emociones de los tweets usando procesamiento por lotes."""
-    print(f"\n{'='*70}")
-    print("ANALIZANDO SENTIMIENTOS Y EMOCIONES")
-    print(f"{'='*70}")
-    print(f"Analizando {len(tweets)} tweets...")
-    print("-" * 70)
+def analizar_lote(tweets, sentiment_analyzer, emotion_analyzer):
+    """Añade a una copia de cada tweet su sentimiento y su emoción (por lotes agrupados por longitud).
 
-    if not tweets:
-        print("No hay tweets para analizar.")
-        return []
+    Con la caché de inferencia solo pasan por los modelos los textos que no se
+    analizaron antes con la misma versión de los modelos.
+    """
+    def predecir(textos):
+        if ANALISIS_COMBINADO:
+            combinado = analizador_combinado(sentimiento=sentiment_analyzer, emocion=emotion_analyzer)
+            return inferencia.predecir(combinado, textos, 'sentimiento+emocion')
+        sent = inferencia.predecir(sentiment_analyzer, textos, 'sentimiento')
+        emo = inferencia.predecir(emotion_analyzer, textos, 'emocion')
+        return [{'sentimiento': s, 'emocion': e} for s, e in zip(sent, emo)]
 
-    # Extraer todos los textos para el análisis por lotes
     textos = [tweet['texto'] for tweet in tweets]
-
-    # Realizar análisis en un solo lote (mucho más eficiente)
-    print("  Procesando sentimientos...")
-    sent_results = sentiment_analyzer.predict(textos)
-    print("  Procesando emociones...")
-    emo_results = emotion_analyzer.predict(textos)
+    if USAR_CACHE_INFERENCIA:
+        versiones = {'sentimiento': version_analizador(sentiment_analyzer),
+                     'emocion': version_analizador(emotion_analyzer)}
+        resultados = cache_inferencia_compartida().predecir(textos, versiones, predecir)
+    else:
+        resultados = predecir(textos)
+    sent_results = [resultado['sentimiento'] for resultado in resultados]
+    emo_results = [resultado['emocion'] for resultado in resultados]
 
     tweets_analizados = []
-    for i, tweet in enumerate(tweets):
-        sent_result = sent_results[i]
-        emo_result = emo_results[i]
-
+    for tweet, sent_result, emo_result in zip(tweets, sent_results, emo_results):
         # Añadir análisis al tweet
         tweet_analizado = tweet.copy()
         tweet_analizado['sentimiento'] = sent_result.output
@@ -278,13 +304,67 @@ def analizar_tweets(tweets, sentiment_analyzer, emotion_analyzer):
         tweet_analizado['emocion_scores'] = {k: float(v) for k, v in emo_result.probas.items()}
 
         tweets_analizados.append(tweet_analizado)
+    return tweets_analizados
+
+
+def analizar_tweets(tweets, sentiment_analyzer, emotion_analyzer):
+    """Analiza sentimientos y emociones de los tweets usando procesamiento por lotes."""
+    print(f"\n{'='*70}")
+    print("ANALIZANDO SENTIMIENTOS Y EMOCIONES")
+    print(f"{'='*70}")
+    print(f"Analizando {len(tweets)} tweets...")
+    print("-" * 70)
+
+    if not tweets:
+        print("No hay tweets para analizar.")
+        return []
+
+    # Lotes de tamaño fijo: la memoria no crece con el número de tweets
+    print("  Procesando sentimientos y emociones...")
+    tweets_analizados = analizar_lote(tweets, sentiment_analyzer, emotion_analyzer)
 
     print(f"\n✓ Análisis completado: {len(tweets_analizados)} tweets procesados")
+    inferencia.resumen()
+    if USAR_CACHE_INFERENCIA:
+        cache_inferencia_compartida().resumen()
     print(f"{'='*70}\n")
 
     return tweets_analizados
 
 
+def analizar_en_flujo(paginas, sentiment_analyzer, emotion_analyzer, titulo):
+    """Descarga y analiza a la vez: cada página se analiza mientras se descargan las siguientes.
+
+    `paginas` es uno de los generadores `paginas_busqueda` o `paginas_usuario`. Los
+    resultados se muestran por lotes según salen y se devuelven todos al final.
+    """
+    print(f"\n{'='*70}")
+    print(f"DESCARGANDO Y ANALIZANDO EN FLUJO: {titulo}")
+    print(f"{'='*70}")
+
+    conteo = Counter()
+
+    def mostrar_lote(lote):
+        conteo.update(tweet['sentimiento'] for tweet in lote)
+        resumen = ", ".join(f"{sentimiento}: {n}" for sentimiento, n in conteo.most_common())
+        print(f"  ✓ Lote de {len(lote)} tweets analizado | {sum(conteo.values())} en total ({resumen})")
+
+    try:
+        tweets_analizados = procesar_en_flujo(
+            paginas, lambda lote: analizar_lote(lote, sentiment_analyzer, emotion_analyzer), al_lote=mostrar_lote)
+    except tweepy.TweepyException as e:
+        print(f"\n✗ Error al descargar tweets: {e}")
+        return []
+
+    print(f"\n✓ Análisis completado: {len(tweets_analizados)} tweets procesados")
+    inferencia.resumen()
+    if USAR_CACHE_INFERENCIA:
+        cache_inferencia_compartida().resumen()
+    metricas_esperas.resumen()
+    print(f"{'='*70}\n")
+    return tweets_analizados
+
+
 # ============================================
 # ESTADÍSTICAS
 # ============================================
@@ -527,13 +607,11 @@ def main():
             max_tweets = int(cantidad) if cantidad.isdigit() else 25
             max_tweets = min(5000, max(10, max_tweets))
 
-            # Descargar tweets
-            tweets = descargar_tweets_busqueda(twitter_client, query, max_tweets)
-
-            if tweets:
-                # Analizar
-                tweets_analizados = analizar_tweets(tweets, sentiment_analyzer, emotion_analyzer)
+            # Descargar y analizar a la vez
+            tweets_analizados = analizar_en_flujo(paginas_busqueda(twitter_client, query, max_tweets),
+                                                  sentiment_analyzer, emotion_analyzer, f"'{query}'")
 
+            if tweets_analizados:
                 # Estadísticas
                 estadisticas = generar_estadisticas(tweets_analizados)
 
@@ -560,13 +638,11 @@ def main():
             max_tweets = int(cantidad) if cantidad.isdigit() else 25
             max_tweets = min(3200, max(10, max_tweets))
 
-            # Descargar tweets
-            tweets = descargar_tweets_usuario(twitter_client, username, max_tweets)
-
-            if tweets:
-                # Analizar
-                tweets_analizados = analizar_tweets(tweets, sentiment_analyzer, emotion_analyzer)
+            # Descargar y analizar a la vez
+            tweets_analizados = analizar_en_flujo(paginas_usuario(twitter_client, username, max_tweets),
+                                                  sentiment_analyzer, emotion_analyzer, f"@{username}")
 
+            if tweets_analizados:
                 # Estadísticas
                 estadisticas = generar_estadisticas(tweets_analizados)
 